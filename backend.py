@@ -3,43 +3,64 @@
 AppController is the only public API surface consumed by any frontend.
 This module has zero imports from frontend.py or any GUI toolkit.
 """
-import sys, ctypes, hashlib, json, subprocess, threading, traceback, atexit
+import os, sys, ctypes, hashlib, hmac, json, signal, struct, subprocess, threading, traceback
+import asyncio, atexit, getpass, heapq, re, zlib
+from bisect import bisect_right
+from collections import deque
+from string import Formatter
+from time import monotonic, perf_counter
 from pathlib import Path
-from datetime import datetime, timedelta, time as dtime
+from types import MappingProxyType
+from datetime import date as ddate, datetime, timedelta, time as dtime
 
 if getattr(sys, "frozen", False):
     sys.path.insert(0, sys._MEIPASS)
 
 from definitions import (
-    APP_NAME, APP_MUTEX, CONFIG_FILENAME, LOG_FILENAME, LOG_MAX_BYTES,
+    APP_NAME, APP_MUTEX, CONFIG_FILENAME,
+    STATE_FILENAME, STATE_VERSION, STATE_COMPACT_BYTES,
+    USAGE_LOG_FILENAME, USAGE_KEY_FILENAME, USAGE_KEY_ITERATIONS, USAGE_LOG_MAX_BYTES,
+    PW_VERIFY_TARGET_MS, PW_SCRYPT_MAXMEM, PW_FREE_ATTEMPTS, PW_BACKOFF_SEC, PW_BACKOFF_MAX_SEC,
+    PW_CLIENTS_MAX,
+    PROFILE_ENV,
     LANGS, ACTION_KEYS, ACTION_NEXT, DAYS_EN, DEFAULT_CFG,
     DEFAULT_LANG, DEFAULT_ACTION, DEFAULT_DAY_LIMIT_MIN,
-    DEFAULT_TAKT_SEC, LANG, UNLIMITED,
-    WATCHDOG_SLEEP_GAP_SEC, USAGE_RETENTION_DAYS, REMAINING_MAX_DAYS,
+    DEFAULT_TAKT_SEC, TAKT_SEC_LO, TAKT_SEC_HI, DAY_LIMIT_MIN_LO, DAY_LIMIT_MIN_HI,
+    WEEK_LIMIT_MIN_HI, MONTH_LIMIT_MIN_HI, ROLLOVER_MIN_HI, DEFAULT_ROLLOVER_DAYS, ROLLOVER_DAYS_HI,
+    I18N_DIR, UNLIMITED,
+    CONFIG_DEBOUNCE_SEC, CONFIG_POLL_SEC, WRITE_LOCK_TIMEOUT_SEC,
+    CORE_PING_SEC, CORE_STOP_SEC, BUS_QUEUE_LEN, DASHBOARD_HOST,
+    USERS_DIR, USER_USAGE_FILENAME, USER_KEYS, SESSION_POLL_SEC,
+    WATCHDOG_STALL_SEC, STALL_SEC_LO, STALL_SEC_HI, SUPERVISOR_CHECK_SEC, BUDGET_CHECK_SEC,
+    WATCHDOG_SLEEP_GAP_SEC, USAGE_RETENTION_DAYS, REMAINING_MAX_DAYS, TRANSITION_IDLE_DAYS,
+    WHATIF_POOL_MIN, WHATIF_POOL_WORKERS,
     AUTOSTART_KEY, AUTOSTART_NAME, AUTOSTART_APPROVED_KEY, AUTOSTART_ENABLED_DATA,
 )
+from core import Core, Frozen, base_dir as _base, res_dir as _res, log as _log, write_atomic as _write_atomic
+from metrics import Counter, Histogram, TimedRLock, MetricsExporter, Profiler, thread_dump, resident_usage
+from bus import (Event, EventBus, Subscription, Trigger, Warn, Tick, ConfigChanged, DayRollover, Adjust,
+                 SleepResume, Stall, SessionSwitch)
+from web import Dashboard
 
-_cache: dict = {"cfg": {}, "mtime": 0.0}
+_cache: dict = {"cfg": None, "mtime": 0.0, "watched": False}
 _cache_lock   = threading.Lock()
-_uk: dict     = {"date": "", "key": ""}   # used-key memo
-
-# ---------------------------------------------------------------------------
-# Internal helpers
-# ---------------------------------------------------------------------------
-
-def _base() -> Path:
-    return Path(sys.executable).parent if getattr(sys, "frozen", False) else Path(__file__).parent
-
-def _log(msg: str) -> None:
-    try:
-        p = _base() / LOG_FILENAME
-        if p.exists() and p.stat().st_size > LOG_MAX_BYTES:
-            t = p.read_text(encoding="utf-8", errors="replace")
-            p.write_text(t[len(t) // 2:], encoding="utf-8")
-        with open(p, "a", encoding="utf-8") as f:
-            f.write(msg + "\n")
-    except Exception:
-        pass
+_write_lock   = threading.RLock()          # serialises read-modify-write of config.json
+_i18n: dict   = {}                        # lang -> compiled catalog, filled on first use
+_fmt: dict    = {}                        # (kind, lang[, day]) -> precomputed formatting tables
+_chain: dict  = {"obj": None}             # process-wide UsageChain, created on first use
+_pw_cost: dict = {}                       # scheme -> calibrated password hash cost
+
+_h_tick       = Histogram("yourtime_watchdog_tick_seconds", "Watchdog loop iteration time")
+_h_lock_wait  = Histogram("yourtime_watchdog_lock_wait_seconds", "Wait to acquire the Watchdog lock")
+_h_lock_hold  = Histogram("yourtime_watchdog_lock_hold_seconds", "Time the Watchdog lock is held")
+_h_persist    = Histogram("yourtime_persist_seconds", "persist_used: config.json plus usage.log")
+_h_cfg_write  = Histogram("yourtime_config_write_seconds", "config.json write")
+_h_state_write = Histogram("yourtime_state_write_seconds", "state.bin append, compaction or fsync")
+_c_reloads    = Counter("yourtime_config_reloads_total", "config.json parses")
+_c_triggers   = Counter("yourtime_triggers_total", "Enforcement triggers fired")
+_c_warnings   = Counter("yourtime_warnings_total", "Warnings fired")
+_c_remaining  = Counter("yourtime_get_remaining_calls_total", "AppController.get_remaining calls")
+_c_stalls     = Counter("yourtime_watchdog_restarts_total", "Stalled Watchdogs replaced by the supervisor")
 
 # ---------------------------------------------------------------------------
 # Autostart
@@ -97,6 +118,359 @@ def autostart_set(enable: bool) -> None:
             finally: winreg.CloseKey(sa)
         except OSError: pass
 
+# ---------------------------------------------------------------------------
+# Config model
+# ---------------------------------------------------------------------------
+
+_OBSOLETE_KEYS = ("target_user", "check_interval_seconds", "extend_seconds", "logout_after_minutes")
+_USED_PREFIX   = "used_seconds_"
+_DAY_IDX       = {d: i for i, d in enumerate(DAYS_EN)}
+
+def _field(d: dict, key: str, default, conv, problems: list, where: str = ""):
+    """conv(d[key]); *default* plus a problem note when the value is malformed."""
+    if key not in d: return default
+    try: return conv(d[key])
+    except (TypeError, ValueError, AttributeError):
+        problems.append(where + key + "=" + repr(d[key])); return default
+
+def _time_str(v) -> str:
+    _parse_time(v); return v
+
+def _one_of(choices: list):
+    def conv(v):
+        if v not in choices: raise ValueError(v)
+        return v
+    return conv
+
+def _of_type(tp: type):
+    def conv(v):
+        if not isinstance(v, tp): raise TypeError(v)
+        return v
+    return conv
+
+def _int_range(lo: int, hi: int):
+    def conv(v):
+        if not isinstance(v, int) or isinstance(v, bool) or not lo <= v <= hi: raise ValueError(v)
+        return v
+    return conv
+
+def _users(v, p: list) -> MappingProxyType:
+    """"users": account -> entry (JSON form); entries that are no object are
+    skipped, keys outside USER_KEYS noted and ignored by user_cfg()."""
+    if v is None: return MappingProxyType({})
+    if not isinstance(v, dict): p.append("users=" + repr(v)); return MappingProxyType({})
+    out = {}
+    for n, e in v.items():
+        if not isinstance(e, dict): p.append("users." + n + " skipped: not an object"); continue
+        p.extend("users.%s: unknown key %s" % (n, k) for k in e if k not in USER_KEYS and not k.startswith("_"))
+        out[n] = e
+    return MappingProxyType(out)
+
+class DayRule(Frozen):
+    """One allowed_times entry (or inline override), coerced once.
+
+    Keys this model does not know are kept in extra for round-tripping.
+    """
+    __slots__ = ("days", "start", "end", "enabled", "use_timer", "limit_minutes",
+                 "limit_sec", "start_hm", "is_open", "extra")
+    FIELDS = ("days", "start", "end", "enabled", "use_timer", "limit_minutes")
+
+    def __init__(self, d: dict, problems: list, where: str = ""):
+        days = d.get("days", ())
+        if isinstance(days, list): days = tuple(days)
+        bad  = [x for x in (days if isinstance(days, tuple) else (days,)) if x not in _DAY_IDX]
+        if bad: problems.append(where + "days=" + repr(bad))
+        start     = _field(d, "start", "00:00", _time_str, problems, where)
+        end       = _field(d, "end", "00:00", _time_str, problems, where)
+        enabled   = _field(d, "enabled", True, bool, problems, where)
+        use_timer = _field(d, "use_timer", True, bool, problems, where)
+        limit     = _field(d, "limit_minutes", DEFAULT_DAY_LIMIT_MIN, int, problems, where)
+        self._init(days=days, start=start, end=end, enabled=enabled, use_timer=use_timer,
+                   limit_minutes=limit, limit_sec=limit * 60,
+                   start_hm=None if start == end else _parse_time(start),
+                   is_open=enabled and not use_timer and start == end,
+                   extra=MappingProxyType({k: v for k, v in d.items() if k not in DayRule.FIELDS}))
+
+    def covers(self, day_en: str) -> bool:
+        return self.days == day_en if isinstance(self.days, str) else day_en in self.days
+
+    def to_json(self) -> dict:
+        return {"days": list(self.days) if isinstance(self.days, tuple) else self.days,
+                "start": self.start, "end": self.end, "enabled": self.enabled,
+                "use_timer": self.use_timer, "limit_minutes": self.limit_minutes, **self.extra}
+
+class RuleSet(Frozen):
+    """Weekday rules in file order: first match per weekday and the weekly open-run plan.
+
+    plan[wd]: days from weekday wd until the first non-open day (0 = itself), None = never.
+    """
+    __slots__ = ("rules", "by_day", "plan")
+
+    def __init__(self, rules: tuple):
+        by_day = tuple(next((r for r in rules if r.covers(d)), None) for d in DAYS_EN)
+        open_  = [r is not None and r.is_open for r in by_day]
+        plan   = tuple(None if all(open_) else next(k for k in range(7) if not open_[(wd + k) % 7])
+                       for wd in range(7))
+        self._init(rules=rules, by_day=by_day, plan=plan)
+
+    def __iter__(self):  return iter(self.rules)
+    def __len__(self):   return len(self.rules)
+
+    def get(self, day_en: str) -> DayRule | None:
+        i = _DAY_IDX.get(day_en)
+        return None if i is None else self.by_day[i]
+
+    def to_json(self) -> list:
+        return [r.to_json() for r in self.rules]
+
+class Override(Frozen):
+    """One dated exception: a "date" or an inclusive "from"/"to" range and its target.
+
+    Target: a named profile, another weekday (as_day) or inline rule keys.
+    Raises KeyError / TypeError / ValueError for malformed dates.
+    """
+    __slots__ = ("lo", "hi", "single", "profile", "as_day", "rule", "label")
+
+    def __init__(self, d: dict, problems: list, where: str = ""):
+        single = "date" in d
+        if single:
+            lo = ddate.fromisoformat(d["date"]).toordinal(); hi = lo + 1
+        else:
+            lo = ddate.fromisoformat(d["from"]).toordinal()
+            hi = ddate.fromisoformat(d["to"]).toordinal() + 1
+        profile = d["profile"] if "profile" in d else None
+        as_day  = d["as_day"] if "as_day" in d and profile is None else None
+        rule    = DayRule(d, problems, where) if "profile" not in d and "as_day" not in d else None
+        self._init(lo=lo, hi=hi, single=single, profile=profile, as_day=as_day, rule=rule,
+                   label=str(d.get("name") or profile or as_day or d.get("date") or d.get("from", "")))
+
+class TimeBank(Frozen):
+    """Ledger of banked timer seconds (config.json "time_bank"), settled once per day.
+
+    lots: (earned day ordinal, seconds, "rollover"|"grant"), oldest first.
+    Rollover lots hold unused budget and count towards every timer day until
+    they expire; grant lots are parent-given and spent only when adjust()
+    draws on them (drawn: seconds drawn into the day after settled). The
+    balances are summed once per change, so readers never replay history.
+    """
+    __slots__ = ("settled", "lots", "drawn", "rollover", "grants", "today")
+
+    def __init__(self, d: dict | None = None, problems: list | None = None,
+                 settled: int = 0, lots: tuple = (), drawn: int = 0):
+        if d:
+            try:
+                settled = ddate.fromisoformat(d.get("settled") or "0001-01-01").toordinal()
+                lots    = tuple((ddate.fromisoformat(o).toordinal(), max(0, int(sec)), str(k))
+                                for o, sec, k in d.get("lots") or ())
+                drawn   = max(0, int(d.get("drawn") or 0))
+            except (TypeError, ValueError, AttributeError) as ex:
+                if problems is not None: problems.append("time_bank ignored: %r" % (ex,))
+                settled, lots, drawn = 0, (), 0
+        settled  = 0 if settled <= 1 else settled
+        rollover = sum(sec for _, sec, k in lots if k == "rollover")
+        self._init(settled=settled, lots=tuple(x for x in lots if x[1] > 0), drawn=drawn,
+                   rollover=rollover, grants=sum(x[1] for x in lots) - rollover,
+                   today=rollover + drawn)
+
+    def __bool__(self) -> bool:
+        return bool(self.settled or self.lots or self.drawn)
+
+    @property
+    def total(self) -> int:
+        return self.rollover + self.grants + self.drawn
+
+    def to_json(self) -> dict:
+        return {"settled": ddate.fromordinal(self.settled).isoformat() if self.settled else "",
+                "drawn": self.drawn,
+                "lots": [[ddate.fromordinal(o).isoformat(), sec, k] for o, sec, k in self.lots]}
+
+    def settle(self, cfg: "Config", o: int, used: int) -> "TimeBank":
+        """Close day *o*: use beyond its budget is paid from rollover lots (oldest
+        first), unused budget becomes a new lot up to rollover_minutes, and lots
+        older than rollover_days expire."""
+        lots = list(self.lots)
+        rule = rule_for(cfg, ddate.fromordinal(o))
+        if rule and rule.enabled and rule.use_timer:
+            left = rule.limit_sec + self.drawn - used
+            if left < 0: lots = _debit(lots, -left, "rollover")
+            room = cfg.rollover_minutes * 60 - sum(sec for _, sec, k in lots if k == "rollover")
+            if left > 0 and room > 0: lots.append((o, min(left, room), "rollover"))
+        lots = [x for x in lots if x[2] != "rollover" or x[0] + cfg.rollover_days > o]
+        return TimeBank(settled=o, lots=tuple(lots))
+
+    def settle_until(self, cfg: "Config", today: int, usage) -> "TimeBank":
+        """Settle every day before *today* from *usage* ({"YYYY-MM-DD": seconds}).
+
+        A new ledger starts at yesterday; after a gap only the last
+        rollover_days days are replayed, older lots would have expired anyway.
+        """
+        if not self.settled: return TimeBank(settled=today - 1, lots=self.lots)
+        bank = self
+        for o in range(max(self.settled + 1, today - cfg.rollover_days - 1), today):
+            bank = bank.settle(cfg, o, usage.get(ddate.fromordinal(o).isoformat(), 0))
+        return bank
+
+    def draw(self, sec: int) -> "TimeBank":
+        """Move up to *sec* granted seconds into the current day."""
+        sec = min(max(0, sec), self.grants)
+        return TimeBank(settled=self.settled, lots=tuple(_debit(list(self.lots), sec, "grant")),
+                        drawn=self.drawn + sec)
+
+    def grant(self, sec: int, o: int) -> "TimeBank":
+        """Deposit *sec* granted seconds (negative: withdraw unused grants)."""
+        lots = (list(self.lots) + [(o, sec, "grant")] if sec > 0
+                else _debit(list(self.lots), -sec, "grant"))
+        return TimeBank(settled=self.settled, lots=tuple(lots), drawn=self.drawn)
+
+    def clamp(self, total: int) -> "TimeBank":
+        """Drop the newest lots until the balance is at most *total*."""
+        lots, over = list(self.lots), self.total - total
+        while over > 0 and lots:
+            o, sec, k = lots.pop()
+            if sec > over: lots.append((o, sec - over, k))
+            over -= sec
+        drawn = self.drawn - max(0, over)
+        return TimeBank(settled=self.settled, lots=tuple(lots), drawn=max(0, drawn))
+
+def _debit(lots: list, sec: int, kind: str) -> list:
+    """Take *sec* from the oldest lots of *kind*; what cannot be covered is dropped."""
+    out = []
+    for o, s, k in lots:
+        if k == kind and sec > 0:
+            take = min(s, sec); s -= take; sec -= take
+        if s > 0: out.append((o, s, k))
+    return out
+
+class Config(Frozen):
+    """Validated, immutable view of config.json – one instance shared by every reader.
+
+    Malformed values fall back to their defaults; those, and unknown or
+    obsolete keys, are listed in problems. Unknown keys are kept in extra
+    and overrides stay in their JSON form, so to_json() round-trips the file.
+    """
+    __slots__ = ("takt_seconds", "password_hash", "language", "action", "cfg_version",
+                 "week_limit_minutes", "month_limit_minutes", "rollover_minutes", "rollover_days",
+                 "metrics_file", "metrics_port", "stall_seconds", "profile", "tray_only", "service",
+                 "dashboard_port", "dashboard_host", "allowed_times", "profiles", "overrides", "users",
+                 "index", "usage", "bank", "extra",
+                 "problems")
+    KEYS = ("takt_seconds", "password_hash", "language", "action", "cfg_version",
+            "week_limit_minutes", "month_limit_minutes", "rollover_minutes", "rollover_days",
+            "metrics_file", "metrics_port", "stall_seconds", "profile", "tray_only", "service",
+            "dashboard_port", "dashboard_host", "allowed_times", "profiles", "overrides", "users")
+
+    def __init__(self, d: dict):
+        p: list = []
+        def rules(v, where):
+            return RuleSet(tuple(DayRule(r, p, "%s[%d]." % (where, i))
+                                 for i, r in enumerate(v) if isinstance(r, dict)))
+        def profiles(v):
+            out = {}
+            for k, r in _of_type(dict)(v or {}).items():
+                if isinstance(r, list): out[k] = rules(r, "profiles." + k)
+                else: p.append("profiles." + k + " skipped: not a list")
+            return MappingProxyType(out)
+        overrides = _field(d, "overrides", (), lambda v: tuple(_of_type(list)(v or [])), p)
+        parsed    = []
+        for i, e in enumerate(overrides):
+            try: parsed.append(Override(e, p, "overrides[%d]." % i))
+            except (KeyError, TypeError, ValueError, AttributeError) as ex:
+                p.append("overrides[%d] skipped: %r" % (i, ex))
+        usage, extra = {}, {}
+        for k, v in d.items():
+            if k in Config.KEYS or k == "time_bank": continue
+            if k.startswith(_USED_PREFIX):
+                try: usage[k[len(_USED_PREFIX):]] = max(0, int(v))
+                except (TypeError, ValueError): p.append(k + "=" + repr(v))
+                continue
+            extra[k] = v
+            if k in _OBSOLETE_KEYS: p.append("obsolete key " + k)
+            elif not k.startswith("_"): p.append("unknown key " + k)
+        self._init(
+            takt_seconds  = max(1, _field(d, "takt_seconds", DEFAULT_TAKT_SEC, int, p)),
+            password_hash = _field(d, "password_hash", "", _of_type(str), p),
+            language      = _field(d, "language", DEFAULT_LANG, _one_of(LANGS), p),
+            action        = _field(d, "action", DEFAULT_ACTION, _one_of(ACTION_KEYS), p),
+            cfg_version   = _field(d, "cfg_version", 0, int, p),
+            week_limit_minutes  = _field(d, "week_limit_minutes", 0, _int_range(0, WEEK_LIMIT_MIN_HI), p),
+            month_limit_minutes = _field(d, "month_limit_minutes", 0, _int_range(0, MONTH_LIMIT_MIN_HI), p),
+            rollover_minutes    = _field(d, "rollover_minutes", 0, _int_range(0, ROLLOVER_MIN_HI), p),
+            rollover_days       = _field(d, "rollover_days", DEFAULT_ROLLOVER_DAYS,
+                                         _int_range(1, ROLLOVER_DAYS_HI), p),
+            metrics_file  = _field(d, "metrics_file", False, _of_type(bool), p),
+            metrics_port  = _field(d, "metrics_port", 0, _int_range(0, 65535), p),
+            stall_seconds = _field(d, "stall_seconds", WATCHDOG_STALL_SEC,
+                                   _int_range(STALL_SEC_LO, STALL_SEC_HI), p),
+            profile       = _field(d, "profile", False, _of_type(bool), p),
+            tray_only     = _field(d, "tray_only", False, _of_type(bool), p),
+            service       = _field(d, "service", False, _of_type(bool), p),
+            dashboard_port = _field(d, "dashboard_port", 0, _int_range(0, 65535), p),
+            dashboard_host = _field(d, "dashboard_host", DASHBOARD_HOST, _of_type(str), p),
+            allowed_times = _field(d, "allowed_times", _NO_RULES,
+                                   lambda v: rules(_of_type(list)(v), "allowed_times"), p),
+            profiles      = _field(d, "profiles", MappingProxyType({}), profiles, p),
+            overrides     = overrides,
+            users         = _users(d.get("users"), p),
+            index         = OverrideIndex(parsed) if parsed else None,
+            usage         = MappingProxyType(usage),
+            bank          = TimeBank(d.get("time_bank"), p),
+            extra         = MappingProxyType(extra),
+            problems      = tuple(p))
+
+    def value(self, key: str):
+        """JSON form of a top-level key (None if absent)."""
+        if key == "allowed_times": return self.allowed_times.to_json()
+        if key == "profiles":  return {n: r.to_json() for n, r in self.profiles.items()}
+        if key == "overrides": return list(self.overrides)
+        if key == "users":     return dict(self.users)
+        if key in Config.KEYS: return getattr(self, key)
+        return self.extra.get(key)
+
+    def to_json(self) -> dict:
+        d = {k: self.value(k) for k in Config.KEYS}
+        for k in ("cfg_version", "week_limit_minutes", "month_limit_minutes", "rollover_minutes",
+                  "metrics_file", "metrics_port", "profile", "tray_only", "service", "dashboard_port",
+                  "profiles", "overrides", "users"):
+            if not d[k]: del d[k]                     # optional keys stay out until used
+        if self.rollover_days == DEFAULT_ROLLOVER_DAYS: del d["rollover_days"]
+        if self.stall_seconds == WATCHDOG_STALL_SEC:    del d["stall_seconds"]
+        if self.dashboard_host == DASHBOARD_HOST:       del d["dashboard_host"]
+        d.update(self.extra)
+        if self.bank: d["time_bank"] = self.bank.to_json()
+        d.update((_USED_PREFIX + k, v) for k, v in sorted(self.usage.items()))
+        return d
+
+    def same(self, other: "Config", keys: tuple = KEYS) -> bool:
+        """True when *keys* are equal – O(1) for parts shared via with_usage()."""
+        return all(getattr(self, k) is getattr(other, k) or self.value(k) == other.value(k)
+                   for k in keys)
+
+    def user_profile(self, account: str) -> str:
+        """The "users" entry for OS account *account* (case-insensitive), "" if it has none."""
+        a = account.casefold()
+        return next((n for n in self.users if n.casefold() == a), "") if a else ""
+
+    def with_usage(self, usage: dict, bank: TimeBank | None = None) -> "Config":
+        """Same config with *usage* ({"YYYY-MM-DD": seconds}) as the day counters
+        and, when given, *bank* as the time bank."""
+        c = object.__new__(Config)
+        for k in Config.__slots__: object.__setattr__(c, k, getattr(self, k))
+        object.__setattr__(c, "usage", MappingProxyType(dict(usage)))
+        if bank is not None: object.__setattr__(c, "bank", bank)
+        return c
+
+_NO_RULES  = RuleSet(())
+_EMPTY_CFG = Config({})
+
+def user_cfg(cfg: Config, name: str, stored: dict | None = None) -> Config:
+    """Config of account profile *name*: the top-level settings with its "users"
+    entry laid over them and *stored* (its usage.json) as usage and time bank."""
+    d = {k: v for k, v in cfg.to_json().items()
+         if not k.startswith(_USED_PREFIX) and k not in ("time_bank", "users")}
+    d.update((k, v) for k, v in (cfg.users.get(name) or {}).items() if k in USER_KEYS)
+    d.update((k, v) for k, v in (stored or {}).items() if k.startswith(_USED_PREFIX) or k == "time_bank")
+    return Config(d)
+
 # ---------------------------------------------------------------------------
 # Config I/O
 # ---------------------------------------------------------------------------
@@ -105,65 +479,331 @@ def base() -> Path:
     """Public accessor for the base directory (used by frontend for icon paths)."""
     return _base()
 
-def load_cfg() -> dict:
+def load_cfg(fresh: bool = False) -> Config:
+    """Shared Config for config.json, re-parsed only when the file changed.
+
+    While a ConfigWatcher runs, cached reads cost no syscall at all: the
+    watcher refreshes the cache itself. Read-modify-write paths pass
+    fresh=True so they never build on a copy the watcher has not seen yet.
+    """
+    with _cache_lock:
+        if _cache["watched"] and not fresh and _cache["cfg"] is not None:
+            return _cache["cfg"]
     p = _base() / CONFIG_FILENAME
     try:    mtime = p.stat().st_mtime
     except OSError: mtime = -1.0
     with _cache_lock:
-        if 0 < mtime == _cache["mtime"] and _cache["cfg"]:
-            return dict(_cache["cfg"])
+        if 0 < mtime == _cache["mtime"] and _cache["cfg"] is not None:
+            return _cache["cfg"]
     if not p.exists():
-        cfg = {**DEFAULT_CFG, "allowed_times": [
+        cfg = Config({**DEFAULT_CFG, "allowed_times": [
             {"days": d, "start": "00:00", "end": "00:00",
              "enabled": True, "use_timer": True, "limit_minutes": DEFAULT_DAY_LIMIT_MIN}
             for d in DAYS_EN
-        ]}
+        ]})
         save_cfg(cfg)
-        return dict(cfg)
-    cfg = json.loads(p.read_text(encoding="utf-8"))
-    for k in ("target_user", "check_interval_seconds", "extend_seconds", "logout_after_minutes"):
-        cfg.pop(k, None)
+        return cfg
+    return _read_cfg(p, mtime)
+
+def _read_cfg(p: Path, mtime: float) -> Config:
+    """Parse config.json into the cache; an unreadable file keeps the last good Config."""
+    try:
+        cfg = Config(json.loads(p.read_text(encoding="utf-8")))
+    except (OSError, ValueError, AttributeError) as ex:
+        with _cache_lock:
+            good = _cache["cfg"]
+            if good is None: raise
+            _cache["mtime"] = mtime            # not retried until the file changes again
+        _log(str(datetime.now()) + ": config unreadable, keeping last good: " + str(ex))
+        return good
+    _c_reloads.inc()
+    if cfg.problems:
+        _log(str(datetime.now()) + ": config: " + "; ".join(cfg.problems))
     with _cache_lock:
         _cache["cfg"] = cfg; _cache["mtime"] = mtime
-    return dict(cfg)
+    return cfg
 
-def save_cfg(cfg: dict) -> None:
-    p = _base() / CONFIG_FILENAME
-    p.write_text(json.dumps(cfg, indent=2, ensure_ascii=False), encoding="utf-8")
+def save_cfg(cfg: Config) -> None:
+    t0 = perf_counter()
+    p  = _base() / CONFIG_FILENAME
+    _write_atomic(p, json.dumps(cfg.to_json(), indent=2, ensure_ascii=False).encode("utf-8"))
+    _h_cfg_write.observe(perf_counter() - t0)
     try:    mtime = p.stat().st_mtime
     except OSError: mtime = -1.0
     with _cache_lock:
-        _cache["cfg"] = dict(cfg); _cache["mtime"] = mtime
-
-def hash_pw(pw: str) -> str:
-    return hashlib.sha256(pw.encode()).hexdigest()
+        _cache["cfg"] = cfg; _cache["mtime"] = mtime
 
 def validate_time(s: str) -> bool:
     try: _parse_time(s); return True
     except Exception: return False
 
+# ---------------------------------------------------------------------------
+# Passwords
+# ---------------------------------------------------------------------------
+# Stored formats: "scrypt$n$r$p$salt$hash", "pbkdf2$iterations$salt$hash"
+# (hex salt / hash) and the legacy bare SHA-256 hex digest.
+
+def _pw_scheme() -> str:
+    return "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2"
+
+def _pw_digest(scheme: str, cost: tuple, salt: bytes, pw: str) -> bytes:
+    if scheme == "scrypt":
+        n, r, p = cost
+        return hashlib.scrypt(pw.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=PW_SCRYPT_MAXMEM, dklen=32)
+    if scheme == "pbkdf2":
+        return hashlib.pbkdf2_hmac("sha256", pw.encode(), salt, cost[0])
+    raise ValueError("unknown password scheme " + scheme)
+
+def calibrate_pw_cost(scheme: str) -> tuple:
+    """Cost that makes one verify take about PW_VERIFY_TARGET_MS here; measured once per process."""
+    if scheme in _pw_cost: return _pw_cost[scheme]
+    target = PW_VERIFY_TARGET_MS / 1000
+    if scheme == "scrypt":
+        n = 1 << 12
+        while 128 * 8 * n * 2 <= PW_SCRYPT_MAXMEM // 2:   # doubled n still fits with headroom
+            t0 = perf_counter(); _pw_digest(scheme, (n, 8, 1), b"calibrate", "x")
+            if (perf_counter() - t0) * 2 > target: break
+            n *= 2
+        cost = (n, 8, 1)
+    else:
+        t0 = perf_counter(); _pw_digest(scheme, (20_000,), b"calibrate", "x")
+        cost = (max(100_000, int(20_000 * target / max(perf_counter() - t0, 1e-6))),)
+    _pw_cost[scheme] = cost
+    return cost
+
+def hash_pw(pw: str) -> str:
+    """Salted hash in the strongest available scheme at the calibrated cost."""
+    scheme = _pw_scheme()
+    cost   = calibrate_pw_cost(scheme)
+    salt   = os.urandom(16)
+    return "$".join([scheme, *map(str, cost), salt.hex(), _pw_digest(scheme, cost, salt, pw).hex()])
+
+def verify_pw(pw: str, stored: str) -> bool:
+    """Constant-time check against any stored format; empty stored = no password."""
+    if not stored: return True
+    try:
+        if "$" not in stored:
+            return hmac.compare_digest(hashlib.sha256(pw.encode()).hexdigest(), stored)
+        scheme, *cost, salt, h = stored.split("$")
+        return hmac.compare_digest(
+            _pw_digest(scheme, tuple(map(int, cost)), bytes.fromhex(salt), pw).hex(), h)
+    except (ValueError, TypeError) as ex:
+        _log(str(datetime.now()) + ": password hash unreadable: " + str(ex))
+        return False
+
+def pw_needs_upgrade(stored: str) -> bool:
+    """True for legacy hashes and schemes weaker than this machine's default."""
+    return bool(stored) and not stored.startswith(_pw_scheme() + "$")
+
+# ---------------------------------------------------------------------------
+# Config watcher
+# ---------------------------------------------------------------------------
+
+_IN_EVENTS = 0x2 | 0x8 | 0x80 | 0x100 | 0x200   # MODIFY, CLOSE_WRITE, MOVED_TO, CREATE, DELETE
+
+class ConfigWatcher:
+    """Pushes the current Config to on_change(cfg) whenever config.json changes on disk.
+
+    Runs on the core loop without a thread of its own: inotify (Linux) wakes
+    it through the loop's selector; elsewhere it checks every CONFIG_POLL_SEC
+    a FindFirstChangeNotificationW handle (Windows) or, as the fallback, the
+    mtime. The config directory is watched – editors that save via rename
+    replace the file itself – and events are debounced until
+    CONFIG_DEBOUNCE_SEC of quiet. Our own writes are reported too; on_change
+    compares settings and ignores them. While running, load_cfg() skips stat().
+    """
+
+    def __init__(self, on_change):
+        self.on_change = on_change   # (cfg: Config) -> None, on the core loop
+        self.running   = False
+        self.mode      = "poll"      # "win32" / "inotify" / "poll"
+        self._core     = None
+        self._close    = lambda: None
+        self._check    = self._check_poll  # () -> True if the directory (probably) changed
+        self._timer    = None
+        self._due      = None        # debounce handle
+        self._seen     = None
+
+    def start(self, core: Core) -> None:
+        self._core, self.running = core, True
+        core.call(self._open)
+
+    def stop(self) -> None:
+        self.running = False
+        if self._core is not None: self._core.call(self._shutdown)
+
+    # --- internals (core loop) ----------------------------------------------
+
+    def _open(self) -> None:
+        """Picks the best backend."""
+        d = _base()
+        try:
+            if sys.platform == "win32": self._open_win32(d)
+            elif sys.platform.startswith("linux"): self._open_inotify(d)
+        except Exception as ex:
+            _log(str(datetime.now()) + ": config watcher falls back to polling: " + str(ex))
+        if self.mode != "inotify": self._timer = self._core.every(CONFIG_POLL_SEC, self._poll)
+        with _cache_lock: _cache["watched"] = True
+
+    def _shutdown(self) -> None:
+        for h in (self._timer, self._due):
+            if h is not None: h.cancel()
+        try: self._close()
+        except Exception: pass
+        with _cache_lock: _cache["watched"] = False
+
+    def _open_win32(self, d: Path) -> None:
+        k32 = ctypes.windll.kernel32
+        k32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        h = k32.FindFirstChangeNotificationW(str(d), False, 0x1 | 0x10)  # FILE_NAME | LAST_WRITE
+        if h in (None, ctypes.c_void_p(-1).value): raise OSError("FindFirstChangeNotificationW")
+        h = ctypes.c_void_p(h)
+        def check() -> bool:
+            if k32.WaitForSingleObject(h, 0) != 0: return False           # WAIT_OBJECT_0
+            k32.FindNextChangeNotification(h)
+            return True
+        self.mode, self._check, self._close = "win32", check, lambda: k32.FindCloseChangeNotification(h)
+
+    def _open_inotify(self, d: Path) -> None:
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd   = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(fd, os.fsencode(str(d)), _IN_EVENTS) < 0:
+            os.close(fd); raise OSError(ctypes.get_errno(), "inotify_add_watch")
+        name, loop = os.fsencode(CONFIG_FILENAME), self._core.loop
+        def readable() -> None:
+            try:    buf = os.read(fd, 4096)
+            except BlockingIOError: return
+            hit, i = False, 0
+            while i + 16 <= len(buf):                  # struct inotify_event + name
+                n = struct.unpack_from("iIII", buf, i)[3]
+                hit = hit or buf[i + 16:i + 16 + n].rstrip(b"\0") == name
+                i += 16 + n
+            if hit: self._changed()
+        loop.add_reader(fd, readable)
+        self.mode, self._close = "inotify", lambda: (loop.remove_reader(fd), os.close(fd))
+
+    def _check_poll(self) -> bool:
+        try:    m = (_base() / CONFIG_FILENAME).stat().st_mtime
+        except OSError: m = -1.0
+        changed, self._seen = self._seen is not None and m != self._seen, m
+        return changed
+
+    def _poll(self) -> None:
+        if self._check(): self._changed()
+
+    def _changed(self) -> None:
+        if self._due is not None: self._due.cancel()
+        self._due = self._core.loop.call_later(CONFIG_DEBOUNCE_SEC, self._settled)
+
+    def _settled(self) -> None:
+        self._due = None
+        if self.running: self._core.loop.create_task(self._reload())
+
+    async def _reload(self) -> None:
+        try:
+            cfg = await self._core.io(self._read)
+            if cfg is not None and self.running: self.on_change(cfg)
+        except Exception as ex:
+            _log(str(datetime.now()) + ": config watcher: " + str(ex))
+
+    @staticmethod
+    def _read() -> "Config | None":
+        if not (_base() / CONFIG_FILENAME).exists(): return None   # mid-rename or deleted
+        return load_cfg(fresh=True)
+
 # ---------------------------------------------------------------------------
 # i18n / formatting
 # ---------------------------------------------------------------------------
 
+class _Tmpl:
+    """Pre-parsed template: fmt is the bound str.format, None when there are no fields."""
+    __slots__ = ("raw", "fmt")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.fmt = raw.format if any(f is not None for _, f, _, _ in Formatter().parse(raw)) else None
+
+def _plural_form(lang: str, n: int) -> str:
+    n = abs(n)
+    if lang == "RU":
+        if n % 10 == 1 and n % 100 != 11:                      return "one"
+        if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:       return "few"
+        return "many"
+    return "one" if n == 1 else "other"
+
+def _catalog(lang: str) -> dict:
+    cat = _i18n.get(lang)
+    if cat is not None: return cat
+    cat = {}
+    try:
+        raw = json.loads(_res().joinpath(*I18N_DIR, lang.lower() + ".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError) as ex:
+        _log(str(datetime.now()) + ": i18n " + lang + ": " + str(ex)); raw = {}
+    for k, v in raw.items():
+        cat[k] = ({f: (v[f] if f == "count" else _Tmpl(v[f])) for f in v}
+                  if isinstance(v, dict) else _Tmpl(v))
+    _i18n[lang] = cat
+    return cat
+
+def fmt_num(lang: str, n: int) -> str:
+    """Integer with the language's digit grouping."""
+    s = "{:,}".format(n)
+    g = t(lang, "num_group")
+    return s if g == "," else s.replace(",", g)
+
 def t(lang: str, key: str, **kw) -> str:
-    tmpl = LANG[lang].get(key, LANG[DEFAULT_LANG].get(key, key))
-    return tmpl.format(**kw) if kw else tmpl
+    e = (_i18n.get(lang) or _catalog(lang)).get(key)
+    if e is None:
+        e = _catalog(DEFAULT_LANG).get(key)
+        if e is None: return key
+    if e.__class__ is dict:                                   # plural entry
+        n = int(kw.get(e["count"], 0))
+        e = e.get(_plural_form(lang, n)) or e["other"]
+    if not kw or e.fmt is None: return e.raw
+    if key != "num_group":
+        kw = {k: fmt_num(lang, v) if v.__class__ is int and abs(v) >= 1000 else v
+              for k, v in kw.items()}
+    return e.fmt(**kw)
+
+def has_text(key: str) -> bool:
+    return key in _catalog(DEFAULT_LANG)
+
+def _memo(kind: str, lang: str, build):
+    v = _fmt.get((kind, lang))
+    if v is None: v = _fmt[(kind, lang)] = build()
+    return v
 
 def fmt_rem(sec: int, lang: str = DEFAULT_LANG) -> str:
     if sec == UNLIMITED:
         return "\u23f3 \u221e"
-    ud, uh, um, us = (LANG[lang][k] for k in ("unit_d", "unit_h", "unit_m", "unit_s"))
-    parts = [str(v) + u for v, u in (
-        (sec // 86400, ud), (sec % 86400 // 3600, uh), (sec % 3600 // 60, um)) if v]
-    return "\u23f3 " + " ".join(parts + ["%02d" % (sec % 60,) + us])
+    ud, uh, um, us = _memo("units", lang, lambda: tuple(
+        t(lang, k) for k in ("unit_d", "unit_h", "unit_m", "unit_s")))
+    d, r = divmod(sec, 86400); h, r = divmod(r, 3600); m, s = divmod(r, 60)
+    out = "\u23f3 "
+    if d: out += str(d) + ud + " "
+    if h: out += str(h) + uh + " "
+    if m: out += str(m) + um + " "
+    return out + "%02d" % s + us
 
 def day_full(lang: str, day_en: str) -> str:
-    try: return LANG[lang]["days_full"].split("|")[DAYS_EN.index(day_en)]
+    try: return _memo("days_full", lang, lambda: tuple(t(lang, "days_full").split("|")))[
+                    DAYS_EN.index(day_en)]
     except (ValueError, IndexError): return day_en
 
 def days_short(lang: str) -> list:
-    return LANG[lang]["days_short"].split("|")
+    return list(_memo("days_short", lang, lambda: tuple(t(lang, "days_short").split("|"))))
+
+def format_date(lang: str, now: datetime | None = None) -> str:
+    """"📅 <weekday>, HH:MM:SS" – the per-weekday frame is built once per language."""
+    if now is None: now = datetime.now()
+    frames = _memo("date", lang, lambda: tuple(
+        ("\U0001f4c5 " + t(lang, "date_fmt", day=day_full(lang, d), dt="\0")).split("\0", 1)
+        for d in DAYS_EN))
+    head, tail = frames[now.weekday()]
+    return head + "%02d:%02d:%02d" % (now.hour, now.minute, now.second) + tail
 
 # ---------------------------------------------------------------------------
 # Time helpers
@@ -182,113 +822,965 @@ def _day_end_dt(date, end_str: str) -> datetime:
     h, m = _parse_time(end_str)
     return datetime.combine(date, dtime(h, m))
 
-def get_rule(cfg: dict, day_en: str) -> dict | None:
-    for r in cfg.get("allowed_times", []):
-        d = r.get("days")
-        if (isinstance(d, list) and day_en in d) or d == day_en:
-            return r
-    return None
+def get_rule(cfg: Config, day_en: str) -> DayRule | None:
+    return cfg.allowed_times.get(day_en)
+
+def _patch_days(times: list, days: dict) -> list:
+    """allowed_times with per-day field patches applied; *times* itself if nothing changed.
 
-def day_limit_sec(rule: dict) -> int:
-    return int(rule.get("limit_minutes", DEFAULT_DAY_LIMIT_MIN)) * 60
+    A day covered by a multi-day rule is split out into its own rule first.
+    """
+    out = times
+    for day, patch in days.items():
+        i = next((k for k, r in enumerate(out) if r.get("days") == day), None)
+        if i is None:
+            j = next((k for k, r in enumerate(out)
+                      if isinstance(r.get("days"), list) and day in r["days"]), None)
+            base = dict(out[j]) if j is not None else {"start": "00:00", "end": "00:00",
+                                                         "enabled": True, "use_timer": True,
+                                                         "limit_minutes": DEFAULT_DAY_LIMIT_MIN}
+            if any(base.get(k) != v for k, v in patch.items()):
+                if out is times: out = list(times)
+                if j is not None:
+                    out[j] = {**out[j], "days": [x for x in out[j]["days"] if x != day]}
+                out.append({**base, **patch, "days": day})
+            continue
+        if any(out[i].get(k) != v for k, v in patch.items()):
+            if out is times: out = list(times)
+            out[i] = {**out[i], **patch}
+    return out
 
 # ---------------------------------------------------------------------------
-# Scheduling core
+# Date overrides & profiles
 # ---------------------------------------------------------------------------
 
-def _window(rule: dict, date) -> tuple | None:
-    s = rule.get("start", "00:00"); e = rule.get("end", "00:00")
-    if s == e: return None
-    try: sh, sm = _parse_time(s)
-    except ValueError: return None
-    return (datetime.combine(date, dtime(sh, sm)), _day_end_dt(date, e))
+class OverrideIndex:
+    """Dated exceptions to the weekday schedule, resolved in O(log n).
 
-def calc_remaining(cfg: dict, used_today: int, now: datetime | None = None) -> int:
-    """Continuous remaining seconds from now through consecutive unblocked periods."""
-    if now is None: now = datetime.now()
-    MAX = REMAINING_MAX_DAYS * 24 * 3600
-    total = 0
-    period_end = now
-
-    for i in range(REMAINING_MAX_DAYS + 1):
-        date = (now + timedelta(days=i)).date()
-        rule = get_rule(cfg, date.strftime("%A"))
-        if not rule or not rule.get("enabled", True):
-            break
-        win       = _window(rule, date)
-        use_timer = rule.get("use_timer", True)
-
-        if i > 0:
-            allowed_start = win[0] if win is not None else datetime.combine(date, dtime.min)
-            if allowed_start > period_end:
-                break
-
-        if i == 0:
-            if use_timer:
-                total += max(0, day_limit_sec(rule) - used_today); break
-            elif win is None:
-                midnight = datetime.combine(date + timedelta(days=1), dtime.min)
-                total += max(0, int((midnight - now).total_seconds()))
-                period_end = midnight
+    Single-day entries ("date") live in a hash keyed by date ordinal.
+    Range entries ("from"/"to", inclusive) are flattened once into a sorted,
+    non-overlapping segment list searched with bisect.
+    Precedence: single day > later range > earlier range > weekday schedule.
+    """
+    __slots__ = ("_days", "_day_keys", "_starts", "_segs")
+
+    def __init__(self, entries: list):
+        self._days: dict = {}
+        ranges = []
+        for prio, e in enumerate(entries):
+            if e.single:        self._days[e.lo] = e
+            elif e.lo < e.hi:   ranges.append((e.lo, e.hi, prio, e))
+        self._day_keys: list = sorted(self._days)
+        ranges.sort(key=lambda r: r[0])
+        bounds = sorted({x for a, b, _, _ in ranges for x in (a, b)})
+        heap: list = []; i = 0
+        self._starts: list = []; self._segs: list = []   # (start, end, entry)
+        for k in range(len(bounds) - 1):
+            x = bounds[k]
+            while i < len(ranges) and ranges[i][0] <= x:
+                a, b, prio, e = ranges[i]; heapq.heappush(heap, (-prio, b, e)); i += 1
+            while heap and heap[0][1] <= x: heapq.heappop(heap)
+            if not heap: continue
+            e = heap[0][2]
+            if self._segs and self._segs[-1][2] is e and self._segs[-1][1] == x:
+                self._segs[-1] = (self._segs[-1][0], bounds[k + 1], e)
             else:
-                ws, we = win
-                if ws <= now < we: total += max(0, int((we - now).total_seconds()))
-                break
+                self._starts.append(x); self._segs.append((x, bounds[k + 1], e))
+
+    def __len__(self) -> int:
+        return len(self._days) + len(self._segs)
+
+    def span(self, o: int) -> tuple:
+        """(Override or None, first ordinal > o where that may change or None) for ordinal o."""
+        e = self._days.get(o)
+        if e is not None: return e, o + 1
+        i = bisect_right(self._starts, o) - 1
+        if i >= 0 and o < self._segs[i][1]:
+            e, end = self._segs[i][2], self._segs[i][1]
         else:
-            if use_timer:
-                total += day_limit_sec(rule); break
-            elif win is None:
-                total += 86400
-                period_end = datetime.combine(date + timedelta(days=1), dtime.min)
-            else:
-                ws, we = win
-                total += max(0, int((we - ws).total_seconds())); break
+            end = self._starts[i + 1] if i + 1 < len(self._starts) else None
+        j = bisect_right(self._day_keys, o)
+        if j < len(self._day_keys) and (end is None or self._day_keys[j] < end):
+            end = self._day_keys[j]
+        return e, end
+
+    def lookup(self, date) -> Override | None:
+        o = date.toordinal()
+        e = self._days.get(o)
+        if e is not None: return e
+        i = bisect_right(self._starts, o) - 1
+        if i >= 0 and o < self._segs[i][1]: return self._segs[i][2]
+        return None
+
+def _entry_rule(cfg: Config, entry: Override, wd: int) -> DayRule | None:
+    if entry.profile is not None:
+        return cfg.profiles.get(entry.profile, _NO_RULES).by_day[wd]
+    if entry.as_day is not None:
+        return get_rule(cfg, entry.as_day)
+    return entry.rule
+
+def override_for(cfg: Config, date) -> Override | None:
+    return cfg.index.lookup(date) if cfg.index else None
+
+def rule_for(cfg: Config, date) -> DayRule | None:
+    """Rule governing *date*: dated override first, then the weekday schedule."""
+    entry = cfg.index.lookup(date) if cfg.index else None
+    if entry is None: return cfg.allowed_times.by_day[date.weekday()]
+    return _entry_rule(cfg, entry, date.weekday())
+
+def _ics_date(v: str):
+    return ddate(int(v[0:4]), int(v[4:6]), int(v[6:8]))
+
+def parse_ics(text: str, **target) -> list:
+    """VEVENTs of an iCalendar file -> override range entries.
+
+    *target* selects what the ranges resolve to (profile=..., as_day=... or
+    inline rule keys). DTEND is exclusive for all-day events; RRULE is ignored.
+    """
+    lines: list = []
+    for ln in text.splitlines():
+        if ln[:1] in (" ", "\t") and lines: lines[-1] += ln[1:]
+        else: lines.append(ln)
+    out, ev = [], None
+    for ln in lines:
+        name, _, val = ln.partition(":")
+        key, _, params = name.partition(";")
+        key = key.upper()
+        if key == "BEGIN" and val.strip().upper() == "VEVENT": ev = {}
+        elif key == "END" and val.strip().upper() == "VEVENT" and ev is not None:
+            try:
+                a = _ics_date(ev["DTSTART"][1])
+                if "DTEND" in ev:
+                    b = _ics_date(ev["DTEND"][1])
+                    if "VALUE=DATE" in ev["DTEND"][0].upper() or len(ev["DTEND"][1]) == 8:
+                        b -= timedelta(days=1)
+                else: b = a
+                e = {"from": a.isoformat(), "to": max(a, b).isoformat(), **target}
+                if ev.get("SUMMARY", ("", ""))[1]: e["name"] = ev["SUMMARY"][1]
+                out.append(e)
+            except (KeyError, ValueError) as ex:
+                _log(str(datetime.now()) + ": ics event skipped: " + str(ex))
+            ev = None
+        elif ev is not None and key in ("DTSTART", "DTEND", "SUMMARY"):
+            ev[key] = (params, val.strip())
+    return out
 
-        if total > MAX:
-            return UNLIMITED
-    return total
+# ---------------------------------------------------------------------------
+# Scheduling core
+# ---------------------------------------------------------------------------
+
+def _window(rule: DayRule, date) -> tuple | None:
+    if rule.start_hm is None: return None
+    return (datetime.combine(date, dtime(*rule.start_hm)), _day_end_dt(date, rule.end))
+
+def _is_open(rule: DayRule | None) -> bool:
+    """Fully open day: enabled, no window, no timer – chains into the next day."""
+    return rule is not None and rule.is_open
+
+def _first_closed(cfg: Config, o: int) -> int | None:
+    """First date ordinal >= o that is not fully open; None = open forever.
 
-def should_enforce(cfg: dict, used_today: int, now: datetime | None = None) -> bool:
-    """True when the PC must be locked: day-off, outside window, or budget exhausted."""
+    O(1) per schedule segment: the weekly plan answers within a segment, and
+    only override boundaries actually crossed are visited.
+    """
+    idx = cfg.index
+    while True:
+        entry, end = idx.span(o) if idx else (None, None)
+        if entry is None or entry.profile is not None:
+            rules = (cfg.allowed_times if entry is None
+                     else cfg.profiles.get(entry.profile, _NO_RULES))
+            k = rules.plan[(o - 1) % 7]               # ordinal 1 is a Monday
+            if k is not None and (end is None or o + k < end): return o + k
+        elif not _is_open(_entry_rule(cfg, entry, 0)):
+            return o
+        if end is None: return None
+        o = end
+
+def _lead_allowance(rule: DayRule | None, date) -> int:
+    """Seconds a chain entering *date* at midnight still gets on that day."""
+    if not rule or not rule.enabled: return 0
+    win = _window(rule, date)
+    if win is not None and win[0].time() != dtime.min: return 0
+    if rule.use_timer: return rule.limit_sec
+    return int((win[1] - win[0]).total_seconds()) if win is not None else 86400
+
+def period_base(cfg: Config, day) -> tuple:
+    """(week, month): seconds used in *day*'s ISO week / calendar month before *day*.
+
+    The Watchdog keeps this as a running total – folded forward at midnight and
+    rebuilt only at period boundaries, after gaps or after history edits.
+    """
+    iso = day.isoformat()
+    wk  = (day - timedelta(days=day.weekday())).isoformat()
+    mo  = iso[:8] + "01"
+    w = m = 0
+    for d, sec in cfg.usage.items():
+        if d >= iso: continue
+        if d >= wk: w += sec
+        if d >= mo: m += sec
+    return w, m
+
+def _period_cap(cfg: Config, used_today: int, now: datetime, base: tuple | None) -> tuple | None:
+    """Tightest weekly / monthly budget as (remaining, "week"|"month"); None if none binds.
+
+    A budget whose period ends before it would run out is no constraint.
+    """
+    if not (cfg.week_limit_minutes or cfg.month_limit_minutes): return None
+    day = now.date()
+    if base is None: base = period_base(cfg, day)
+    nxt = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    cap = None
+    for kind, lim, before, end in (
+            ("week", cfg.week_limit_minutes, base[0], day + timedelta(days=7 - day.weekday())),
+            ("month", cfg.month_limit_minutes, base[1], nxt)):
+        if not lim: continue
+        rem = max(0, lim * 60 - before - used_today)
+        if rem >= (datetime.combine(end, dtime.min) - now).total_seconds(): continue
+        if cap is None or rem < cap[0]: cap = (rem, kind)
+    return cap
+
+def calc_remaining(cfg: Config, used_today: int, now: datetime | None = None,
+                   base: tuple | None = None, bank: int = 0) -> int:
+    """Continuous remaining seconds from now through consecutive unblocked periods.
+
+    Fully open days chain into each other; the first other day ends the chain
+    and contributes what it allows from midnight. The chain end is found in
+    closed form, so any horizon is exact and UNLIMITED means never-ending.
+    Weekly and monthly budgets cap the result; *base* is their period_base()
+    (computed from cfg.usage when omitted). *bank* is banked time added to a
+    timer day's budget (TimeBank.today).
+    """
+    if now is None: now = datetime.now()
+    rem = _day_remaining(cfg, used_today, now, bank)
+    if rem == 0: return 0
+    cap = _period_cap(cfg, used_today, now, base)
+    if cap is None: return rem
+    return cap[0] if rem == UNLIMITED else min(rem, cap[0])
+
+def binding_limit(cfg: Config, used_today: int, now: datetime | None = None,
+                  base: tuple | None = None, bank: int = 0) -> str:
+    """"week" / "month" when that budget ends the remaining time first, else ""."""
     if now is None: now = datetime.now()
-    rule = get_rule(cfg, now.strftime("%A"))
-    if not rule or not rule.get("enabled", True): return True
+    rem = _day_remaining(cfg, used_today, now, bank)
+    cap = _period_cap(cfg, used_today, now, base) if rem else None
+    return cap[1] if cap is not None and (rem == UNLIMITED or cap[0] < rem) else ""
+
+def _day_remaining(cfg: Config, used_today: int, now: datetime, bank: int = 0) -> int:
+    today = now.date()
+    rule  = rule_for(cfg, today)
+    if not rule or not rule.enabled: return 0
+    if rule.use_timer:
+        return max(0, rule.limit_sec + bank - used_today)
+    win = _window(rule, today)
+    if win is not None:
+        ws, we = win
+        return max(0, int((we - now).total_seconds())) if ws <= now < we else 0
+    o = _first_closed(cfg, today.toordinal() + 1)
+    if o is None: return UNLIMITED
+    midnight = datetime.combine(today + timedelta(days=1), dtime.min)
+    end_day  = ddate.fromordinal(o)
+    return (max(0, int((midnight - now).total_seconds()))
+            + (o - today.toordinal() - 1) * 86400
+            + _lead_allowance(rule_for(cfg, end_day), end_day))
+
+def next_lock(cfg: Config, used_today: int, now: datetime | None = None,
+              base: tuple | None = None, bank: int = 0) -> datetime | None:
+    """Wall-clock time enforcement starts if the PC stays in use; None = never."""
+    if now is None: now = datetime.now()
+    rem = calc_remaining(cfg, used_today, now, base, bank)
+    if rem == UNLIMITED: return None
+    at   = now + timedelta(seconds=rem)
+    rule = rule_for(cfg, now.date())
+    if rule and rule.use_timer:
+        win = _window(rule, now.date())
+        if win is not None and now < win[1]: at = min(at, win[1])
+    return at
+
+def _day_span(cfg: Config, date, used: int, now: datetime | None,
+              base: tuple | None = None, bank: int = 0) -> tuple:
+    """Unlocked span of *date*: (open_at, reason, close_at, reason) or (None, lock_reason).
+
+    On the current day (now given) timer counting starts at max(open_at, now),
+    i.e. continuous use from now on is assumed, and the weekly / monthly
+    budgets apply as well.
+    """
+    rule = rule_for(cfg, date)
+    if not rule or not rule.enabled: return None, "day_off"
+    win = _window(rule, date)
+    if win is None:
+        a, ra = datetime.combine(date, dtime.min), "midnight"
+        b, rb = a + timedelta(days=1), "midnight"
+    else:
+        (a, b), ra, rb = win, "window_open", "window_close"
+    if b <= a: return None, "window_close"
+    if rule.use_timer:
+        cut = (max(a, now) if now is not None else a) + timedelta(
+            seconds=max(0, rule.limit_sec + bank - used))
+        if cut < b: b, rb = cut, "budget"
+        if b <= a: return None, "budget"
+    if now is not None:
+        cap = _period_cap(cfg, used, max(a, now), base)
+        if cap is not None:
+            cut = max(a, now) + timedelta(seconds=cap[0])
+            if cut < b: b, rb = cut, "budget"
+            if b <= a: return None, "budget"
+    return a, ra, b, rb
+
+def iter_transitions(cfg: Config, used_today: int, start: datetime | None = None,
+                     end: datetime | None = None, now: datetime | None = None,
+                     base: tuple | None = None, bank: int = 0):
+    """Lazily yield (timestamp, state, reason) for every boundary in (start, end].
+
+    state: "lock" / "unlock"; reason: window_open, window_close, budget,
+    midnight or day_off. used_today, the weekly / monthly budgets and banked
+    time (*base*, *bank* as for calc_remaining) apply to now's date, later
+    days get their full daily budget. Runs of fully open days are skipped via _first_closed,
+    so each next() is O(1) per schedule segment; the generator ends when the
+    schedule stays open forever or no boundary occurs for TRANSITION_IDLE_DAYS.
+    """
+    if now is None: now = datetime.now()
+    if start is None: start = now
+    d        = start.date()
+    midnight = datetime.combine(d, dtime.min)
+    prev     = _day_span(cfg, d - timedelta(days=1), 0, None)
+    # pending: lock exactly at midnight, cancelled if the next day opens at 00:00
+    pending  = (midnight, "lock", prev[3]) if prev[0] is not None and prev[2] == midnight else None
+    state    = "unlock" if pending else "lock"
+    idle     = 0
+    while idle < TRANSITION_IDLE_DAYS:
+        midnight = datetime.combine(d, dtime.min)
+        if end is not None and midnight > end: return
+        if pending and _is_open(rule_for(cfg, d)):
+            o = _first_closed(cfg, d.toordinal())
+            if o is None: return
+            d       = ddate.fromordinal(o)
+            pending = (datetime.combine(d, dtime.min), "lock", "midnight")
+            continue
+        today = d == now.date()
+        span  = (_day_span(cfg, d, used_today, now, base, bank) if today
+                 else _day_span(cfg, d, 0, None))
+        evs   = ([(midnight, "lock", span[1])] if span[0] is None
+                 else [(span[0], "unlock", span[1]), (span[2], "lock", span[3])])
+        if pending:
+            if evs[0] == (midnight, "unlock", evs[0][2]):
+                evs = evs[1:]
+            elif evs[0][:2] == (midnight, "lock"):
+                evs = [(midnight, "lock", evs[0][2])] + evs[1:]
+            else:
+                evs = [pending] + evs
+        pending = None
+        if evs and evs[-1][:2] == (midnight + timedelta(days=1), "lock"):
+            pending = evs.pop()
+        produced = False
+        for ts, st, why in evs:
+            if st == state: continue
+            state = st
+            if end is not None and ts > end: return
+            if ts > start:
+                produced = True
+                yield ts, st, why
+        if pending: state = "unlock"
+        idle = 0 if produced else idle + 1
+        d += timedelta(days=1)
+
+def should_enforce(cfg: Config, used_today: int, now: datetime | None = None,
+                   base: tuple | None = None, bank: int = 0) -> bool:
+    """True when the PC must be locked: day-off, outside window, or a budget exhausted."""
+    if now is None: now = datetime.now()
+    rule = rule_for(cfg, now.date())
+    if not rule or not rule.enabled: return True
     win = _window(rule, now.date())
     if win is not None and not (win[0] <= now < win[1]): return True
-    if rule.get("use_timer", True):
-        return (day_limit_sec(rule) - used_today) <= 0
-    return False
+    if rule.use_timer and rule.limit_sec + bank - used_today <= 0: return True
+    cap = _period_cap(cfg, used_today, now, base)
+    return cap is not None and cap[0] <= 0
 
 # ---------------------------------------------------------------------------
 # Persistence – daily usage counter
 # ---------------------------------------------------------------------------
 
-def _used_key() -> str:
-    d = datetime.now().strftime("%Y-%m-%d")
-    if d != _uk["date"]:
-        _uk["date"] = d; _uk["key"] = "used_seconds_" + d
-    return _uk["key"]
+def _today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
 
-def _cleanup_old_used(cfg: dict) -> None:
-    cutoff = (datetime.now() - timedelta(days=USAGE_RETENTION_DAYS)).strftime("%Y-%m-%d")
-    for k in [k for k in list(cfg) if k.startswith("used_seconds_") and k[13:] < cutoff]:
-        del cfg[k]
+def persist_used(used: int, kind: bytes = b"U", bank: TimeBank | None = None) -> None:
+    """Save today's counter (and the time bank after a ledger movement) to
+    config.json and append it to the signed usage log."""
+    used = max(0, int(used))
+    t0   = perf_counter()
+    if not _write_lock.acquire(timeout=WRITE_LOCK_TIMEOUT_SEC):
+        raise TimeoutError("config.json write lock busy")
+    try:
+        cfg = load_cfg(fresh=True)
+        save_cfg(cfg.with_usage(_kept_usage(cfg.usage, used), bank))
+        _sign(usage_chain(), kind, used, bank)
+    finally:
+        _write_lock.release()
+    _h_persist.observe(perf_counter() - t0)
+
+def _kept_usage(usage, used: int) -> dict:
+    """*usage* with today's counter set to *used*, trimmed to the retained history."""
+    now    = datetime.now().date()
+    cutoff = min(now - timedelta(days=USAGE_RETENTION_DAYS), now.replace(day=1),
+                 now - timedelta(days=now.weekday())).isoformat()
+    kept   = {d: s for d, s in usage.items() if d >= cutoff}
+    kept[_today()] = used
+    return kept
+
+def _sign(chain: "UsageChain", kind: bytes, used: int, bank: TimeBank | None) -> None:
+    day = datetime.now().date().toordinal()
+    chain.append(kind, day, used)
+    if bank is not None: chain.append(b"B", day, bank.total)
+
+def load_used(cfg: Config) -> int:
+    return cfg.usage.get(_today(), 0)
+
+def usage_history(cfg: Config, dates: list) -> list:
+    """Persisted used seconds per date (0 where nothing was recorded)."""
+    return [cfg.usage.get(d.isoformat(), 0) for d in dates]
 
-def persist_used(used: int) -> None:
-    cfg = load_cfg()
-    cfg[_used_key()] = max(0, int(used))
-    _cleanup_old_used(cfg)
-    save_cfg(cfg)
+# ---------------------------------------------------------------------------
+# Persistence – watchdog checkpoint
+# ---------------------------------------------------------------------------
+
+_CK_MAGIC = b"YTck"
+_CK_HEAD  = struct.Struct("<4sH")        # magic, STATE_VERSION
+_CK_FULL  = struct.Struct("<IiiiqB")     # day ordinal, used, countdown, offset, max_at_start, warned
+_CK_DELTA = struct.Struct("<ii")         # used, countdown
+_CK_KIND  = {b"F": _CK_FULL, b"D": _CK_DELTA}
+
+class Checkpoint:
+    """Watchdog state in state.bin: a full record followed by per-tick deltas.
+
+    Record = kind byte + payload + CRC32 of both. A delta (13 bytes) is
+    appended when only used/countdown moved, a full record when anything else
+    did. Past STATE_COMPACT_BYTES – and on the first write after start – the
+    file is rewritten as header + one full record via tmp file + os.replace.
+    Replay stops at the first torn or corrupt record.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path  = path or _base() / STATE_FILENAME
+        self._f    = None
+        self._size = 0
+        self._full = None     # fields of the last full record written
+        self._last = None     # (used, countdown) last written
+
+    def restore(self) -> tuple | None:
+        """(day ordinal, used, countdown, offset, max_at_start, warned) of the last intact record."""
+        try:    buf = self.path.read_bytes()
+        except OSError: return None
+        if len(buf) < _CK_HEAD.size or _CK_HEAD.unpack_from(buf) != (_CK_MAGIC, STATE_VERSION):
+            if buf: _log(str(datetime.now()) + ": state.bin: unknown format, ignored")
+            return None
+        st, i = None, _CK_HEAD.size
+        while i < len(buf):
+            rec = _CK_KIND.get(buf[i:i + 1])
+            end = i + 1 + (rec.size if rec else 0)
+            if rec is None or end + 4 > len(buf): break
+            if zlib.crc32(buf[i:end]) != int.from_bytes(buf[end:end + 4], "little"): break
+            v = rec.unpack_from(buf, i + 1)
+            if rec is _CK_FULL:     st = v
+            elif st is not None:    st = (st[0],) + v + st[3:]
+            i = end + 4
+        if i < len(buf):
+            _log(str(datetime.now()) + ": state.bin: %d trailing bytes dropped" % (len(buf) - i))
+        return st
+
+    def write(self, st: tuple) -> None:
+        """Record *st* (as restore() returns it); no I/O when nothing changed."""
+        full, delta = st[:1] + st[3:], st[1:3]
+        if self._f is None or self._size >= STATE_COMPACT_BYTES: self._compact(st)
+        elif full != self._full:    self._append(b"F" + _CK_FULL.pack(*st))
+        elif delta != self._last:   self._append(b"D" + _CK_DELTA.pack(*delta))
+        else: return
+        self._full, self._last = full, delta
+
+    def sync(self) -> None:
+        """Force appended records to disk (the OS already has them after write)."""
+        if self._f is None: return
+        t0 = perf_counter()
+        os.fsync(self._f.fileno())
+        _h_state_write.observe(perf_counter() - t0)
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close(); self._f = None
+
+    def _append(self, rec: bytes) -> None:
+        t0 = perf_counter()
+        self._f.write(rec + zlib.crc32(rec).to_bytes(4, "little"))
+        self._f.flush()
+        self._size += len(rec) + 4
+        _h_state_write.observe(perf_counter() - t0)
+
+    def _compact(self, st: tuple) -> None:
+        t0  = perf_counter()
+        rec = b"F" + _CK_FULL.pack(*st)
+        buf = _CK_HEAD.pack(_CK_MAGIC, STATE_VERSION) + rec + zlib.crc32(rec).to_bytes(4, "little")
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(buf); f.flush(); os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp, self.path)
+        self._f, self._size = open(self.path, "ab"), len(buf)
+        _h_state_write.observe(perf_counter() - t0)
+
+# ---------------------------------------------------------------------------
+# Persistence – signed usage log
+# ---------------------------------------------------------------------------
+
+_UC_REC  = struct.Struct("<cIIi")        # kind, unix time, day ordinal, used seconds
+_UC_TAG  = 16                             # truncated HMAC-SHA256
+_UC_SIZE = _UC_REC.size + _UC_TAG
+
+_UK_MAGIC = b"YTK1"                      # usage.key: magic, salt, check value
+_UK_SALT  = 16
+_UK_CHECK = 16
+
+def derive_chain_key(pw: str, salt: bytes) -> bytes:
+    """Usage-log key for admin password *pw* and the salt stored in usage.key."""
+    return hashlib.pbkdf2_hmac("sha256", pw.encode(), salt, USAGE_KEY_ITERATIONS)
+
+class UsageChain:
+    """usage.log: usage and event records, each tagged HMAC(key, previous tag + record).
+
+    Kinds: R = chain start, U = periodic save, A = adjust, D = day change,
+    B = time-bank balance after a ledger movement.
+    An append costs one HMAC, and verify() only checks bytes past the last
+    verified offset. A partial last record is a torn append and is cut off;
+    anything else that fails to verify sets tampered and freezes the log as
+    evidence.
+
+    The key is never stored. usage.key holds a salt and a check value; the
+    top-level key is derived from the admin password and that salt, an
+    account's (parent = the top-level chain) from the top-level key and its
+    own salt. A process therefore starts sealed: records are read but not
+    verified, and new ones wait in memory. The admin's next login unlocks the
+    chain (unlock()): the whole log is verified and the waiting records are
+    signed and written. A log that exists without usage.key, or – while a
+    password is set – a missing one, counts as tampering at once.
+
+    Threat model: someone who can write the program folder but does not know
+    the admin password (a child on the admin's PC). Lowering a counter in
+    config.json or state.bin is undone against the signed value; deleting or
+    forging usage.log / usage.key drops into the safe state – deletion at
+    once, forgery at the next admin login. Not covered: records waiting in
+    memory are lost if the process dies before that login, so an edit made
+    meanwhile is only held to the last signed value; process memory, edits
+    of the schedule or password_hash in config.json (those need file
+    permissions or a service under another account) and clock changes.
+    """
+
+    def __init__(self, path: Path | None = None, parent: "UsageChain | None" = None):
+        self.path     = path or _base() / USAGE_LOG_FILENAME
+        self.key_path = self.path.with_name(USAGE_KEY_FILENAME)
+        self.parent   = parent
+        self.tampered = ""                # reason, once detected
+        self._salt    = None              # None = usage.key not read yet, b"" = none
+        self._check   = b""
+        self._key     = None              # None = sealed (no admin login yet)
+        self._spare   = None              # (salt, key) of the admin's login when usage.key did not match
+        self._off     = 0                 # bytes read (verified once unlocked) so far
+        self._tag     = bytes(_UC_TAG)
+        self._last    = (0, 0)            # (day ordinal, used) of the newest record
+        self._bank    = None              # balance of the newest B record
+        self._pending = deque(maxlen=USAGE_LOG_MAX_BYTES // _UC_SIZE)   # records waiting for the key
+
+    def last_used(self, day: int) -> int | None:
+        return self._last[1] if self._last[0] == day and (self._off or self._pending) else None
+
+    def last_bank(self) -> int | None:
+        return self._bank if self._off or self._pending else None
+
+    @property
+    def active(self) -> bool:
+        """True while usage.key exists, i.e. the log was started for an admin password."""
+        self._load()
+        return bool(self._salt)
+
+    @property
+    def sealed(self) -> bool:
+        """Active, but not unlocked by an admin login in this process."""
+        return self.active and self._key is None
+
+    def verify(self, required: bool = False) -> bool:
+        """Check what was appended since the last call; False once tampering was seen.
+
+        required: an admin password is set, so usage.key and usage.log must exist.
+        """
+        self._load()
+        if self.tampered: return False
+        try:    size = self.path.stat().st_size
+        except FileNotFoundError: size = 0
+        if not self._salt:
+            if size:     return self._flag("usage.key missing or from an older version")
+            if required: return self._flag("usage.log and usage.key missing")
+            return True
+        if size < max(self._off, _UC_SIZE):
+            return self._flag("usage.log missing or truncated")
+        if size == self._off: return True
+        with open(self.path, "rb") as f:
+            f.seek(self._off); buf = f.read(size - self._off)
+        i = 0
+        while i + _UC_SIZE <= len(buf):
+            rec, tag = buf[i:i + _UC_REC.size], buf[i + _UC_REC.size:i + _UC_SIZE]
+            if self._key is not None and not hmac.compare_digest(self._mac(rec), tag):
+                return self._flag("bad record at byte %d" % (self._off + i))
+            self._tag = tag
+            self._note(*_UC_REC.unpack(rec))
+            i += _UC_SIZE
+        self._off += i
+        if i < len(buf):                                   # torn append
+            with open(self.path, "r+b") as f: f.truncate(self._off)
+        return True
+
+    def append(self, kind: bytes, day: int, used: int) -> None:
+        if not self.verify() or not self._salt: return
+        rec = (kind, int(datetime.now().timestamp()), day, used)
+        if self._key is None:                              # sealed: wait for the admin
+            if kind == b"U" and self._pending and self._pending[-1][0] == b"U": self._pending.pop()
+            self._pending.append(rec)
+            self._note(*rec)
+            return
+        if self._off >= USAGE_LOG_MAX_BYTES: self.restart(day, used); return
+        self._emit(*rec)
+
+    def derive(self, pw: str = "", salt: bytes | None = None) -> tuple | None:
+        """(salt, key) for *salt* (default: usage.key's); *pw* for the top-level chain, an
+        account's comes from the unlocked parent. None if that is still sealed."""
+        self._load()
+        salt = self._salt if salt is None else salt
+        if self.parent is None: return salt, derive_chain_key(pw, salt)
+        if self.parent._key is None: return None
+        return salt, hmac.new(self.parent._key, b"account" + salt, hashlib.sha256).digest()
+
+    def unlock(self, cred: tuple | None) -> bool:
+        """Admin login: take the key of *cred* (from derive()) if it matches usage.key,
+        verify the whole log with it and write the records that were waiting."""
+        if cred is None or not self.active: return False
+        if self._key is not None: return True
+        salt, key = cred
+        if salt != self._salt: return False                # usage.key replaced meanwhile
+        if not hmac.compare_digest(self._checksum(key), self._check):
+            self._spare = cred
+            return self._flag("usage.key does not match the admin password")
+        self._key, self._off, self._tag = key, 0, bytes(_UC_TAG)
+        if not self.verify(): return False
+        while self._pending: self._emit(*self._pending.popleft())
+        return True
+
+    def rekey(self, day: int, used: int, cred: tuple) -> None:
+        """Start over at (day, used) under *cred*: new password, or a log that was missing."""
+        salt, key = cred
+        _write_atomic(self.key_path, _UK_MAGIC + salt + self._checksum(key))
+        self._salt, self._check, self._key, self._spare = salt, self._checksum(key), key, None
+        self._start(day, used)
+
+    def restart(self, day: int, used: int) -> None:
+        """Begin a fresh chain at (day, used) under the current key: admin reset or size cap."""
+        if not self.active: return
+        if self._key is None:
+            if self._spare is None:
+                _log(str(datetime.now()) + ": usage.log: sealed, not restarted"); return
+            self.rekey(day, used, self._spare); return
+        self._start(day, used)
+
+    def retire(self) -> None:
+        """The admin password was removed: the log ends."""
+        for p in (self.key_path, self.path): p.unlink(missing_ok=True)
+        self._salt, self._key, self._spare = b"", None, None
+        self.tampered, self._off, self._tag, self._bank = "", 0, bytes(_UC_TAG), None
+        self._pending.clear()
+
+    def _load(self) -> None:
+        if self._salt is not None: return
+        try: raw = self.key_path.read_bytes()
+        except FileNotFoundError: raw = b""
+        except OSError as ex: raw = b""; self._flag("usage.key unreadable: " + str(ex))
+        ok = len(raw) == len(_UK_MAGIC) + _UK_SALT + _UK_CHECK and raw.startswith(_UK_MAGIC)
+        self._salt  = raw[len(_UK_MAGIC):-_UK_CHECK] if ok else b""
+        self._check = raw[-_UK_CHECK:] if ok else b""
+
+    def _start(self, day: int, used: int) -> None:
+        self.tampered, self._off, self._tag, self._bank = "", 0, bytes(_UC_TAG), None
+        self._pending.clear()
+        rec = _UC_REC.pack(b"R", int(datetime.now().timestamp()), day, used)
+        tag = self._mac(rec)
+        _write_atomic(self.path, rec + tag)
+        self._off, self._tag, self._last = _UC_SIZE, tag, (day, used)
+
+    def _emit(self, kind: bytes, ts: int, day: int, used: int) -> None:
+        rec = _UC_REC.pack(kind, ts, day, used)
+        tag = self._mac(rec)
+        with open(self.path, "ab") as f: f.write(rec + tag)
+        self._off += _UC_SIZE; self._tag = tag
+        self._note(kind, ts, day, used)
+
+    def _note(self, kind: bytes, ts: int, day: int, used: int) -> None:
+        if kind == b"B": self._bank = used
+        else:            self._last = (day, used)
+
+    def _checksum(self, key: bytes) -> bytes:
+        return hmac.new(key, b"usage.key check", hashlib.sha256).digest()[:_UK_CHECK]
+
+    def _mac(self, rec: bytes) -> bytes:
+        return hmac.new(self._key, self._tag + rec, hashlib.sha256).digest()[:_UC_TAG]
+
+    def _flag(self, why: str) -> bool:
+        if not self.tampered:
+            self.tampered = why
+            _log(str(datetime.now()) + ": " + str(self.path) + ": " + why)
+        return False
+
+def usage_chain() -> UsageChain:
+    """Process-wide UsageChain for the base directory."""
+    if _chain["obj"] is None: _chain["obj"] = UsageChain()
+    return _chain["obj"]
+
+# ---------------------------------------------------------------------------
+# Account profiles – per-account state, persisted apart
+# ---------------------------------------------------------------------------
+
+def _user_dir(name: str) -> Path:
+    return _base() / USERS_DIR / re.sub(r"[^\w-]", "_", name.casefold())
+
+class ProfileState:
+    """The part of the Watchdog that belongs to one account profile.
+
+    name "" is the top-level schedule, kept where it always was (config.json
+    counters, state.bin, usage.log). An account with a "users" entry keeps
+    usage.json, state.bin and usage.log in users/<account>/ behind a lock of
+    its own, so profiles never wait for each other's writes. Only the active
+    profile ticks; the others are a few fields and an unopened file each.
+    """
+    __slots__ = ("name", "cfg", "used", "countdown", "offset", "max_at_start", "warned", "today",
+                 "pbase", "bank", "tamper", "ckpt", "chain", "usage", "stored_bank", "lock")
+
+    def __init__(self, name: str, cfg: Config):
+        """*cfg*: the top-level Config; an account's files are read here (worker thread)."""
+        self.name, self.used, self.countdown, self.offset = name, 0, -1, 0
+        self.max_at_start, self.warned, self.today, self.tamper = 0, False, "", ""
+        self.pbase, self.bank = (0, 0), TimeBank()
+        self.usage = self.stored_bank = self.lock = None
+        if not name:
+            self.cfg, self.ckpt, self.chain = cfg, Checkpoint(), usage_chain()
+            return
+        d = _user_dir(name)
+        d.mkdir(parents=True, exist_ok=True)
+        try:    doc = json.loads((d / USER_USAGE_FILENAME).read_text(encoding="utf-8"))
+        except FileNotFoundError: doc = {}
+        except (OSError, ValueError) as ex:
+            _log(str(datetime.now()) + ": " + name + ": usage.json unreadable: " + str(ex)); doc = {}
+        self.cfg = user_cfg(cfg, name, doc if isinstance(doc, dict) else {})
+        new = [x for x in self.cfg.problems if x not in cfg.problems]
+        if new: _log(str(datetime.now()) + ": users." + name + ": " + "; ".join(new))
+        self.usage, self.stored_bank = dict(self.cfg.usage), self.cfg.bank
+        self.ckpt  = Checkpoint(d / STATE_FILENAME)
+        self.chain = UsageChain(d / USAGE_LOG_FILENAME, usage_chain())
+        self.lock  = threading.Lock()
+
+    def configure(self, cfg: Config) -> Config:
+        """Take the new top-level *cfg*; returns this profile's Config."""
+        self.cfg = cfg if not self.name else user_cfg(cfg, self.name)
+        return self.cfg
+
+    def stored(self) -> Config:
+        """This profile's Config with its persisted usage history and time bank."""
+        if not self.name: return load_cfg()
+        return self.cfg.with_usage(self.usage, self.stored_bank)
+
+    def persist(self, used: int, kind: bytes = b"U", bank: TimeBank | None = None) -> None:
+        """persist_used() for this profile."""
+        if not self.name: persist_used(used, kind, bank); return
+        used = max(0, int(used))
+        t0   = perf_counter()
+        if not self.lock.acquire(timeout=WRITE_LOCK_TIMEOUT_SEC):
+            raise TimeoutError(self.name + ": usage.json write lock busy")
+        try:
+            usage = _kept_usage(self.usage, used)
+            if bank is not None: self.stored_bank = bank
+            doc = {_USED_PREFIX + d: sec for d, sec in sorted(usage.items())}
+            if self.stored_bank: doc["time_bank"] = self.stored_bank.to_json()
+            _write_atomic(_user_dir(self.name) / USER_USAGE_FILENAME,
+                          json.dumps(doc, indent=2).encode("utf-8"))
+            self.usage = usage
+            _sign(self.chain, kind, used, bank)
+        finally:
+            self.lock.release()
+        _h_persist.observe(perf_counter() - t0)
+
+    def open_chain(self, pw_set: bool) -> None:
+        """An account's usage.log follows the admin password: unlocked with the top-level
+        key once the admin has logged in, retired when the password was removed. A
+        missing one is started only at an admin login (Watchdog.unlock_chains)."""
+        if not self.name: return
+        if not pw_set:
+            if self.chain.active: self.chain.retire()
+        elif self.chain.sealed:
+            self.chain.unlock(self.chain.derive())
+
+# ---------------------------------------------------------------------------
+# What-if evaluation (optional NumPy)
+# ---------------------------------------------------------------------------
 
-def load_used(cfg: dict) -> int:
-    raw = cfg.get(_used_key(), None)
-    if raw is None: return 0
-    return max(0, int(raw))
+def _minute_row(rule: DayRule | None, date, bank: int = 0) -> tuple:
+    """[lo, hi) allowed minutes of *date* – the same cut should_enforce makes at used=0."""
+    if not rule or not rule.enabled: return 0, 0
+    if rule.use_timer and rule.limit_sec + bank <= 0: return 0, 0
+    win = _window(rule, date)
+    if win is None: return 0, 1440
+    midnight = datetime.combine(date, dtime.min)
+    lo = int((win[0] - midnight).total_seconds()) // 60
+    hi = min(1440, int((win[1] - midnight).total_seconds()) // 60)
+    return (lo, hi) if lo < hi else (0, 0)
+
+def allowed_mask(cfg: Config, dates: list, bank: int = 0):
+    """(mask, budget): bool[days, 1440] permission per minute, int[days] budget minutes.
+
+    mask[d, m] == not should_enforce(cfg, 0, <minute m of dates[d]>, bank=bank); budget
+    is limit_minutes plus *bank* seconds (a started minute counts) on timer days and
+    1440 (no cap) otherwise.
+    """
+    import numpy as np
+    rows, budget = [], []
+    for d in dates:
+        rule = rule_for(cfg, d)
+        rows.append(_minute_row(rule, d, bank))
+        budget.append(-(-(rule.limit_sec + bank) // 60) if rule and rule.use_timer else 1440)
+    lohi = np.asarray(rows, dtype=np.int32).reshape(-1, 2)
+    m    = np.arange(1440, dtype=np.int32)
+    return ((m >= lohi[:, :1]) & (m < lohi[:, 1:]),
+            np.minimum(np.asarray(budget, dtype=np.int32), 1440))
+
+def week_mask(cfg: Config, monday=None):
+    """allowed_mask for the week starting at *monday* (default: the current week)."""
+    if monday is None:
+        today  = datetime.now().date()
+        monday = today - timedelta(days=today.weekday())
+    return allowed_mask(cfg, [monday + timedelta(days=i) for i in range(7)])
+
+def _replay(mask, budget, usage) -> tuple:
+    """One array pass: mask bool[K, D, 1440], budget int[K, D] minutes, usage as for
+    _what_if_batch. Returns (allowed, lock_at, used) int[K, D]; used = minutes spent
+    before the lock fired."""
+    import numpy as np
+    budget = budget[:, :, None]
+    m      = np.arange(1440, dtype=np.int32)
+    if usage.ndim == 1:
+        demand = -(-usage.astype(np.int64) // 60)[None, :, None]   # ceil to minutes
+        first  = np.where(mask.any(-1), mask.argmax(-1), 0)[:, :, None]
+        active = (m >= first) & (m < first + demand)
+    else:
+        active = np.broadcast_to(usage.astype(bool), mask.shape)
+    spent  = np.cumsum(active & mask, axis=-1) - (active & mask)   # used before minute m
+    fire   = active & (~mask | (spent >= budget))
+    fired  = fire.any(-1)
+    lock_at = np.where(fired, fire.argmax(-1), -1)
+    used    = np.where(fired, np.take_along_axis(spent, np.maximum(lock_at, 0)[:, :, None], -1)[:, :, 0],
+                       (active & mask).sum(-1))
+    return np.minimum(mask.sum(-1), budget[:, :, 0]), lock_at, used
+
+def _what_if_batch(cfgs: list, dates: list, usage, base: tuple = (0, 0)) -> tuple:
+    """Evaluate K configs (Config or JSON dicts) against one usage history in one array pass.
+
+    usage: int[days] used seconds (continuous use from each day's first allowed
+    minute is assumed) or bool[days, 1440] actual activity per minute.
+    Returns allowed int[K, days] minutes and lock_at int[K, days] minute of day
+    the enforcement would have fired (-1 = never).
+
+    With weekly or monthly budgets or rollover the days are replayed in order
+    (still one pass over all candidates per day): each day's budget is the
+    tightest of its own plus the candidate's banked rollover and what the
+    week / month left, counting the time each candidate would have allowed,
+    and the day is then settled into that candidate's TimeBank. *base* is
+    period_base() of dates[0] from the recorded history; the dates must be
+    consecutive. The bank starts empty and parent grants are not replayed:
+    they depend on what a parent did under the live config.
+    """
+    import numpy as np
+    cfgs  = [c if isinstance(c, Config) else Config(c) for c in cfgs]
+    usage = np.asarray(usage)
+    if not any(c.week_limit_minutes or c.month_limit_minutes or c.rollover_minutes for c in cfgs):
+        pairs = [allowed_mask(c, dates) for c in cfgs]
+        return _replay(np.stack([p[0] for p in pairs]), np.stack([p[1] for p in pairs]), usage)[:2]
+    k       = len(cfgs)
+    week    = np.array([c.week_limit_minutes * 60 or -1 for c in cfgs], dtype=np.int64)
+    month   = np.array([c.month_limit_minutes * 60 or -1 for c in cfgs], dtype=np.int64)
+    wk, mo  = np.full(k, base[0], dtype=np.int64), np.full(k, base[1], dtype=np.int64)
+    allowed = np.zeros((k, len(dates)), dtype=np.int64)
+    lock_at = np.zeros((k, len(dates)), dtype=np.int64)
+    banks   = [TimeBank(settled=dates[0].toordinal() - 1) if c.rollover_minutes else None for c in cfgs]
+    for i, d in enumerate(dates):
+        if i and d.weekday() == 0: wk[:] = 0
+        if i and d.day == 1:       mo[:] = 0
+        pairs  = [allowed_mask(c, [d], b.today if b is not None else 0) for c, b in zip(cfgs, banks)]
+        budget = np.stack([p[1] for p in pairs])[:, 0]
+        for lim, before in ((week, wk), (month, mo)):               # ceil: a started minute counts
+            budget = np.where(lim >= 0, np.minimum(budget, np.maximum(0, -(-(lim - before) // 60))), budget)
+        mask   = np.stack([p[0] for p in pairs]) & (budget > 0)[:, None, None]   # as _minute_row
+        a, at, used = _replay(mask, budget[:, None], usage[i:i + 1])
+        allowed[:, i], lock_at[:, i] = a[:, 0], at[:, 0]
+        wk += used[:, 0] * 60; mo += used[:, 0] * 60
+        banks = [b if b is None else b.settle(c, d.toordinal(), int(u) * 60)
+                 for c, b, u in zip(cfgs, banks, used[:, 0])]
+    return allowed, lock_at
+
+def what_if(cfgs: list, dates: list, usage, base: tuple = (0, 0)) -> tuple:
+    """_what_if_batch, fanned out over a process pool for large candidate sets."""
+    import numpy as np
+    if len(cfgs) < WHATIF_POOL_MIN:
+        return _what_if_batch(cfgs, dates, usage, base)
+    from concurrent.futures import ProcessPoolExecutor
+    cfgs   = [c.to_json() if isinstance(c, Config) else c for c in cfgs]   # picklable
+    step   = -(-len(cfgs) // WHATIF_POOL_WORKERS)
+    chunks = [cfgs[i:i + step] for i in range(0, len(cfgs), step)]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as ex:
+        parts = list(ex.map(_what_if_batch, chunks, [dates] * len(chunks), [usage] * len(chunks),
+                            [base] * len(chunks)))
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def whatif_cli(argv: list) -> int:
+    """python backend.py whatif [--days N] [--usage FILE] CANDIDATE.json ..."""
+    import argparse
+    ap = argparse.ArgumentParser(prog=APP_NAME + " whatif",
+                                 description="Replay usage history against candidate configs.")
+    ap.add_argument("candidates", nargs="+", help="config files to evaluate")
+    ap.add_argument("--days",  type=int, default=USAGE_RETENTION_DAYS, help="history length")
+    ap.add_argument("--usage", help="config file holding used_seconds_* (default: live config)")
+    a = ap.parse_args(argv)
+    hist  = (Config(json.loads(Path(a.usage).read_text(encoding="utf-8"))) if a.usage else load_cfg())
+    today = datetime.now().date()
+    dates = [today - timedelta(days=i) for i in range(a.days, 0, -1)]
+    used  = usage_history(hist, dates)
+    cfgs  = [json.loads(Path(c).read_text(encoding="utf-8")) for c in a.candidates]
+    allowed, lock_at = what_if(cfgs, dates, used, period_base(hist, dates[0]))
+    print("date        used  " + "  ".join("%-13s" % Path(c).stem[:13] for c in a.candidates))
+    for i, d in enumerate(dates):
+        cells = ["%5d %-7s" % (allowed[k, i], "%02d:%02d" % divmod(int(lock_at[k, i]), 60)
+                                if lock_at[k, i] >= 0 else "-") for k in range(len(cfgs))]
+        print("%s %5d  %s" % (d.isoformat(), used[i] // 60, "  ".join(cells)))
+    print("total            " + "  ".join("%5d %-7s" % (allowed[k].sum(), "%d lock" % (lock_at[k] >= 0).sum())
+                                          for k in range(len(cfgs))))
+    return 0
 
 # ---------------------------------------------------------------------------
 # System actions
 # ---------------------------------------------------------------------------
 
+def session_user() -> str:
+    """Account logged in at the console ("" if none): the active session on Windows,
+    this process's user elsewhere."""
+    if sys.platform == "win32":
+        sid = ctypes.windll.kernel32.WTSGetActiveConsoleSessionId()
+        if sid == 0xFFFFFFFF: return ""
+        buf, n = ctypes.c_wchar_p(), ctypes.c_ulong()
+        if not ctypes.windll.wtsapi32.WTSQuerySessionInformationW(     # 5 = WTSUserName
+                None, sid, 5, ctypes.byref(buf), ctypes.byref(n)): return ""
+        try:     return buf.value or ""
+        finally: ctypes.windll.wtsapi32.WTSFreeMemory(buf)
+    try: return getpass.getuser()
+    except Exception: return ""
+
 def do_action(action: str) -> None:
     try:
         if action == "lock":     ctypes.windll.user32.LockWorkStation()
@@ -299,44 +1791,163 @@ def do_action(action: str) -> None:
 # Watchdog
 # ---------------------------------------------------------------------------
 
-class Watchdog(threading.Thread):
-    """Background thread: tracks used time, enforces limits, fires callbacks."""
-
-    def __init__(self, on_trigger, on_warn):
-        super().__init__(daemon=True)
-        self.on_trigger = on_trigger  # (key: str, action: str) -> None
-        self.on_warn    = on_warn     # (minutes: int) -> None
-        self.warned     = False
+class _Active:
+    """Watchdog attribute that lives on the active ProfileState (_used -> .used)."""
+    def __set_name__(self, owner, name): self.field = name.lstrip("_")
+    def __get__(self, wd, owner=None):   return self if wd is None else getattr(wd._st, self.field)
+    def __set__(self, wd, v):            setattr(wd._st, self.field, v)
+
+class Watchdog:
+    """Enforcement task on the core loop: tracks used time, enforces limits, fires callbacks.
+
+    Ticks fall on fixed one-second boundaries of the loop clock; kick() runs
+    an extra, non-counting tick at once without moving them. Disk writes run
+    in the core's worker pool and are awaited, so a hung disk stalls this
+    task (and the supervisor replaces it) but not the loop. Everything it has
+    to report goes to the EventBus: Trigger, Warn, Tick, Adjust, DayRollover,
+    SleepResume, SessionSwitch.
+
+    With "users" in the config it looks up the console session's account every
+    SESSION_POLL_SEC and switches to that account's ProfileState (the top-level
+    one, "", for anyone else); the per-profile attributes below read and write
+    the active one, so only that profile is evaluated per tick.
+    """
+    _cfg          = _Active()     # the profile's Config (top-level one with its "users" entry)
+    _used         = _Active()     # seconds used today
+    _countdown    = _Active()     # -1=normal, >=0=grace-period ticking to enforcement
+    _offset       = _Active()     # display correction for window-mode days
+    _max_at_start = _Active()
+    warned        = _Active()
+    _today        = _Active()     # "YYYY-MM-DD" the counter belongs to
+    _pbase        = _Active()     # week / month seconds used before today (period_base)
+    _bank         = _Active()     # ledger; .today is added to a timer day's budget
+    _tamper       = _Active()     # usage-log problem the safe state was entered for
+    _ckpt         = _Active()
+
+    def __init__(self, bus: EventBus):
+        self.bus        = bus
         self.running    = True
-        self._lock      = threading.RLock()  # RLock: same thread may re-enter
-        self._used:     int  = 0
-        self._cfg:      dict = {}
-        self._today:    str  = ""
-        self._stop_evt       = threading.Event()
+        self._lock      = TimedRLock(_h_lock_wait, _h_lock_hold)  # re-entrant
+        self._st        = ProfileState("", _EMPTY_CFG)             # the active profile
+        self._profiles  = {"": self._st}                          # opened so far, by name
+        self._shared: Config = _EMPTY_CFG                         # top-level config
+        self._core           = None  # Core, set by start()
+        self._task           = None  # Future of the _run() task
+        self._wake           = asyncio.Event()
         self._save_cd        = 0
-        self._countdown: int = -1    # -1=normal, >=0=grace-period ticking to enforcement
-        self._offset:    int = 0     # display correction for window-mode days
-        self._max_at_start: int = 0
+        self.beat            = monotonic()  # heartbeat, stamped every loop pass (Supervisor)
 
     # --- public API ---------------------------------------------------------
 
+    def restore(self) -> bool:
+        """Resume today's checkpointed state exactly; False if there is none."""
+        st = self._ckpt.restore()
+        if st is None or st[0] != datetime.now().date().toordinal(): return False
+        with self._lock:
+            _, self._used, self._countdown, self._offset, self._max_at_start, warned = st
+            self.warned = bool(warned)
+            self._today = datetime.now().strftime("%Y-%m-%d")
+        return True
+
+    def check_chain(self) -> None:
+        """Hold the counter against the signed usage log.
+
+        A counter below today's signed value is raised back to it. A log that
+        fails verification, or is missing while a password is set, drops into
+        the safe state once: today's timer budget counts as spent and
+        extensions are void until an admin reset.
+        """
+        ch = self._st.chain
+        ok = ch.verify(bool(self._shared.password_hash))
+        with self._lock:
+            if not ok:
+                if self._tamper == ch.tampered: return
+                self._tamper = ch.tampered
+                rule = rule_for(self._cfg, datetime.now().date())
+                if rule and rule.use_timer:
+                    self._used = max(self._used, rule.limit_sec + self._bank.today)
+                self._offset = 0
+                _log(str(datetime.now()) + ": watchdog: usage log tampered, safe state")
+                self.kick()
+                return
+            self._tamper = ""
+            last = ch.last_used(datetime.now().date().toordinal())
+            if last is not None and self._used < last:
+                _log(str(datetime.now()) + ": watchdog: counter %d below signed %d, restored"
+                     % (self._used, last))
+                self._used = last
+            bank = ch.last_bank()
+            if bank is not None and self._bank.total > bank:
+                _log(str(datetime.now()) + ": watchdog: time bank %d above signed %d, clamped"
+                     % (self._bank.total, bank))
+                self._bank = self._bank.clamp(bank)
+                self._st.persist(self._used, b"A", self._bank)
+
+    def checkpoint(self, sync: bool = False) -> None:
+        with self._lock:
+            st = (datetime.now().date().toordinal(), self._used, self._countdown,
+                  self._offset, self._max_at_start, int(self.warned))
+        self._ckpt.write(st)
+        if sync: self._ckpt.sync()
+
     def get_remaining(self) -> int:
         with self._lock:
             if self._countdown >= 0:
                 return self._countdown
-            raw = calc_remaining(self._cfg, self._used)
+            raw = self._remaining(self._cfg, self._used)
             if raw == UNLIMITED: return UNLIMITED
             return max(0, raw + self._offset)
 
+    def get_lock_time(self) -> datetime | None:
+        """Projected enforcement time assuming continuous use; None = never."""
+        with self._lock:
+            now = datetime.now()
+            if self._countdown >= 0:
+                return now + timedelta(seconds=self._countdown)
+            at = next_lock(self._cfg, self._used, now, self._pbase, self._bank.today)
+            return None if at is None else at + timedelta(seconds=self._offset)
+
+    def set_cfg(self, cfg: Config) -> None:
+        """Swap config without touching grace period, warnings or budget (non-schedule edits)."""
+        with self._lock:
+            self._shared = cfg
+            self._st.configure(cfg)
+
+    def open_bank(self, cfg: Config) -> None:
+        """Take over the persisted time bank, settling the days missed while not running."""
+        with self._lock:
+            bank = cfg.bank.settle_until(cfg, datetime.now().date().toordinal(), cfg.usage)
+            self._bank = bank
+            if bank.to_json() != cfg.bank.to_json(): self._st.persist(self._used, b"D", bank)
+
+    def grant(self, sec: int) -> None:
+        """Deposit parent-granted seconds in the time bank (negative: withdraw)."""
+        with self._lock:
+            self._bank = self._bank.grant(int(sec), datetime.now().date().toordinal())
+            self._st.persist(self._used, b"A", self._bank)
+
+    def get_bank(self) -> TimeBank:
+        with self._lock: return self._bank
+
+    def set_history(self, cfg: Config) -> None:
+        """Rebuild the week / month running totals after the usage history was edited."""
+        with self._lock:
+            self._pbase = period_base(cfg, datetime.now().date())
+
+    def get_binding(self) -> str:
+        with self._lock:
+            if self._countdown >= 0: return ""
+            return binding_limit(self._cfg, self._used, base=self._pbase, bank=self._bank.today)
+
     def set_used(self, used: int) -> None:
         with self._lock:
             self._used      = max(0, used)
             self._countdown = -1
             self._offset    = 0
             self.warned     = False
-            self._stop_evt.set()
+            self.kick()
 
-    def update(self, cfg: dict) -> None:
+    def update(self, cfg: Config) -> None:
         """Push new config; preserve grace-period safety and budget continuity.
 
         False->True use_timer: discard accumulated non-timer usage so the full
@@ -346,53 +1957,65 @@ class Watchdog(threading.Thread):
         Any config change that would cause immediate enforcement gets a full
         takt-second grace period.
         """
-        takt = max(1, int(cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
+        takt = cfg.takt_seconds
         with self._lock:
-            day_now      = datetime.now().strftime("%A")
-            old_rule     = get_rule(self._cfg, day_now)
-            old_timer_on = bool(old_rule and old_rule.get("use_timer", True))
+            day_now      = datetime.now().date()
+            old_rule     = rule_for(self._cfg, day_now)
+            old_timer_on = bool(old_rule and old_rule.use_timer)
 
-            self._cfg    = cfg
+            self._shared = cfg
+            cfg          = self._st.configure(cfg)
             self._offset = 0
 
-            rule = get_rule(cfg, day_now)
-            if rule and rule.get("enabled", True) and rule.get("use_timer", True):
-                limit = day_limit_sec(rule)
+            rule = rule_for(cfg, day_now)
+            if rule and rule.enabled and rule.use_timer:
+                limit = rule.limit_sec
                 if not old_timer_on:
                     self._used = 0           # fresh budget after timer switched on
                 else:
-                    self._used = min(self._used, max(0, limit))
+                    self._used = min(self._used, max(0, limit + self._bank.today))
 
-            if not should_enforce(cfg, self._used):
+            if not self._enforced(cfg, self._used):
                 self._countdown = -1
             else:
                 self._countdown = takt       # full grace on any config-change enforcement
 
-            raw     = calc_remaining(cfg, 0)
+            raw     = self._remaining(cfg, 0)
             new_max = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
             if new_max > self._max_at_start:
                 self._max_at_start = new_max
             self.warned = False
-            self._stop_evt.set()
+            self.kick()
 
-    def adjust(self, delta: int) -> None:
-        with self._lock:
-            takt = max(1, int(self._cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
-            rule = get_rule(self._cfg, datetime.now().strftime("%A"))
+    def adjust(self, delta: int, from_bank: bool = False) -> None:
+        """Shift the remaining time by *delta* seconds.
 
-            if rule and rule.get("use_timer", True):
-                limit   = day_limit_sec(rule)
+        from_bank: on timer days, pay an extension from granted bank time
+        instead of giving it back from today's counter.
+        """
+        with self._lock:
+            takt = self._cfg.takt_seconds
+            rule = rule_for(self._cfg, datetime.now().date())
+            drew = None
+            asked = delta
+
+            if rule and rule.use_timer:
+                if from_bank and delta > 0:
+                    drew  = self._bank.draw(delta)
+                    delta = drew.drawn - self._bank.drawn
+                    if not delta: return
+                limit   = rule.limit_sec + (drew or self._bank).today
                 cur_rem = (self._countdown if self._countdown >= 0
-                           else max(0, calc_remaining(self._cfg, self._used)))
+                           else max(0, limit - self._used))
                 new_rem = min(limit, cur_rem + delta)
                 new_rem = max(takt, new_rem)
                 if new_rem > limit: return
                 self._used   = max(0, limit - new_rem)
                 self._offset = 0
             else:
-                raw = calc_remaining(self._cfg, self._used)
+                raw = self._remaining(self._cfg, self._used)
                 if raw == UNLIMITED: return
-                max_al = calc_remaining(self._cfg, 0)
+                max_al = self._remaining(self._cfg, 0)
                 if max_al == UNLIMITED: max_al = REMAINING_MAX_DAYS * 24 * 3600
                 cur_eff = (self._countdown if self._countdown >= 0
                            else max(0, raw + self._offset))
@@ -401,103 +2024,265 @@ class Watchdog(threading.Thread):
                 if new_rem > max_al: return
                 self._offset = new_rem - raw
 
+            if drew is not None: self._bank = drew
             self._countdown = -1
-            persist_used(self._used)
+            self._st.persist(self._used, b"A", drew)
+            self.bus.publish(Adjust(asked, self.get_remaining(), from_bank))
 
-    def extend(self, s: int) -> None: self.adjust(+abs(s))
+    def extend(self, s: int, from_bank: bool = False) -> None: self.adjust(+abs(s), from_bank)
     def reduce(self, s: int) -> None: self.adjust(-abs(s))
 
     def reset(self) -> None:
         with self._lock:
-            raw = calc_remaining(self._cfg, 0)
+            raw = self._remaining(self._cfg, 0)
             self._max_at_start = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
             self.set_used(0)    # RLock: same-thread re-entry safe
+            self._st.chain.restart(datetime.now().date().toordinal(), 0)   # admin reset clears tampering
+
+    def restart_chains(self, pw: str) -> None:
+        """New admin password: the usage log of every configured profile starts over under
+        its key (the top-level one first, accounts derive theirs from it); no password
+        retires them."""
+        top, day = usage_chain(), datetime.now().date().toordinal()
+        cred = top.derive(pw, os.urandom(_UK_SALT)) if pw else None    # PBKDF2 outside the lock
+        with self._lock:
+            for st in self._all_profiles():
+                if not pw: st.chain.retire(); continue
+                used = st.used if st.today else load_used(st.stored())
+                st.chain.rekey(day, used, cred if not st.name else st.chain.derive(salt=os.urandom(_UK_SALT)))
+
+    def unlock_chains(self, pw: str) -> None:
+        """Admin login with *pw*: every configured profile's usage log is verified in full
+        and signs again, records made meanwhile are written; one that is missing (or
+        from an older version) starts over."""
+        top, day = usage_chain(), datetime.now().date().toordinal()
+        cred = None                                         # PBKDF2 outside the lock
+        if top.sealed:        cred = top.derive(pw)
+        elif not top.active:  cred = top.derive(pw, os.urandom(_UK_SALT))
+        with self._lock:
+            for st in self._all_profiles():
+                ch = st.chain
+                c  = cred if not st.name else ch.derive(salt=None if ch.active else os.urandom(_UK_SALT))
+                if c is None: continue
+                if not ch.active: ch.rekey(day, st.used if st.today else load_used(st.stored()), c)
+                elif ch.sealed:   ch.unlock(c)
+            self.check_chain()
+
+    def _all_profiles(self) -> list:
+        """The top-level profile, then every account with a "users" entry (opened as needed)."""
+        return [self._profiles[""]] + [self._profile(n) for n in self._shared.users]
+
+    def _profile(self, name: str) -> ProfileState:
+        st = self._profiles.get(name)
+        if st is None: st = self._profiles[name] = ProfileState(name, self._shared)
+        return st
+
+    def prime(self, cfg: Config) -> None:
+        """Bring the active profile to its persisted state of today under top-level *cfg*."""
+        with self._lock:
+            self._shared = cfg
+            self._st.configure(cfg)
+            stored = self._st.stored()
+            self.set_history(stored)
+            if not self.restore():                 # checkpoint of today: exact pre-crash state
+                self.set_used(load_used(stored))
+            self.open_bank(stored)
+            self._st.open_chain(bool(cfg.password_hash))
+            self.check_chain()
+            raw     = self._remaining(self._cfg, 0)
+            new_max = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
+            if new_max > self._max_at_start:
+                self._max_at_start = new_max
+
+    def get_user(self) -> str:
+        """Account profile being enforced, "" for the top-level schedule."""
+        return self._st.name
+
+    def get_cfg(self) -> Config:
+        """The active profile's Config."""
+        with self._lock: return self._cfg
+
+    def stored(self) -> Config:
+        """The active profile's Config with its persisted usage history."""
+        with self._lock: st = self._st
+        return st.stored()
+
+    def flush(self) -> None:
+        """Persist the counter and sync the checkpoint (shutdown)."""
+        with self._lock: st, used = self._st, self._used
+        try: st.persist(used)
+        finally: self.checkpoint(sync=True)
+
+    def start(self, core: Core) -> None:
+        self._core = core
+        self._task = core.submit(self._run())
 
-    def kick(self) -> None:  self._stop_evt.set()
-    def stop(self) -> None:  self.running = False; self._stop_evt.set()
+    def is_alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def kick(self) -> None:
+        """Tick now (thread-safe); before start() the first tick comes soon anyway."""
+        if self._core is not None: self._core.call(self._wake.set)
+
+    def stop(self) -> None:  self.running = False; self.kick()
+
+    def join(self, timeout: float) -> None:
+        """Wait for the tick in progress to finish after stop()."""
+        try: self._task.result(timeout)
+        except Exception: pass
+
+    def retire(self) -> None:
+        """Stop for good after a stall; should the task wake up, it writes nothing."""
+        self.stop()
+        if self._task is not None: self._task.cancel()
+        if self._core is not None: self._core.spawn(self._ckpt.close)   # may block on a hung disk
 
     # --- internals ----------------------------------------------------------
 
+    def _remaining(self, cfg: Config, used: int) -> int:
+        return calc_remaining(cfg, used, base=self._pbase, bank=self._bank.today)
+
+    def _enforced(self, cfg: Config, used: int) -> bool:
+        return should_enforce(cfg, used, base=self._pbase, bank=self._bank.today)
+
     def _check_day_change(self) -> None:
         today = datetime.now().strftime("%Y-%m-%d")
         if today != self._today:
-            self._today = today
+            prev, self._today = self._today, today
             with self._lock:
+                day, used = ddate.fromisoformat(today), self._used
+                self._roll_periods(prev, day)
+                if prev:
+                    self._bank = self._bank.settle_until(
+                        self._cfg, day.toordinal(), {**self._st.stored().usage, prev: self._used})
                 self._used      = 0
                 self._countdown = -1
                 self._offset    = 0
-                raw = calc_remaining(self._cfg, 0)
+                raw = self._remaining(self._cfg, 0)
                 self._max_at_start = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
-                persist_used(0)
+                self._st.persist(0, b"D", self._bank)
                 self.warned = False
-
-    def _evaluate(self, takt: int, triggered_by_zero: bool) -> None:
+                if prev: self.bus.publish(DayRollover(today, used))
+
+    def _roll_periods(self, prev: str, day) -> None:
+        """Fold the finished day's counter into the running totals; rebuild after a gap."""
+        if not prev or (day - ddate.fromisoformat(prev)).days != 1:
+            self._pbase = period_base(self._st.stored(), day); return
+        w, m = self._pbase
+        self._pbase = (w + self._used if day.weekday() else 0,
+                       m + self._used if day.day > 1 else 0)
+
+    def _evaluate(self, takt: int, triggered_by_zero: bool) -> Event | None:
+        """Enforce or warn; returns the Trigger / Warn to publish, or None."""
         with self._lock:
             cfg    = self._cfg
             used   = self._used
             offset = self._offset
 
-        if should_enforce(cfg, used):
+        if self._enforced(cfg, used):
             if not triggered_by_zero:
                 with self._lock:
                     if self._countdown < 0:
                         self._countdown = takt
-                return
+                return None
             with self._lock:
                 self._countdown = takt
-            action = cfg.get("action", DEFAULT_ACTION)
-            rule   = get_rule(cfg, datetime.now().strftime("%A"))
+            action = cfg.action
+            rule   = rule_for(cfg, datetime.now().date())
             in_win = True
             if rule:
                 win = _window(rule, datetime.now().date())
                 if win is not None:
                     in_win = win[0] <= datetime.now() < win[1]
-            budget = calc_remaining(cfg, used)
+            budget = self._remaining(cfg, used)
             key    = ("msg_timeout"
-                      if (in_win and rule and rule.get("enabled", True) and budget == 0)
+                      if (in_win and rule and rule.enabled and budget == 0)
                       else "msg_blocked")
-            self.on_trigger(key, action)
-            return
+            _c_triggers.inc()
+            return Trigger(key, action)
 
-        raw    = calc_remaining(cfg, used)
+        raw    = self._remaining(cfg, used)
         budget = UNLIMITED if raw == UNLIMITED else max(0, raw + offset)
         if budget != UNLIMITED and budget <= takt and not self.warned:
             self.warned = True
-            self.on_warn(max(0, budget // 60))
-        elif budget == UNLIMITED or budget > takt:
+            _c_warnings.inc()
+            return Warn(max(0, budget // 60))
+        if budget == UNLIMITED or budget > takt:
             self.warned = False
-
-    def run(self) -> None:
-        cfg  = load_cfg()
-        takt = max(1, int(cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
+        return None
+
+    def _save(self) -> None:
+        self._st.persist(self._used)
+        self.check_chain()
+
+    def _switch(self, name: str) -> None:
+        """Make account profile *name* the one enforced (worker thread): the previous
+        one is saved and its checkpoint closed; a profile seen the first time is opened
+        from its files and primed."""
+        with self._lock: old, used = self._st, self._used
+        try: old.persist(used)
+        except TimeoutError as ex: _log(str(datetime.now()) + ": watchdog: switch: " + str(ex))
+        self.checkpoint(sync=True)
+        old.ckpt.close()
+        st = self._profile(name)
         with self._lock:
-            self._cfg = cfg
-            if should_enforce(cfg, self._used) and self._countdown < 0:
+            self._st, self._save_cd = st, 0
+            if st.today: st.configure(self._shared)
+            else:                                              # first time: from its files
+                self.prime(self._shared)
+                self._today = datetime.now().strftime("%Y-%m-%d")
+        self.bus.publish(SessionSwitch(name))
+
+    async def _run(self) -> None:
+        core = self._core
+        cfg  = await core.io(load_cfg)
+        hist = await core.io(self._st.stored)
+        takt = cfg.takt_seconds
+        with self._lock:
+            self._shared = cfg
+            cfg          = self._st.configure(cfg)
+            self._pbase  = period_base(hist, datetime.now().date())
+            if self._enforced(cfg, self._used) and self._countdown < 0:
                 self._countdown = takt
-            raw = calc_remaining(cfg, 0)
-            self._max_at_start = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
+            raw = self._remaining(cfg, 0)
+            self._max_at_start = max(self._max_at_start,    # keeps a restored checkpoint value
+                                     REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw)
             self._today = datetime.now().strftime("%Y-%m-%d")
 
         last_tick_time = datetime.now()
+        due = core.loop.time() + 1
+        poll_at = 0.0                           # next session lookup (loop time)
 
         while self.running:
-            kicked = self._stop_evt.wait(timeout=1)
-            self._stop_evt.clear()
+            self.beat = monotonic()
+            kicked = await core.sleep_until(due, self._wake)
             if not self.running: break
+            if not kicked:                      # next boundary; skip, don't bunch, missed ones
+                due += 1
+                if due <= core.loop.time(): due = core.loop.time() + 1
+            self.beat = monotonic()
+            t0 = perf_counter()
             try:
                 now             = datetime.now()
                 wall_elapsed    = (now - last_tick_time).total_seconds()
                 last_tick_time  = now
                 is_sleep_resume = wall_elapsed > WATCHDOG_SLEEP_GAP_SEC
+                if is_sleep_resume: self.bus.publish(SleepResume(int(wall_elapsed)))
 
-                self._check_day_change()
+                if (self._shared.users or self._st.name) and core.loop.time() >= poll_at:
+                    poll_at = core.loop.time() + SESSION_POLL_SEC
+                    name    = self._shared.user_profile(await core.io(session_user))
+                    if name != self._st.name: await core.io(self._switch, name)
+
+                if now.strftime("%Y-%m-%d") != self._today:
+                    await core.io(self._check_day_change)
 
                 with self._lock:
-                    _r0 = calc_remaining(self._cfg, 0)
+                    _r0 = self._remaining(self._cfg, 0)
                     if _r0 != UNLIMITED and _r0 > self._max_at_start:
                         self._max_at_start = _r0
                     cfg  = self._cfg
-                    takt = max(1, int(cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
+                    takt = cfg.takt_seconds
 
                 triggered_by_zero = False
 
@@ -506,7 +2291,7 @@ class Watchdog(threading.Thread):
                         self._countdown -= 1
                         self._save_cd   += 1
                     elif self._countdown == -1:
-                        if not should_enforce(cfg, self._used):
+                        if not self._enforced(cfg, self._used):
                             self._used    += 1
                             self._save_cd += 1
                         else:
@@ -515,14 +2300,212 @@ class Watchdog(threading.Thread):
                         triggered_by_zero = True
                         self._save_cd     = takt
 
-                if self._save_cd >= takt or kicked:
+                saved = self._save_cd >= takt or kicked
+                if saved and self.running:
                     self._save_cd = 0
-                    persist_used(self._used)
-                    if not kicked:
-                        self._evaluate(takt, triggered_by_zero)
+                    try:
+                        await core.io(self._save)
+                    except Exception as ex:     # a failed save must not stop enforcement
+                        _log(str(datetime.now()) + ": watchdog: save: " + str(ex))
+                    ev = None if kicked else self._evaluate(takt, triggered_by_zero)
+                    if ev is not None: self.bus.publish(ev)
+
+                if self._countdown > 0 and not self.warned:
+                    self.warned = True          # grace period started: wake a hidden frontend
+                    _c_warnings.inc()
+                    self.bus.publish(Warn(self._countdown // 60))
+
+                if self.running:                # per-tick delta; at most one tick is ever lost
+                    await core.io(self.checkpoint, saved)
+                if self.running and self.bus.wants("tick"):
+                    rem = self.get_remaining()
+                    self.bus.publish(Tick(rem, rem != UNLIMITED and rem <= takt))
 
             except Exception as ex:
                 _log(str(datetime.now()) + ": watchdog: " + str(ex))
+            _h_tick.observe(perf_counter() - t0)
+
+# ---------------------------------------------------------------------------
+# Supervisor – Watchdog liveness
+# ---------------------------------------------------------------------------
+
+class Supervisor(threading.Thread):
+    """Replaces a Watchdog whose heartbeat stopped.
+
+    A Watchdog silent for stall_seconds (wedged in a disk write or on its
+    lock) or whose task ended is retired; all thread stacks go to error.log,
+    AppController restarts enforcement from the persisted state (on a fresh
+    core loop if the old one no longer answers) and a Stall event reports
+    the incident. A replacement that fails is retried every round, the old
+    Watchdog staying in place meanwhile. A gap in the supervisor's own
+    schedule means the system slept, and that round is skipped. It is a
+    thread of its own, not a core task, so that it still runs when the loop
+    is wedged.
+
+    budget (rss MiB, threads), set by the lean tray resident, is checked every
+    BUDGET_CHECK_SEC; the first overrun is logged with a thread dump. The test
+    measures a fresh resident on one machine; this catches what only shows
+    after days of uptime or on a user's system (a leak, a thread per
+    reconnect, a heavy tray backend) for one /proc read a minute.
+    """
+
+    def __init__(self, ctrl: "AppController"):
+        super().__init__(daemon=True, name="supervisor")
+        self.ctrl     = ctrl
+        self.restarts = 0
+        self.budget   = None          # (rss_mib, threads) or None
+        self._over    = False         # budget overrun already logged
+        self._failed  = None          # Watchdog whose replacement failed, retried each round
+        self._stop    = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        last = checked = monotonic()
+        while not self._stop.wait(SUPERVISOR_CHECK_SEC):
+            now       = monotonic()
+            gap, last = now - last, now
+            if self.budget and not self._over and now - checked >= BUDGET_CHECK_SEC:
+                checked = now; self._check_budget()
+            if gap > 2 * SUPERVISOR_CHECK_SEC + WATCHDOG_SLEEP_GAP_SEC: continue   # resumed from sleep
+            wd = self.ctrl.wd
+            if not wd.running: continue
+            if not wd.is_alive():
+                why = "task ended"
+            elif now - wd.beat > self.ctrl.get_cfg().stall_seconds:
+                why = "stalled %.0f s" % (now - wd.beat)
+            else: continue
+            try: self._restart(why)
+            except Exception as ex:
+                _log(str(datetime.now()) + ": supervisor: restart failed, retrying: " + str(ex))
+
+    def _check_budget(self) -> None:
+        rss, n = resident_usage()
+        mib, threads = self.budget
+        if rss > mib * 1024 * 1024 or n > threads:
+            self._over = True
+            _log(str(datetime.now()) + ": supervisor: over budget, rss %.1f MiB (max %d), "
+                 "%d threads (max %d)\n" % (rss / 1048576, mib, n, threads) + thread_dump())
+
+    def _restart(self, why: str) -> None:
+        wd = self.ctrl.wd
+        if wd is not self._failed:                # first attempt for this Watchdog
+            _log(str(datetime.now()) + ": supervisor: watchdog " + why + ", restarting\n" + thread_dump())
+        self._failed = wd
+        self.ctrl._restart_watchdog()
+        self._failed = None
+        self.restarts += 1
+        _c_stalls.inc()
+        self.ctrl.bus.publish(Stall(why))
+
+# ---------------------------------------------------------------------------
+# Config transactions
+# ---------------------------------------------------------------------------
+
+SCHEDULE_KEYS = ("allowed_times", "overrides", "profiles", "week_limit_minutes", "month_limit_minutes",
+                  "users")
+
+class ConfigConflict(RuntimeError):
+    """config.json was changed by someone else since the transaction began."""
+
+def _check_setting(key: str, v) -> None:
+    """ValueError unless *key* is a settable Config field and *v* a value the
+    parser keeps as is; structured fields are parsed and must raise no problem."""
+    if key not in Config.KEYS or key == "cfg_version": raise ValueError("unknown setting " + repr(key))
+    conv = {"takt_seconds":        _int_range(TAKT_SEC_LO, TAKT_SEC_HI),
+            "language":            _one_of(LANGS),
+            "action":              _one_of(ACTION_KEYS),
+            "password_hash":       _of_type(str),
+            "week_limit_minutes":  _int_range(0, WEEK_LIMIT_MIN_HI),
+            "month_limit_minutes": _int_range(0, MONTH_LIMIT_MIN_HI),
+            "rollover_minutes":    _int_range(0, ROLLOVER_MIN_HI),
+            "rollover_days":       _int_range(1, ROLLOVER_DAYS_HI),
+            "stall_seconds":       _int_range(STALL_SEC_LO, STALL_SEC_HI),
+            "metrics_port":        _int_range(0, 65535),
+            "dashboard_port":      _int_range(0, 65535),
+            "dashboard_host":      _of_type(str),
+            "metrics_file":        _of_type(bool),
+            "profile":             _of_type(bool),
+            "tray_only":           _of_type(bool),
+            "service":             _of_type(bool)}.get(key)
+    if conv is None:                                       # allowed_times, profiles, overrides, users
+        problems = Config({key: v}).problems
+        if problems: raise ValueError("; ".join(problems))
+        return
+    try: conv(v)
+    except (TypeError, ValueError): raise ValueError(key + "=" + repr(v)) from None
+
+def _check_day(day: str, f: dict) -> None:
+    if day not in DAYS_EN: raise ValueError("day=" + repr(day))
+    for k in ("start", "end"):
+        if k in f and not validate_time(f[k]): raise ValueError(day + "." + k + "=" + repr(f[k]))
+    if "limit_minutes" in f and not (isinstance(f["limit_minutes"], int)
+                                     and DAY_LIMIT_MIN_LO <= f["limit_minutes"] <= DAY_LIMIT_MIN_HI):
+        raise ValueError(day + ".limit_minutes=" + repr(f["limit_minutes"]))
+
+class ConfigTx:
+    """Batch of setting changes committed with one validation, one write, one update.
+
+    Optimistic concurrency: commit raises ConfigConflict when the on-disk
+    cfg_version moved, or when a key this transaction touches was edited
+    externally since it began. Usage counters are never part of the check.
+    """
+
+    def __init__(self, ctrl: "AppController"):
+        self._ctrl  = ctrl
+        self._base  = load_cfg()
+        self._pw    = None           # new admin password, for the usage logs
+        self._set:  dict = {}
+        self._days: dict = {}
+        self.committed = False
+
+    def __enter__(self) -> "ConfigTx":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None: self.commit()
+        return False
+
+    def set(self, key: str, value) -> "ConfigTx":
+        self._set[key] = value; return self
+
+    def set_day(self, day: str, **fields) -> "ConfigTx":
+        self._days.setdefault(day, {}).update(fields); return self
+
+    def set_password(self, pw: str) -> "ConfigTx":
+        self._pw = pw
+        return self.set("password_hash", hash_pw(pw) if pw else "")
+
+    def commit(self) -> bool:
+        """Apply everything; False if nothing differed (no write, no update)."""
+        for k, v in self._set.items(): _check_setting(k, v)
+        for d, f in self._days.items(): _check_day(d, f)
+        with _write_lock:
+            cur = load_cfg(fresh=True)
+            if cur.cfg_version != self._base.cfg_version:
+                raise ConfigConflict("cfg_version changed")
+            touched = set(self._set) | ({"allowed_times"} if self._days else set())
+            stale   = [k for k in touched if cur.value(k) != self._base.value(k)]
+            if stale: raise ConfigConflict("changed externally: " + ", ".join(sorted(stale)))
+            changed = {k: v for k, v in self._set.items() if cur.value(k) != v}
+            times   = cur.value("allowed_times")
+            patched = _patch_days(times, self._days)
+            if patched is not times: changed["allowed_times"] = patched
+            if not changed: return False
+            cur = Config({**cur.to_json(), **changed, "cfg_version": cur.cfg_version + 1})
+            save_cfg(cur)
+        self.committed = True
+        ctrl = self._ctrl
+        ctrl._cfg = cur
+        if "profile" in changed: ctrl.profiler.set(cur.profile, "config")
+        if self._pw is not None and "password_hash" in changed:
+            ctrl.wd.restart_chains(self._pw)
+        schedule = any(k in changed for k in SCHEDULE_KEYS)
+        if schedule: ctrl.wd.update(cur)
+        else:        ctrl.wd.set_cfg(cur)
+        ctrl.bus.publish(ConfigChanged(cur, schedule))
+        return True
 
 # ---------------------------------------------------------------------------
 # AppController – public API surface for any frontend
@@ -532,95 +2515,293 @@ class AppController:
     """Facade over Watchdog and config I/O.
 
     Frontend contract:
-      1. AppController(on_trigger, on_warn) — callbacks are the only inbound channel.
+      1. Events are the only inbound channel: subscribe(fn, kinds, maxlen, policy) gets
+         fn(event) for Trigger, Warn, Tick, ConfigChanged, DayRollover, Adjust, SleepResume
+         and Stall (a Watchdog restarted by the supervisor) in a bus thread, through a
+         queue of its own; unsubscribe(sub) ends it. The callbacks of
+         AppController([on_trigger, on_warn, on_stall, on_tick]) are subscribed that way.
       2. call start() once; stop() on shutdown.
-      3. load() on startup; save(...) on every config change.
-      4. State queries: get_remaining(), is_in_warn_zone(), is_login_allowed(), get_cfg().
+      3. load() on startup; apply_changes(...) (or the full save(...)) on config changes;
+         ``with edit() as tx`` for batched changes committed with a single write.
+      4. State queries: get_remaining(), get_lock_time(), is_in_warn_zone(),
+         is_login_allowed(), get_cfg(), get_binding(), get_bank(), active_override(),
+         iter_transitions(). Time bank: grant_time(), extend(s, from_bank=True).
+         Passwords: check_password_async() / set_password_async() keep hashing off the UI thread;
+         verify_password(pw, client) -> (ok, retry_in) is the blocking check for servers.
       5. Never access Watchdog internals directly.
     """
 
-    def __init__(self, on_trigger, on_warn):
-        self.wd    = Watchdog(on_trigger=on_trigger, on_warn=on_warn)
-        self._cfg: dict = {}
+    def __init__(self, on_trigger=None, on_warn=None, on_stall=None, on_tick=None):
+        self.core    = Core()
+        self.bus     = EventBus()
+        self.wd      = Watchdog(self.bus)
+        self.watcher = ConfigWatcher(on_change=self._on_cfg_change)
+        self.supervisor = Supervisor(self)
+        self.profiler   = Profiler()
+        self.metrics = None           # MetricsExporter when metrics_file / metrics_port is set
+        self.dashboard = None         # Dashboard when dashboard_port is set
+        self._cfg: Config = _EMPTY_CFG
+        self._pw_lock  = threading.Lock()
+        self._pw_fails: dict = {}     # client -> (wrong attempts, monotonic end of its lockout)
+        self.bus.attach(on_trigger, on_warn, on_stall, on_tick)
+
+    def subscribe(self, fn, kinds=None, maxlen: int = BUS_QUEUE_LEN,
+                  policy: str = "drop-oldest") -> Subscription:
+        """fn(event) for each event whose kind ("trigger", "tick", ...; None = all) is
+        in *kinds*, from a bus thread. At most *maxlen* wait; on overflow "drop-oldest"
+        discards the oldest, "coalesce" keeps only the newest of each kind."""
+        return self.bus.subscribe(fn, kinds, maxlen, policy)
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self.bus.unsubscribe(sub)
 
     def start(self) -> None:
-        self.wd.start()
-        atexit.register(lambda: persist_used(self.wd._used))
+        self.core.start()
+        self.wd.start(self.core)
+        self.watcher.start(self.core)
+        self.supervisor.start()
+        cfg = load_cfg()
+        if cfg.metrics_file or cfg.metrics_port:
+            self.metrics = MetricsExporter(cfg); self.metrics.start(self.core)
+        if cfg.dashboard_port:
+            self.dashboard = Dashboard(self, cfg); self.dashboard.start(self.core)
+        if cfg.profile or os.environ.get(PROFILE_ENV, "") not in ("", "0"):
+            self.profiler.set(True, "config" if cfg.profile else PROFILE_ENV)
+        sig = getattr(signal, "SIGUSR2", None) or getattr(signal, "SIGBREAK", None)
+        if sig is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(sig, lambda *_: self.profiler.toggle("signal"))
+        atexit.register(self._flush)
 
     def stop(self) -> None:
-        persist_used(self.wd._used)
+        self.supervisor.stop()
+        self.watcher.stop()
+        self.profiler.set(False)
+        if self.metrics is not None: self.metrics.stop()
+        if self.dashboard is not None: self.dashboard.stop()
         self.wd.stop()
-
-    def load(self) -> dict:
+        self.wd.join(CORE_STOP_SEC)               # its last checkpoint write before ours
+        self._flush()
+        self.core.stop()
+        self.bus.close()
+        atexit.unregister(self._flush)
+
+    def _flush(self) -> None:
+        try: self.wd.flush()
+        except TimeoutError as ex: _log(str(datetime.now()) + ": flush: " + str(ex))
+
+    def _on_cfg_change(self, cfg: Config) -> None:
+        """Watcher push: external schedule edits re-evaluate the Watchdog, others just swap."""
+        old, today = self._cfg, _today()
+        self._cfg  = cfg
+        if (not self.wd.get_user() and {d: s for d, s in old.usage.items() if d != today}
+                != {d: s for d, s in cfg.usage.items() if d != today}):
+            self.wd.set_history(cfg)              # past days edited: rebuild week / month totals
+        if cfg.same(old): return                  # own writes, usage counters only
+        if cfg.profile != old.profile: self.profiler.set(cfg.profile, "config")
+        schedule = not cfg.same(old, SCHEDULE_KEYS)
+        if schedule: self.wd.update(cfg)
+        else:        self.wd.set_cfg(cfg)
+        self.bus.publish(ConfigChanged(cfg, schedule))
+
+    def load(self) -> Config:
         self._cfg = load_cfg()
-        with self.wd._lock:
-            self.wd._cfg = self._cfg
-            raw     = calc_remaining(self._cfg, 0)
-            new_max = REMAINING_MAX_DAYS * 24 * 3600 if raw == UNLIMITED else raw
-            if new_max > self.wd._max_at_start:
-                self.wd._max_at_start = new_max
-            self.wd.set_used(load_used(self._cfg))
-        return dict(self._cfg)
+        self.wd.prime(self._cfg)
+        return self._cfg
+
+    def _restart_watchdog(self) -> None:
+        """Supervisor: replace the stalled Watchdog by one resumed from state.bin / config.json.
+
+        The replacement is primed before the old one is retired: should that raise
+        (disk error, bad state), the old one stays in place and the next
+        supervisor round tries again, instead of enforcement ending for good."""
+        wd = Watchdog(self.bus)
+        wd.prime(self._cfg)
+        self.wd.retire()
+        if not self.core.responsive(CORE_PING_SEC): self._restart_core()
+        self.wd = wd
+        wd.start(self.core)
+
+    def _restart_core(self) -> None:
+        """Supervisor: abandon a wedged core loop; watcher, exporter and dashboard move to a new one."""
+        _log(str(datetime.now()) + ": supervisor: core loop unresponsive, replaced")
+        old, self.core = self.core, Core()
+        old.abandon()
+        self.core.start()
+        self.watcher.stop()
+        self.watcher = ConfigWatcher(on_change=self._on_cfg_change)
+        self.watcher.start(self.core)
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics = MetricsExporter(load_cfg()); self.metrics.start(self.core)
+        if self.dashboard is not None:
+            self.dashboard.stop()
+            self.dashboard = Dashboard(self, load_cfg()); self.dashboard.start(self.core)
 
     def save(self, lang: str, action: str, takt_sec: int,
              day_states: dict, day_starts: dict, day_ends: dict,
              day_timers: dict, day_limits: dict) -> None:
-        times = []
+        days = {}
         for d in DAYS_EN:
             st = day_states[d]
-            s  = "00:00" if st != "range" else day_starts[d]
-            e  = "00:00" if st != "range" else day_ends[d]
-            times.append({"days": d, "start": s, "end": e,
-                          "enabled":       st != "off",
-                          "use_timer":     day_timers[d],
-                          "limit_minutes": day_limits[d]})
-        cfg = load_cfg()
-        cfg.update({"takt_seconds": takt_sec, "language": lang,
-                    "action": action, "allowed_times": times})
-        save_cfg(cfg)
-        self._cfg = cfg
-        self.wd.update(cfg)
+            days[d] = {"start":         "00:00" if st != "range" else day_starts[d],
+                       "end":           "00:00" if st != "range" else day_ends[d],
+                       "enabled":       st != "off",
+                       "use_timer":     day_timers[d],
+                       "limit_minutes": day_limits[d]}
+        self.apply_changes({"takt_seconds": takt_sec, "language": lang, "action": action}, days)
+
+    def apply_changes(self, settings: dict, days: dict | None = None) -> bool:
+        """Merge a minimal change set with one write; False (no write) if nothing differs.
+
+        settings: top-level keys, e.g. {"takt_seconds": 30}.
+        days:     {day_en: {field: value}} patches for that day's allowed_times rule.
+        The Watchdog is only re-evaluated when the schedule itself changed.
+        """
+        with self.edit() as tx:
+            for k, v in settings.items(): tx.set(k, v)
+            for d, f in (days or {}).items(): tx.set_day(d, **f)
+        return tx.committed
+
+    def edit(self) -> ConfigTx:
+        """``with ctrl.edit() as tx: tx.set(...); tx.set_day(...)`` – one write on exit."""
+        return ConfigTx(self)
 
     def reset_timer(self) -> None:
         self._cfg = load_cfg()
-        with self.wd._lock:
-            self.wd._cfg = self._cfg
+        self.wd.set_cfg(self._cfg)
         self.wd.reset()
 
-    def get_remaining(self)    -> int:  return self.wd.get_remaining()
-    def get_cfg(self)          -> dict: return dict(self._cfg)
+    def get_remaining(self) -> int:
+        _c_remaining.inc()
+        return self.wd.get_remaining()
+
+    def get_lock_time(self)    -> datetime | None: return self.wd.get_lock_time()
+    def get_cfg(self)          -> Config: return self._cfg
+    def get_binding(self)      -> str:    return self.wd.get_binding()
+    def get_bank(self)         -> TimeBank: return self.wd.get_bank()
+    def get_user(self)         -> str:    return self.wd.get_user()
+
+    def grant_time(self, sec: int) -> None:
+        """Parent-granted time into the bank; spent via extend(s, from_bank=True)."""
+        self.wd.grant(sec); self.wd.kick()
 
     def is_in_warn_zone(self) -> bool:
-        takt = max(1, int(self._cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
+        takt = self._cfg.takt_seconds
         rem  = self.wd.get_remaining()
         return rem != UNLIMITED and rem <= takt
 
     def is_login_allowed(self) -> bool:
-        takt = max(1, int(self._cfg.get("takt_seconds", DEFAULT_TAKT_SEC)))
+        takt = self._cfg.takt_seconds
         rem  = self.wd.get_remaining()
         if rem == UNLIMITED: return True
         return rem > takt
 
-    def extend(self, s: int) -> None: self.wd.extend(s); self.wd.kick()
+    def extend(self, s: int, from_bank: bool = False) -> None:
+        self.wd.extend(s, from_bank); self.wd.kick()
     def reduce(self, s: int) -> None: self.wd.reduce(s); self.wd.kick()
 
     def check_password(self, pw: str) -> bool:
-        stored = load_cfg().get("password_hash", "")
-        return not stored or hash_pw(pw) == stored
+        """Blocking check (throttled like the async one); prefer check_password_async in a GUI."""
+        ok, _ = self.verify_password(pw)
+        return ok
+
+    def check_password_async(self, pw: str, done) -> None:
+        """Verify in the core hashing thread; done(ok, retry_in_sec) is called from that thread.
+
+        After PW_FREE_ATTEMPTS wrong passwords each further failure doubles a
+        lockout (PW_BACKOFF_SEC up to PW_BACKOFF_MAX_SEC); attempts inside it
+        fail at once without hashing. GUI callers marshal done onto their loop.
+        """
+        wait = self._pw_wait("")
+        if wait > 0: done(False, wait); return
+        self.core.compute(lambda: done(*self.verify_password(pw)))
+
+    def verify_password(self, pw: str, client: str = "") -> tuple:
+        """(ok, retry_in_sec) for *pw*, blocking; the throttled check behind every login.
+
+        The backoff is kept per *client*: "" is this machine (window, tray,
+        settings child); the Dashboard passes each LAN peer's address, so
+        wrong guesses from the network do not lock the parent out. Servers
+        call it from a worker; a correct password also unlocks the signed
+        usage logs.
+        """
+        wait = self._pw_wait(client)
+        if wait > 0: return False, wait
+        stored = load_cfg().password_hash
+        ok, wait = verify_pw(pw, stored), 0.0
+        with self._pw_lock:
+            fails, until = self._pw_fails.pop(client, (0, 0.0))
+            if not ok:
+                now, fails = monotonic(), fails + 1
+                if fails >= PW_FREE_ATTEMPTS:
+                    until = now + min(PW_BACKOFF_MAX_SEC, PW_BACKOFF_SEC * 2 ** (fails - PW_FREE_ATTEMPTS))
+                if len(self._pw_fails) >= PW_CLIENTS_MAX:  # forget clients not locked out
+                    self._pw_fails = {k: v for k, v in self._pw_fails.items() if v[1] > now}
+                self._pw_fails[client] = (fails, until)
+                wait = max(0.0, until - now)
+        if ok and stored: self.wd.unlock_chains(pw)       # the usage logs sign again
+        if ok and pw_needs_upgrade(stored):                # re-hash legacy formats after the reply
+            self.core.compute(self._upgrade_pw, pw)
+        return ok, wait
+
+    def _pw_wait(self, client: str) -> float:
+        with self._pw_lock:
+            return self._pw_fails.get(client, (0, 0.0))[1] - monotonic()
+
+    def _upgrade_pw(self, pw: str) -> None:
+        try:
+            with self.edit() as tx: tx.set("password_hash", hash_pw(pw))
+        except Exception as ex:
+            _log(str(datetime.now()) + ": password upgrade: " + str(ex))
 
     def set_password(self, pw: str) -> None:
-        cfg = load_cfg()
-        cfg["password_hash"] = hash_pw(pw) if pw else ""
-        save_cfg(cfg)
+        with self.edit() as tx: tx.set_password(pw)
+
+    def set_password_async(self, pw: str, done) -> None:
+        """set_password (hash calibration, key derivation) in the hashing thread; done(error or None)."""
+        def work():
+            try:    self.set_password(pw); done(None)
+            except Exception as ex: done(ex)
+        self.core.compute(work)
 
     def has_password(self) -> bool:
-        return bool(load_cfg().get("password_hash", ""))
+        return bool(load_cfg().password_hash)
 
     def set_language(self, lang: str) -> None:
-        cfg = load_cfg(); cfg["language"] = lang; save_cfg(cfg)
-        self._cfg = cfg
+        with self.edit() as tx: tx.set("language", lang)
+
+    def iter_transitions(self, start: datetime | None = None, end: datetime | None = None):
+        """Lazy (timestamp, "lock"|"unlock", reason) timeline from the live usage counter."""
         with self.wd._lock:
-            self.wd._cfg = self._cfg
+            cfg, used, pbase, bank = self.wd._cfg, self.wd._used, self.wd._pbase, self.wd._bank
+        return iter_transitions(cfg, used, start, end, base=pbase, bank=bank.today)
+
+    def what_if(self, candidates: list, days: int = USAGE_RETENTION_DAYS) -> dict:
+        """Replay the last *days* of recorded usage against candidate configs (needs NumPy).
+
+        Returns {"dates": [...], "used": [...], "allowed": [[min/day] per candidate],
+        "lock_at": [[minute of day or -1] per candidate]}.
+        """
+        today = datetime.now().date()
+        dates = [today - timedelta(days=i) for i in range(days, 0, -1)]
+        hist  = self.wd.stored()
+        used  = usage_history(hist, dates)
+        allowed, lock_at = what_if(list(candidates), dates, used, period_base(hist, dates[0]))
+        return {"dates": [d.isoformat() for d in dates], "used": used,
+                "allowed": allowed.tolist(), "lock_at": lock_at.tolist()}
+
+    def active_override(self) -> str:
+        """Label of the dated override governing today, or "" if the weekday rule applies."""
+        entry = override_for(self.wd.get_cfg(), datetime.now().date())
+        return "" if entry is None else entry.label
+
+    def import_ics(self, path: str, **target) -> int:
+        """Append iCalendar events as override ranges; returns the number imported."""
+        entries = parse_ics(Path(path).read_text(encoding="utf-8", errors="replace"), **target)
+        if not entries: return 0
+        with self.edit() as tx:
+            tx.set("overrides", tx._base.value("overrides") + entries)
+        return len(entries)
 
     @staticmethod
     def translate(lang: str, key: str, **kw) -> str:      return t(lang, key, **kw)
@@ -630,17 +2811,32 @@ class AppController:
     def days_short(lang: str) -> list:                     return days_short(lang)
 
     @staticmethod
-    def format_date(lang: str) -> str:
-        now = datetime.now()
-        return "\U0001f4c5 " + t(lang, "date_fmt",
-                                  day=day_full(lang, now.strftime("%A")),
-                                  dt=now.strftime("%H:%M:%S"))
+    def format_lock_time(at: datetime, lang: str) -> str:
+        """HH:MM today, weekday + HH:MM within a week, date + HH:MM beyond."""
+        days = (at.date() - datetime.now().date()).days
+        if days <= 0: return at.strftime("%H:%M")
+        if days < 7:  return days_short(lang)[at.weekday()] + " " + at.strftime("%H:%M")
+        return at.strftime("%d.%m. %H:%M")
+
+    @staticmethod
+    def format_date(lang: str) -> str:                     return format_date(lang)
+    @staticmethod
+    def has_text(key: str) -> bool:                        return has_text(key)
+
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
 def main() -> None:
+    from ipc import RemoteController, serve
+    if sys.argv[1:2] == ["--service"]:
+        serve()
+        return
+    if sys.argv[1:2] == ["--settings"]:          # settings window of the tray resident / service
+        from frontend import App
+        App(ctrl_cls=RemoteController, child=True).mainloop()
+        return
     mutex = ctypes.windll.kernel32.CreateMutexW(None, True, APP_MUTEX)
     if ctypes.windll.kernel32.GetLastError() == 183:
         hwnd = ctypes.windll.user32.FindWindowW(None, APP_NAME)
@@ -648,11 +2844,22 @@ def main() -> None:
             ctypes.windll.user32.ShowWindow(hwnd, 9)
             ctypes.windll.user32.SetForegroundWindow(hwnd)
         return
+    cfg = load_cfg()
+    ctrl_cls = RemoteController if cfg.service else AppController
+    if cfg.tray_only:
+        try: from tray import Tray
+        except ImportError as ex: _log(str(datetime.now()) + ": tray_only unavailable: " + str(ex))
+        else: Tray(ctrl_cls).run(); return
     from frontend import App
-    App().mainloop()
+    App(ctrl_cls=ctrl_cls).mainloop()
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()   # what-if process pool in the frozen exe
+    sys.modules.setdefault("backend", sys.modules["__main__"])   # ipc, tray, frontend share this copy
+    if sys.argv[1:2] == ["whatif"]:
+        sys.exit(whatif_cli(sys.argv[2:]))
     try:
         main()
     except Exception:
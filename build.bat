@@ -24,8 +24,16 @@ pyinstaller ^
   --name "%NAME%" ^
   --icon "%ICON%" ^
   --add-data "img;img" ^
+  --add-data "i18n;i18n" ^
+  --add-data "web;web" ^
   --add-data "definitions.py;." ^
+  --add-data "core.py;." ^
+  --add-data "bus.py;." ^
+  --add-data "metrics.py;." ^
+  --add-data "web.py;." ^
+  --add-data "ipc.py;." ^
   --add-data "frontend.py;." ^
+  --add-data "tray.py;." ^
   "%ENTRY%"
 
 echo.
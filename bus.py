@@ -0,0 +1,192 @@
+"""YourTime – backend events and the bus that fans them out.
+
+Events are plain read-only records; EventBus delivers them to subscribers,
+each with its own bounded queue, on a few daemon threads.
+"""
+import threading
+from collections import deque
+from datetime import datetime
+
+from definitions import BUS_QUEUE_LEN, BUS_WORKERS
+from core import Frozen, log
+from metrics import Counter
+
+_c_events  = Counter("yourtime_bus_events_total", "Events published on the event bus")
+_c_dropped = Counter("yourtime_bus_dropped_total", "Events dropped or coalesced in a full subscriber queue")
+
+# ---------------------------------------------------------------------------
+# Events
+# ---------------------------------------------------------------------------
+
+class Event(Frozen):
+    """Something the backend reports; subclasses name their fields in __slots__
+    (positional order) and their type in ``kind``."""
+    __slots__ = ()
+    kind = ""
+
+    def __init__(self, *args, **kw):
+        self._init(**dict(zip(self.__slots__, args)), **kw)
+
+    @property
+    def args(self) -> tuple:
+        return tuple(getattr(self, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return "%s%r" % (type(self).__name__, self.args)
+
+class Trigger(Event):
+    """Enforcement: show message *key* ("msg_timeout" / "msg_blocked"), run *action*."""
+    __slots__ = ("key", "action")
+    kind = "trigger"
+
+class Warn(Event):
+    """Last takt before enforcement began; *minutes* left."""
+    __slots__ = ("minutes",)
+    kind = "warn"
+
+class Tick(Event):
+    """Watchdog tick: *remaining* seconds (UNLIMITED) and whether that is within the last takt."""
+    __slots__ = ("remaining", "warn")
+    kind = "tick"
+
+class ConfigChanged(Event):
+    """New settings in effect; *schedule*: the limits were re-evaluated, not just swapped."""
+    __slots__ = ("cfg", "schedule")
+    kind = "config"
+
+class DayRollover(Event):
+    """Midnight passed: *day* (ISO date) starts, *used* seconds were counted the day before."""
+    __slots__ = ("day", "used")
+    kind = "rollover"
+
+class Adjust(Event):
+    """Remaining time shifted by *delta* seconds (extend / reduce), now *remaining*."""
+    __slots__ = ("delta", "remaining", "from_bank")
+    kind = "adjust"
+
+class SleepResume(Event):
+    """The system slept or the clock jumped; *gap* seconds were not counted."""
+    __slots__ = ("gap",)
+    kind = "resume"
+
+class Stall(Event):
+    """The supervisor replaced a stalled Watchdog; *reason* as logged."""
+    __slots__ = ("reason",)
+    kind = "stall"
+
+class SessionSwitch(Event):
+    """Another account's profile is enforced now: *user* ("" = the top-level schedule)."""
+    __slots__ = ("user",)
+    kind = "session"
+
+EVENTS = {c.kind: c for c in (Trigger, Warn, Tick, ConfigChanged, DayRollover, Adjust, SleepResume, Stall,
+                              SessionSwitch)}
+
+class Subscription:
+    """One subscriber: its kinds, bounded queue and overflow policy."""
+    POLICIES = ("drop-oldest", "coalesce")
+
+    def __init__(self, fn, kinds, maxlen: int, policy: str):
+        if policy not in self.POLICIES: raise ValueError("policy: " + policy)
+        self.fn      = fn             # (event: Event) -> None, in a bus thread
+        self.kinds   = None if kinds is None else frozenset(kinds)
+        self.policy  = policy
+        self.active  = True
+        self.dropped = 0
+        self._q      = deque(maxlen=max(1, maxlen))
+        self._lock   = threading.Lock()
+        self._busy   = False          # a pump is scheduled or running
+
+    def put(self, ev: Event) -> bool:
+        """Queue *ev*; True if a pump has to be scheduled."""
+        with self._lock:
+            if self.policy == "coalesce":
+                for i, old in enumerate(self._q):
+                    if old.kind == ev.kind:
+                        self._q[i] = ev; self.dropped += 1; _c_dropped.inc()
+                        return False
+            if len(self._q) == self._q.maxlen: self.dropped += 1; _c_dropped.inc()
+            self._q.append(ev)
+            if self._busy: return False
+            self._busy = True
+            return True
+
+    def pump(self) -> None:
+        """Deliver until the queue is empty; one pump per subscription at a time."""
+        while True:
+            with self._lock:
+                if not self._q or not self.active: self._busy = False; return
+                ev = self._q.popleft()
+            try: self.fn(ev)
+            except Exception as ex: log(str(datetime.now()) + ": event bus: %r: %s" % (ev, ex))
+
+class EventBus:
+    """Fan-out of backend events to subscribers, each with its own bounded queue.
+
+    publish() never blocks on a subscriber: it appends to every matching queue
+    (full: the oldest event is dropped, or with "coalesce" a pending event of
+    the same kind is replaced in place) and schedules that subscriber's pump.
+    Pumps run on up to BUS_WORKERS daemon threads, started as needed (a hung
+    subscriber must not hold up process exit), in order and one at a time per
+    subscriber, so a slow subscriber only falls behind itself; the Watchdog
+    never waits for one.
+    """
+
+    def __init__(self):
+        self._subs: tuple = ()        # copied on change, read without the lock
+        self._lock    = threading.Lock()
+        self._cv      = threading.Condition(threading.Lock())
+        self._ready   = deque()       # subscriptions with a pump due
+        self._workers = 0
+        self._idle    = 0
+        self._closed  = False
+
+    def subscribe(self, fn, kinds=None, maxlen: int = BUS_QUEUE_LEN,
+                  policy: str = "drop-oldest") -> Subscription:
+        """fn(event) for events whose kind is in *kinds* (None: all)."""
+        sub = Subscription(fn, kinds, maxlen, policy)
+        with self._lock: self._subs += (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.active = False
+        with self._lock: self._subs = tuple(s for s in self._subs if s is not sub)
+
+    def wants(self, kind: str) -> bool:
+        """Anyone listening for *kind* – lets publishers skip building an event."""
+        return any(s.kinds is None or kind in s.kinds for s in self._subs)
+
+    def publish(self, ev: Event) -> None:
+        _c_events.inc()
+        for s in self._subs:
+            if (s.kinds is None or ev.kind in s.kinds) and s.put(ev):
+                self._schedule(s)
+
+    def close(self) -> None:
+        with self._cv: self._closed = True; self._ready.clear(); self._cv.notify_all()
+
+    def _schedule(self, sub: Subscription) -> None:
+        with self._cv:
+            if self._closed: return
+            self._ready.append(sub)
+            self._cv.notify()
+            if len(self._ready) <= self._idle or self._workers >= BUS_WORKERS: return
+            self._workers += 1
+        threading.Thread(target=self._work, daemon=True, name="bus").start()
+
+    def _work(self) -> None:
+        while True:
+            with self._cv:
+                while not self._ready and not self._closed:
+                    self._idle += 1; self._cv.wait(); self._idle -= 1
+                if self._closed: self._workers -= 1; return
+                sub = self._ready.popleft()
+            sub.pump()
+
+    def attach(self, on_trigger=None, on_warn=None, on_stall=None, on_tick=None) -> None:
+        """Subscribe the classic AppController(...) callbacks."""
+        if on_trigger is not None: self.subscribe(lambda e: on_trigger(e.key, e.action), ("trigger",))
+        if on_warn    is not None: self.subscribe(lambda e: on_warn(e.minutes), ("warn",))
+        if on_stall   is not None: self.subscribe(lambda e: on_stall(e.reason), ("stall",))
+        if on_tick    is not None: self.subscribe(lambda e: on_tick(e.remaining), ("tick",),
+                                                  policy="coalesce")
@@ -0,0 +1,171 @@
+"""YourTime – process plumbing shared by the backend modules.
+
+Base directory, error log and atomic writes; the read-only model base class;
+Core, the asyncio loop every timer and socket of the backend runs on.
+"""
+import os, sys, asyncio, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from definitions import HOME_ENV, LOG_FILENAME, LOG_MAX_BYTES, CORE_IO_WORKERS, CORE_CPU_WORKERS, CORE_STOP_SEC
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def base_dir() -> Path:
+    """Directory of config.json, state and logs: HOME_ENV if set, else next to the exe or the scripts."""
+    if os.environ.get(HOME_ENV): return Path(os.environ[HOME_ENV])
+    return Path(sys.executable).parent if getattr(sys, "frozen", False) else Path(__file__).parent
+
+def res_dir() -> Path:
+    """Bundled read-only resources (i18n catalogs, dashboard page): _MEIPASS when frozen."""
+    return Path(getattr(sys, "_MEIPASS", Path(__file__).parent))
+
+def log(msg: str) -> None:
+    try:
+        p = base_dir() / LOG_FILENAME
+        if p.exists() and p.stat().st_size > LOG_MAX_BYTES:
+            t = p.read_text(encoding="utf-8", errors="replace")
+            p.write_text(t[len(t) // 2:], encoding="utf-8")
+        with open(p, "a", encoding="utf-8") as f:
+            f.write(msg + "\n")
+    except Exception:
+        pass
+
+def write_atomic(p: Path, data: bytes) -> None:
+    """Replace *p* with *data*: written and fsynced beside it, then renamed over it."""
+    tmp = p.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, p)
+
+class Frozen:
+    """__slots__ base whose attributes are assigned once, in __init__."""
+    __slots__ = ()
+
+    def _init(self, **kw) -> None:
+        for k, v in kw.items(): object.__setattr__(self, k, v)
+
+    def __setattr__(self, k, v): raise AttributeError(type(self).__name__ + " is read-only")
+    def __delattr__(self, k):    raise AttributeError(type(self).__name__ + " is read-only")
+
+# ---------------------------------------------------------------------------
+# Core – one asyncio event loop for timers and I/O
+# ---------------------------------------------------------------------------
+
+class Core:
+    """The backend's event loop, on one daemon thread ("core").
+
+    The Watchdog tick, the config watcher, the metrics exporter and the dashboard are tasks
+    and timers on it; anything that may block (disk writes, callbacks into a
+    frontend) goes through io() / spawn() to a pool of CORE_IO_WORKERS
+    threads, so the loop itself never waits on a disk. Password hashing goes
+    through cpu() / compute() to a pool of its own, so a login never delays
+    the Watchdog's writes. Other threads (Tk mainloop, pystray, IPC) reach it
+    only through call() and submit(); AppController's public methods stay
+    synchronous.
+    """
+
+    def __init__(self):
+        self.loop   = asyncio.new_event_loop()
+        self.pool   = ThreadPoolExecutor(CORE_IO_WORKERS, thread_name_prefix="core-io")
+        self.cpu_pool = ThreadPoolExecutor(CORE_CPU_WORKERS, thread_name_prefix="core-cpu")
+        self.thread = threading.Thread(target=self._run, daemon=True, name="core")
+        self.loop.set_default_executor(self.pool)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Cancel what is still scheduled and end the loop."""
+        if not self.thread.is_alive(): return
+        self.call(self._shutdown)
+        self.thread.join(CORE_STOP_SEC)
+
+    def abandon(self) -> None:
+        """Give up a wedged loop: it stops should it ever return; its thread is left behind."""
+        try: self.loop.call_soon_threadsafe(self.loop.stop)
+        except RuntimeError: pass
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def responsive(self, timeout: float) -> bool:
+        """True if the loop runs a no-op within *timeout* seconds."""
+        f = Future()
+        try: self.loop.call_soon_threadsafe(f.set_result, True)
+        except RuntimeError: return False                   # loop closed
+        try: return f.result(timeout)
+        except Exception: return False
+
+    # --- bridge (any thread) ------------------------------------------------
+
+    def call(self, fn, *args) -> None:
+        """fn(*args) on the loop thread, soon."""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the loop; the returned Future is waitable from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def spawn(self, fn, *args) -> Future:
+        """fn(*args) in the worker pool, fire and forget."""
+        return self.pool.submit(fn, *args)
+
+    def compute(self, fn, *args) -> Future:
+        """fn(*args) in the hashing pool, fire and forget."""
+        return self.cpu_pool.submit(fn, *args)
+
+    # --- loop thread only ---------------------------------------------------
+
+    def io(self, fn, *args) -> asyncio.Future:
+        """Awaitable fn(*args) in the worker pool."""
+        return self.loop.run_in_executor(self.pool, fn, *args)
+
+    def cpu(self, fn, *args) -> asyncio.Future:
+        """Awaitable fn(*args) in the hashing pool."""
+        return self.loop.run_in_executor(self.cpu_pool, fn, *args)
+
+    async def sleep_until(self, when: float, wake: asyncio.Event) -> bool:
+        """Sleep to loop time *when*; True (and *wake* cleared) if *wake* was set first."""
+        if not wake.is_set():
+            try: await asyncio.wait_for(wake.wait(), max(0.0, when - self.loop.time()))
+            except asyncio.TimeoutError: return False
+        wake.clear()
+        return True
+
+    def every(self, sec: float, fn, *args) -> "_Every":
+        """fn(*args) on the loop every *sec* seconds on fixed boundaries; .cancel() ends it."""
+        return _Every(self.loop, sec, fn, args)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:     self.loop.run_forever()
+        finally: self.loop.close()
+
+    def _shutdown(self) -> None:
+        for task in asyncio.all_tasks(self.loop): task.cancel()
+        self.loop.call_soon(self.loop.stop)
+
+class _Every:
+    """Core.every(): a call_at chain; boundaries missed while the loop was busy are skipped."""
+
+    def __init__(self, loop, sec: float, fn, args: tuple):
+        self.loop, self.sec, self.fn, self.args = loop, sec, fn, args
+        self.at = loop.time()
+        self._h = None
+        self._arm()
+
+    def cancel(self) -> None:
+        if self._h is not None: self._h.cancel(); self._h = None
+
+    def _arm(self) -> None:
+        now, self.at = self.loop.time(), self.at + self.sec
+        if self.at <= now: self.at = now + self.sec - (now - self.at) % self.sec
+        self._h = self.loop.call_at(self.at, self._fire)
+
+    def _fire(self) -> None:
+        try: self.fn(*self.args)
+        except Exception as ex: log(str(datetime.now()) + ": core: " + str(ex))
+        if self._h is not None: self._arm()
@@ -1,4 +1,4 @@
-"""YourTime – all constants, defaults, and i18n strings.
+"""YourTime – all constants, defaults, and i18n settings (catalogs: i18n/*.json).
 
 Sorted by layer of use:
   1. App identity
@@ -18,6 +18,16 @@ APP_MUTEX: str = "YourTime_SingleInstance"
 CONFIG_FILENAME: str = "config.json"
 LOG_FILENAME: str    = "error.log"
 LOG_MAX_BYTES: int   = 100_000
+STATE_FILENAME: str  = "state.bin"
+USAGE_LOG_FILENAME: str = "usage.log"
+USAGE_KEY_FILENAME: str = "usage.key"
+METRICS_FILENAME: str   = "metrics.prom"
+PROFILE_STACKS_FILENAME: str = "profile.folded"
+PROFILE_ALLOC_FILENAME:  str = "profile_alloc.txt"
+SERVICE_FILENAME: str   = "service.json"
+# Data directory (config.json, state, logs) instead of the program's own, e.g.
+# for a portable install or the test suite
+HOME_ENV: str = "YOURTIME_HOME"
 
 # ---------------------------------------------------------------------------
 # 2. Backend – domain / scheduling
@@ -46,17 +56,42 @@ TAKT_SEC_HI:      int = 86_400
 # Watchdog: wall-clock gap > this on a ~1 s tick → OS woke from sleep
 WATCHDOG_SLEEP_GAP_SEC: int = 3
 
-# Per-day usage log retained for this many days
+# Supervisor: a Watchdog heartbeat silent this long counts as stalled
+# (stall_seconds default and bounds), and how often it is checked
+WATCHDOG_STALL_SEC: int     = 30
+STALL_SEC_LO:       int     = 5
+STALL_SEC_HI:       int     = 3_600
+SUPERVISOR_CHECK_SEC: float = 1.0
+
+# Per-day usage log retained for this many days (never less than the current
+# week and month, which the period budgets below are summed over)
 USAGE_RETENTION_DAYS: int = 30
 
+# Weekly / monthly budgets (week_limit_minutes, month_limit_minutes; 0 = none)
+WEEK_LIMIT_MIN_HI:  int = 7 * 1_440
+MONTH_LIMIT_MIN_HI: int = 31 * 1_440
+
+# Time bank: unused timer budget carried over (rollover_minutes cap on the
+# carried balance, 0 = off) and days a carried lot stays usable (rollover_days)
+ROLLOVER_MIN_HI:       int = 7 * 1_440
+DEFAULT_ROLLOVER_DAYS: int = 7
+ROLLOVER_DAYS_HI:      int = 366
+
+# What-if evaluator: candidate count from which a process pool is used
+WHATIF_POOL_MIN:     int = 64
+WHATIF_POOL_WORKERS: int = 4
+
 # Per-day timer limit (minutes)
 DEFAULT_DAY_LIMIT_MIN: int = 60
 DAY_LIMIT_MIN_LO:      int = 1
 DAY_LIMIT_MIN_HI:      int = 1_440   # 24 h
 
-# calc_remaining: cap lookahead at 7 days
+# Stand-in span for UNLIMITED wherever a finite maximum is needed (adjust, max-at-start)
 REMAINING_MAX_DAYS: int = 7
 
+# iter_transitions: give up after this many consecutive days without a boundary
+TRANSITION_IDLE_DAYS: int = 400
+
 # Default config written on first run
 DEFAULT_CFG: dict = {
     "takt_seconds":  DEFAULT_TAKT_SEC,
@@ -74,95 +109,122 @@ AUTOSTART_APPROVED_KEY: str = (r"Software\Microsoft\Windows\CurrentVersion"
 AUTOSTART_NAME:         str   = APP_NAME
 AUTOSTART_ENABLED_DATA: bytes = bytes([0x02]) + bytes(11)
 
+# Config watcher: quiet time before an external edit is re-read (atomic-rename
+# editors fire several events), and the stat() interval when no OS notification API works
+CONFIG_DEBOUNCE_SEC: float = 0.3
+CONFIG_POLL_SEC:     float = 2.0
+
+# persist_used gives up (and the Watchdog carries on enforcing) when another
+# writer holds config.json this long, e.g. a write hung on a dead disk
+WRITE_LOCK_TIMEOUT_SEC: float = 10.0
+
+# Backend core (one asyncio loop for Watchdog ticks, config watcher, metrics):
+# worker threads for its blocking disk work, threads apart from those for
+# password hashing (a ~PW_VERIFY_TARGET_MS hash must not hold up the Watchdog's
+# writes), how long the supervisor waits for the loop to answer before
+# replacing it as wedged, and how long stop() waits for the running tick and
+# the loop to finish
+CORE_IO_WORKERS: int   = 2
+CORE_CPU_WORKERS: int  = 1
+CORE_PING_SEC:   float = 1.0
+CORE_STOP_SEC:   float = 2.0
+
+# Event bus: events a subscriber's queue holds before the oldest is dropped (or,
+# with "coalesce", the pending one of the same kind is replaced), and the threads
+# delivering them; a subscriber that hangs ties up one of them
+BUS_QUEUE_LEN: int = 64
+BUS_WORKERS:   int = 4
+
+# Watchdog checkpoint (state.bin): format version, and the log size at which it
+# is rewritten as a single full record
+STATE_VERSION:       int = 1
+STATE_COMPACT_BYTES: int = 64 * 1024
+
+# Signed usage log (usage.log): PBKDF2 rounds deriving its key from the admin
+# password, and the size at which it restarts from a single record
+USAGE_KEY_ITERATIONS: int = 200_000
+USAGE_LOG_MAX_BYTES:  int = 256 * 1024
+
+# Admin password: hash cost is calibrated at setup to this verify time; scrypt
+# memory cap; wrong attempts before backoff, then doubling lockout (seconds),
+# kept per client; clients tracked before those not locked out are forgotten
+PW_VERIFY_TARGET_MS: int = 250
+PW_SCRYPT_MAXMEM:    int = 64 * 1024 * 1024
+PW_FREE_ATTEMPTS:    int = 3
+PW_BACKOFF_SEC:      int = 2
+PW_BACKOFF_MAX_SEC:  int = 300
+PW_CLIENTS_MAX:      int = 256
+
+# Metrics: histogram bucket bounds (seconds), metrics.prom rewrite interval when
+# metrics_file is on, and the interface the metrics_port endpoint binds to
+METRICS_BUCKETS_SEC: tuple = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+METRICS_FILE_INTERVAL_SEC: int = 15
+METRICS_HOST: str = "127.0.0.1"
+
+# IPC: frontends in another process than the enforcement (the settings child
+# of the tray_only resident, every frontend of a --service) reach its
+# AppController over this loopback interface. The child gets port and key in
+# IPC_ENV, others read them from service.json. Clients poll the state every
+# IPC_POLL_SEC; the server keeps the last IPC_EVENT_BACKLOG events for them,
+# and a client waits up to SERVICE_START_SEC for a service it started
+IPC_HOST: str = "127.0.0.1"
+IPC_ENV:  str = "YOURTIME_IPC"
+IPC_POLL_SEC:      float = 1.0
+IPC_EVENT_BACKLOG: int   = 64
+SERVICE_START_SEC: float = 5.0
+
+# Web dashboard (dashboard_port, 0 = off): default interface – "0.0.0.0" lets
+# phones on the home LAN in – and the page under the bundled resources; login
+# token lifetime, live viewers served at once, write backlog (bytes) at which a
+# stalled viewer is dropped, keepalive for idle event streams, request body
+# cap, and the largest extension or grant one request may make (seconds)
+DASHBOARD_HOST: str             = "127.0.0.1"
+DASHBOARD_PAGE: tuple[str, ...] = ("web", "dashboard.html")
+DASHBOARD_SESSION_SEC:  int     = 900
+DASHBOARD_VIEWERS:      int     = 64
+DASHBOARD_BACKLOG_BYTES: int    = 64 * 1024
+DASHBOARD_KEEPALIVE_SEC: int    = 20
+DASHBOARD_BODY_MAX:     int     = 4096
+DASHBOARD_ADJUST_MAX_SEC: int   = 4 * 3600
+
+# Account profiles ("users": {"<OS account>": {...}}): per-account state lives in
+# USERS_DIR/<account>/ (usage.json plus its own state.bin and usage.log), the
+# keys an entry may set over the top-level ones, and how often the account of
+# the active console session is looked up
+USERS_DIR: str = "users"
+USER_USAGE_FILENAME: str = "usage.json"
+USER_KEYS: tuple[str, ...] = ("action", "allowed_times", "profiles", "overrides", "week_limit_minutes",
+                              "month_limit_minutes", "rollover_minutes", "rollover_days")
+SESSION_POLL_SEC: int = 5
+
+# Lean resident: steady-state budget the supervisor checks every
+# BUDGET_CHECK_SEC (resident set size in MiB, live threads); the first
+# overrun is logged with a thread dump
+LEAN_RSS_BUDGET_MB: int = 40
+LEAN_THREAD_BUDGET: int = 8
+BUDGET_CHECK_SEC:   int = 60
+
+# Profiler (config "profile", this environment variable, or SIGUSR2 / SIGBREAK):
+# stack samples per second, share of one core the sampler may use before it
+# slows down, report interval, seconds before each report that tracemalloc
+# runs (it slows allocation-heavy code many times over, so never continuously),
+# per-file size cap, distinct stacks kept, and allocation sites listed per report
+PROFILE_ENV:          str   = "YOURTIME_PROFILE"
+PROFILE_SAMPLE_HZ:    int   = 20
+PROFILE_MAX_OVERHEAD: float = 0.01
+PROFILE_REPORT_SEC:   int   = 60
+PROFILE_TRACE_SEC:    int   = 2
+PROFILE_MAX_BYTES:    int   = 256 * 1024
+PROFILE_MAX_STACKS:   int   = 4_096
+PROFILE_TOP_ALLOCS:   int   = 25
+
 # ---------------------------------------------------------------------------
 # 4. Backend – i18n / formatting
 # ---------------------------------------------------------------------------
-LANG: dict[str, dict[str, str]] = {
-    "DE": {
-        "frm_settings": "Einstellungen", "frm_password": "Passwort", "frm_adjust": "Anpassen",
-        "lbl_lang": "Sprache:", "lbl_action": "Aktion:", "lbl_takt": "Takt [s]:",
-        "lbl_autostart": "Autostart:",
-        "row_from": "Von", "row_to": "Bis", "row_timer": "Limit", "row_limit_min": "[min]",
-        "lbl_pw_new": "Neu:", "lbl_pw_rep": "Wiederholen:", "btn_pw_set": "Setzen",
-        "btn_lock": "\U0001f512 Entsperren", "btn_unlock": "\U0001f513 Sperren",
-        "btn_reset": "\u23f1 Reset", "btn_quit": "\U0001f6aa Beenden",
-        "btn_autostart_on": "AN", "btn_autostart_off": "AUS",
-        "sb_allowed": "\U0001f513 Login entsperrt", "sb_denied": "\U0001f512 Login gesperrt",
-        "msg_reset": "\U0001f504 Limit zurückgesetzt.",
-        "msg_extended": "\u23f1 +{s}s hinzugefügt.", "msg_reduced": "\u23f1 -{s}s abgezogen.",
-        "msg_pw_set": "\u2705 Passwort gesetzt.", "msg_pw_removed": "\U0001f513 Kein Passwortschutz.",
-        "msg_pw_mismatch": "\u274c Nicht gleich.", "msg_pw_wrong": "\u274c Falsches Passwort.",
-        "msg_unlocked": "\U0001f513 Entsperrt.", "msg_no_pw": "\U0001f513 Kein Passwort.",
-        "msg_cfg_err": "Config-Fehler: {e}", "msg_err": "\u274c {e}",
-        "msg_timeout": "\u23f0 Tageslimit! Aktion...", "msg_blocked": "\u26d4 Sperrzeit! Aktion...",
-        "msg_warn_min": "\u26a0\ufe0f Noch {m} min!", "tray_open": "\u2699 Öffnen",
-        "msg_time_invalid": "\u274c Ungültige Uhrzeit (HH:MM).",
-        "msg_autostart_on":  "\u2705 Autostart aktiviert.",
-        "msg_autostart_off": "\u274c Autostart deaktiviert.",
-        "msg_autostart_err": "\u274c Autostart-Fehler: {e}",
-        "days_short": "Mo|Di|Mi|Do|Fr|Sa|So",
-        "days_full":  "Montag|Dienstag|Mittwoch|Donnerstag|Freitag|Samstag|Sonntag",
-        "date_fmt": "{day}, {dt}",
-        "unit_d": "T", "unit_h": "h", "unit_m": "m", "unit_s": "s",
-        "action_lock": "Sperren", "action_logoff": "Abmelden",
-    },
-    "EN": {
-        "frm_settings": "Settings", "frm_password": "Password", "frm_adjust": "Adjust",
-        "lbl_lang": "Language:", "lbl_action": "Action:", "lbl_takt": "Cycle [s]:",
-        "lbl_autostart": "Autostart:",
-        "row_from": "From", "row_to": "To", "row_timer": "Limit", "row_limit_min": "[min]",
-        "lbl_pw_new": "New:", "lbl_pw_rep": "Repeat:", "btn_pw_set": "Set",
-        "btn_lock": "\U0001f512 Unlock", "btn_unlock": "\U0001f513 Lock",
-        "btn_reset": "\u23f1 Reset", "btn_quit": "\U0001f6aa Quit",
-        "btn_autostart_on": "ON", "btn_autostart_off": "OFF",
-        "sb_allowed": "\U0001f513 Login allowed", "sb_denied": "\U0001f512 Login blocked",
-        "msg_reset": "\U0001f504 Limit reset.",
-        "msg_extended": "\u23f1 +{s}s added.", "msg_reduced": "\u23f1 -{s}s reduced.",
-        "msg_pw_set": "\u2705 Password set.", "msg_pw_removed": "\U0001f513 No password.",
-        "msg_pw_mismatch": "\u274c Not equal.", "msg_pw_wrong": "\u274c Wrong password.",
-        "msg_unlocked": "\U0001f513 Unlocked.", "msg_no_pw": "\U0001f513 No password.",
-        "msg_cfg_err": "Config error: {e}", "msg_err": "\u274c {e}",
-        "msg_timeout": "\u23f0 Time limit!", "msg_blocked": "\u26d4 Blocked!",
-        "msg_warn_min": "\u26a0\ufe0f {m} min left!", "tray_open": "\u2699 Open",
-        "msg_time_invalid": "\u274c Invalid time format (HH:MM).",
-        "msg_autostart_on":  "\u2705 Autostart enabled.",
-        "msg_autostart_off": "\u274c Autostart disabled.",
-        "msg_autostart_err": "\u274c Autostart error: {e}",
-        "days_short": "Mo|Tu|We|Th|Fr|Sa|Su",
-        "days_full":  "Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday",
-        "date_fmt": "{day}, {dt}",
-        "unit_d": "d", "unit_h": "h", "unit_m": "m", "unit_s": "s",
-        "action_lock": "Lock", "action_logoff": "Log off",
-    },
-    "RU": {
-        "frm_settings": "Настройки", "frm_password": "Пароль", "frm_adjust": "Подстройка",
-        "lbl_lang": "Язык:", "lbl_action": "Действие:", "lbl_takt": "Такт [с]:",
-        "lbl_autostart": "Автозапуск:",
-        "row_from": "С", "row_to": "По", "row_timer": "Лимит", "row_limit_min": "[мин]",
-        "lbl_pw_new": "Новый:", "lbl_pw_rep": "Повторить:", "btn_pw_set": "Задать",
-        "btn_lock": "\U0001f512 Открыть", "btn_unlock": "\U0001f513 Закрыть",
-        "btn_reset": "\u23f1 Сброс", "btn_quit": "\U0001f6aa Выход",
-        "btn_autostart_on": "ВКЛ", "btn_autostart_off": "ВЫКЛ",
-        "sb_allowed": "\U0001f513 Вход разрешён", "sb_denied": "\U0001f512 Вход запрещён",
-        "msg_reset": "\U0001f504 Сброс лимита.",
-        "msg_extended": "\u23f1 +{s}с добавлено.", "msg_reduced": "\u23f1 -{s}с убрано.",
-        "msg_pw_set": "\u2705 Пароль задан.", "msg_pw_removed": "\U0001f513 Без пароля.",
-        "msg_pw_mismatch": "\u274c Не совпадают.", "msg_pw_wrong": "\u274c Неверный пароль.",
-        "msg_unlocked": "\U0001f513 Открыто.", "msg_no_pw": "\U0001f513 Без пароля.",
-        "msg_cfg_err": "Ошибка конфига: {e}", "msg_err": "\u274c {e}",
-        "msg_timeout": "\u23f0 Лимит!", "msg_blocked": "\u26d4 Запрет!",
-        "msg_warn_min": "\u26a0\ufe0f Осталось {m} мин!", "tray_open": "\u2699 Открыть",
-        "msg_time_invalid": "\u274c Неверный формат времени (ЧЧ:ММ).",
-        "msg_autostart_on":  "\u2705 Автозапуск включён.",
-        "msg_autostart_off": "\u274c Автозапуск отключён.",
-        "msg_autostart_err": "\u274c Ошибка автозапуска: {e}",
-        "days_short": "Пн|Вт|Ср|Чт|Пт|Сб|Вс",
-        "days_full":  "Понедельник|Вторник|Среда|Четверг|Пятница|Суббота|Воскресенье",
-        "date_fmt": "{day}, {dt}",
-        "unit_d": "д", "unit_h": "ч", "unit_m": "м", "unit_s": "с",
-        "action_lock": "Блок", "action_logoff": "Выход",
-    },
-}
+# Catalogs live in i18n/<lang>.json (lower-case code), loaded on first use.
+# Values are templates; a {"count": field, "one"/"few"/"many"/"other": ...}
+# object selects a plural form by the named argument.
+I18N_DIR: tuple[str, ...] = ("i18n",)
 
 # ---------------------------------------------------------------------------
 # 5. Frontend – GUI geometry (top→bottom, left→right within each panel)
@@ -232,6 +294,12 @@ C_BLACK:  str = "#000000"
 C_DIS_BG: str = "#b5b5b5"   # disabled background
 C_DIS_FG: str = "#707070"   # disabled foreground
 
+# Live tray icon: background per state (no limit / counting down / warn zone),
+# font files tried in order, and glyph sizes for labels of up to 2 and of 3 characters
+TRAY_COLORS:  dict[str, str]  = {"free": "#27ae60", "ok": "#0078d7", "warn": "#e74c3c"}
+TRAY_FONTS:   tuple[str, ...] = ("arialbd.ttf", "DejaVuSans-Bold.ttf")
+TRAY_FONT_PX: tuple[int, int] = (44, 30)
+
 # GUI tick interval
 TICK_MS: int = 1_000
 
@@ -240,9 +308,15 @@ STATUS_DURATION_MS:  int = 4_000
 # Enforcement trigger message stays longer
 TRIGGER_DURATION_MS: int = 8_000
 
+# Autosave: edits within this window are coalesced into one config write
+AUTOSAVE_DEBOUNCE_MS: int = 600
+
 # Warn-zone: foreground-enforcement poll interval
 WARN_FRONT_INTERVAL_MS: int = 1_000
 
+# Lean resident: tray menu status line refresh interval (seconds)
+TRAY_REFRESH_SEC: int = 5
+
 # After iconify() wait before withdraw() to avoid taskbar flash
 STARTUP_HIDE_DELAY_MS: int = 100
 
@@ -253,5 +327,4 @@ TOPMOST_RELEASE_MS: int = 200
 # 7. Frontend – asset paths (relative to base dir)
 # ---------------------------------------------------------------------------
 ICON_ICO_PATH: tuple[str, ...] = ("img", "icon.ico")
-TRAY_ICO_PATH: tuple[str, ...] = ("img", "icon.ico")
 TRAY_ICON_SIZE: tuple[int, int] = (64, 64)
@@ -2,26 +2,32 @@
 
 Reuse guide for other projects
 -------------------------------
+set_opts    – widget.config() that skips options whose value is unchanged.
 LBtn        – drop-in label-button widget, no YourTime-specific logic.
 StatusMixin – timed status-bar messages with priority queuing;
               mix into any tk.Tk subclass.
+SchedulerMixin – one after() loop for all periodic UI work, idle while hidden.
 LockMixin   – generic lock/unlock infrastructure for ttk + LBtn widget groups.
-App         – assembles the above into the full YourTime window.
+App         – assembles the above into the full YourTime window; with
+              ctrl_cls=RemoteController a client of the enforcement process
+              (--service), with child=True the on-demand settings window.
 
 Frontend/Backend contract
 --------------------------
 - Import only: AppController, base, do_action, autostart_*, validate_time
 - No direct Watchdog access; no backend module-level state touched.
-- Callbacks on_trigger / on_warn are the only inbound channel from backend.
+- Backend events are the only inbound channel: the on_trigger / on_warn / on_stall
+  callbacks and ctrl.subscribe() (the tray icon's Tick events).
+- As a client of another process the same calls go through RemoteController.
 """
-import ctypes, threading
+import ctypes, threading, time
 import tkinter as tk
 from tkinter import ttk
 
 from definitions import (
     # domain
-    LANGS, ACTION_KEYS, ACTION_NEXT, DAYS_EN, DAY_CYCLE, DAY_COLORS,
-    LANG, DEFAULT_LANG, DEFAULT_ACTION, UNLIMITED,
+    LANGS, ACTION_NEXT, DAYS_EN, DAY_CYCLE, DAY_COLORS,
+    DEFAULT_LANG, DEFAULT_ACTION, UNLIMITED,
     DEFAULT_DAY_LIMIT_MIN, DAY_LIMIT_MIN_LO, DAY_LIMIT_MIN_HI,
     DEFAULT_TAKT_SEC, TAKT_SEC_LO, TAKT_SEC_HI,
     # GUI geometry – settings frame
@@ -38,10 +44,10 @@ from definitions import (
     # colours
     C_BLUE, C_GREEN, C_RED, C_GRAY_N, C_WHITE, C_BLACK, C_DIS_BG, C_DIS_FG,
     # timings
-    TICK_MS, STATUS_DURATION_MS, TRIGGER_DURATION_MS,
+    TICK_MS, STATUS_DURATION_MS, TRIGGER_DURATION_MS, AUTOSAVE_DEBOUNCE_MS,
     WARN_FRONT_INTERVAL_MS, STARTUP_HIDE_DELAY_MS, TOPMOST_RELEASE_MS,
     # assets
-    ICON_ICO_PATH, TRAY_ICO_PATH, TRAY_ICON_SIZE,
+    ICON_ICO_PATH,
     # misc
     MSG_PRIO, WIN_TITLE, DAY_DEFAULT_START, DAY_DEFAULT_END,
 )
@@ -52,12 +58,32 @@ from backend import (
 
 try:
     import pystray
-    from PIL import Image, ImageDraw
+    from tray import LiveIcon
     HAS_TRAY = True
 except ImportError:
     HAS_TRAY = False
 
 
+# ===========================================================================
+# set_opts – change-only widget configuration
+# ===========================================================================
+
+_TCL: dict = {"calls": 0, "skipped": 0}   # widget config() calls issued / avoided
+
+def set_opts(w, **kw) -> bool:
+    """w.config(**kw) limited to options whose value differs from the last set_opts.
+
+    The cache lives on the widget; route every config of such a widget through here.
+    """
+    cache = w.__dict__.setdefault("_opts", {})
+    diff  = {k: v for k, v in kw.items() if k not in cache or cache[k] != v}
+    _TCL["skipped"] += len(kw) - len(diff)
+    if not diff: return False
+    w.config(**diff); cache.update(diff)
+    _TCL["calls"] += 1
+    return True
+
+
 # ===========================================================================
 # LBtn – reusable label-button widget (no YourTime-specific dependencies)
 # ===========================================================================
@@ -90,21 +116,22 @@ class LBtn:
 
     def _press(self) -> None:
         if self._enabled:
-            self._pressed = True; self.w.config(relief="sunken")
+            self._pressed = True; set_opts(self.w, relief="sunken")
 
     def _release(self) -> None:
         if self._enabled and self._pressed:
-            self._pressed = False; self.w.config(relief="raised")
+            self._pressed = False; set_opts(self.w, relief="raised")
             if self._cmd: self._cmd()
 
     def _cancel(self) -> None:
         self._pressed = False
-        if self._enabled: self.w.config(relief="raised")
+        if self._enabled: set_opts(self.w, relief="raised")
 
     def enable(self, on: bool) -> None:
         self._enabled = on
         if not on: self._pressed = False
-        self.w.config(
+        set_opts(
+            self.w,
             bg=self.active_bg if on else C_DIS_BG,
             fg=self.active_fg if on else C_DIS_FG,
             cursor="hand2" if on else "arrow",
@@ -114,7 +141,8 @@ class LBtn:
     def set_clickable(self, on: bool) -> None:
         """Toggle interactivity while preserving background colour."""
         self._enabled = on
-        self.w.config(
+        set_opts(
+            self.w,
             fg=self.active_fg if on else C_DIS_FG,
             cursor="hand2" if on else "arrow",
             relief="raised" if on else "flat",
@@ -123,7 +151,7 @@ class LBtn:
     def config(self, **kw) -> None:
         if "active_bg" in kw: self.active_bg = kw.pop("active_bg")
         if "active_fg" in kw: self.active_fg = kw.pop("active_fg")
-        self.w.config(**kw)
+        set_opts(self.w, **kw)
 
     def pack(self, **kw) -> None:
         kw.setdefault("ipady", BTN_PAD); self.w.pack(**kw)
@@ -142,7 +170,11 @@ class StatusMixin:
     Requires subclass to provide:
       self.sb_login            – tk.Label used as message target
       self._t(key, **kw)       – translation helper
+      self.ctrl.has_text(key)  – whether key is a catalog entry (else shown verbatim)
       self.ctrl.is_login_allowed() – for the idle indicator
+      self.ctrl.get_lock_time()    – "allowed until" projection (None = never)
+      self.ctrl.active_override()  – label of today's dated override ("" if none)
+      self.ctrl.get_binding()      – "week"/"month" when that budget ends the day first
     """
 
     def _init_status(self) -> None:
@@ -151,13 +183,13 @@ class StatusMixin:
     def status_msg(self, key: str, color: str,
                    duration_ms: int = STATUS_DURATION_MS, **kw) -> None:
         """Display a timed status message; lower MSG_PRIO number = higher priority."""
-        txt      = self._t(key, **kw) if key in LANG[DEFAULT_LANG] else key
+        txt      = self._t(key, **kw) if self.ctrl.has_text(key) else key
         new_prio = MSG_PRIO.get(color, 99)
         if self._msg_state:
             if new_prio > MSG_PRIO.get(self._msg_state[1], 99): return
             try: self.after_cancel(self._msg_state[2])
             except Exception: pass
-        self.sb_login.config(text=txt, foreground=color)
+        set_opts(self.sb_login, text=txt, foreground=color)
         self._msg_state = (key, color, self.after(duration_ms, self._clear_msg), kw)
 
     def _clear_msg(self) -> None:
@@ -167,12 +199,110 @@ class StatusMixin:
     def _update_sb_login(self) -> None:
         if self._msg_state: return
         allowed = self.ctrl.is_login_allowed()
-        self.sb_login.config(
-            text=self._t("sb_allowed" if allowed else "sb_denied"),
+        at      = self.ctrl.get_lock_time() if allowed else None
+        txt     = (self._t("sb_allowed_until", dt=self.ctrl.format_lock_time(at, self._lang))
+                   if at is not None else self._t("sb_allowed" if allowed else "sb_denied"))
+        label   = self.ctrl.active_override()
+        if label: txt += " \u00b7 \U0001f4cc " + label
+        binding = self.ctrl.get_binding() if allowed else ""
+        if binding: txt += " \u00b7 " + self._t("sb_limit_" + binding)
+        set_opts(
+            self.sb_login,
+            text=txt,
             foreground="green" if allowed else "red",
         )
 
 
+# ===========================================================================
+# SchedulerMixin – single after() loop, suspended while the window is hidden
+# ===========================================================================
+
+class SchedulerMixin:
+    """Mix into tk.Tk.  Owns every periodic UI job in one after() chain.
+
+    every(name, ms, fn)          – (re)register a job; run_hidden=True keeps it
+                                   running while the window is withdrawn/iconic.
+    cancel_job(name)             – drop a job.
+    set_visible(on)              – called from <Map>/<Unmap>; with no runnable
+                                   job the loop is not armed at all.
+    sched_stats()                – wakeups and widget config calls per minute,
+                                   separately for the visible and hidden state.
+    """
+
+    def _init_sched(self) -> None:
+        self._jobs: dict    = {}     # name -> [interval_s, fn, run_hidden, due]
+        self._sched_after   = None
+        self._visible       = False
+        self._state_t0      = time.monotonic()
+        self._state_base    = (0, 0, 0)          # wakeups, tcl calls, skipped at t0
+        self._wakeups       = 0
+        self._stats: dict   = {True: [0.0, 0, 0, 0], False: [0.0, 0, 0, 0]}
+        self.bind("<Map>",   lambda e: e.widget is self and self.set_visible(True))
+        self.bind("<Unmap>", lambda e: e.widget is self and self.set_visible(False))
+
+    def every(self, name: str, interval_ms: int, fn, run_hidden: bool = False,
+              now: bool = False) -> None:
+        due = time.monotonic() + (0 if now else interval_ms / 1000)
+        self._jobs[name] = [interval_ms / 1000, fn, run_hidden, due]
+        self._arm()
+
+    def cancel_job(self, name: str) -> None:
+        if self._jobs.pop(name, None) is not None: self._arm()
+
+    def has_job(self, name: str) -> bool:
+        return name in self._jobs
+
+    def set_visible(self, on: bool) -> None:
+        if on == self._visible: return
+        self._close_stats()
+        self._visible = on
+        if on:
+            t = time.monotonic()
+            for j in self._jobs.values(): j[3] = min(j[3], t)   # catch up at once
+        self._arm()
+
+    def sched_stats(self) -> dict:
+        """{"visible"|"hidden": {"wakeups_min", "tcl_min", "skipped_min", "seconds"}}."""
+        self._close_stats()
+        out = {}
+        for vis, (sec, wk, calls, skipped) in self._stats.items():
+            per = 60.0 / sec if sec else 0.0
+            out["visible" if vis else "hidden"] = {
+                "seconds": round(sec, 1), "wakeups_min": round(wk * per, 2),
+                "tcl_min": round(calls * per, 2), "skipped_min": round(skipped * per, 2)}
+        return out
+
+    def _close_stats(self) -> None:
+        t, (w0, c0, s0) = time.monotonic(), self._state_base
+        st = self._stats[self._visible]
+        st[0] += t - self._state_t0
+        st[1] += self._wakeups - w0
+        st[2] += _TCL["calls"] - c0
+        st[3] += _TCL["skipped"] - s0
+        self._state_t0   = t
+        self._state_base = (self._wakeups, _TCL["calls"], _TCL["skipped"])
+
+    def _arm(self) -> None:
+        if self._sched_after is not None:
+            self.after_cancel(self._sched_after); self._sched_after = None
+        due = [j[3] for j in self._jobs.values() if self._visible or j[2]]
+        if not due: return
+        delay = max(0, int((min(due) - time.monotonic()) * 1000))
+        self._sched_after = self.after(delay, self._run_jobs)
+        _TCL["calls"] += 1
+
+    def _run_jobs(self) -> None:
+        self._sched_after = None
+        self._wakeups += 1
+        t = time.monotonic()
+        for name, j in list(self._jobs.items()):
+            if (self._visible or j[2]) and j[3] <= t + 0.005:
+                j[3] = j[3] + j[0] if j[3] + j[0] > t else t + j[0]   # overdue: once, not a burst
+                try: j[1]()
+                except Exception: pass
+        self._arm()
+
+
 # ===========================================================================
 # LockMixin – generic lock/unlock for grouped ttk + LBtn widgets
 # ===========================================================================
@@ -213,14 +343,15 @@ class LockMixin:
 # App – YourTime main window
 # ===========================================================================
 
-class App(tk.Tk, StatusMixin, LockMixin):
+class App(tk.Tk, StatusMixin, SchedulerMixin, LockMixin):
     """YourTime settings window: day-grid, right panel, password row, status bar."""
 
     # --- init ---------------------------------------------------------------
 
-    def __init__(self) -> None:
+    def __init__(self, ctrl_cls=AppController, child: bool = False) -> None:
         super().__init__()
         self._init_status()
+        self._init_sched()
         self._init_lock()
 
         self._lang    = DEFAULT_LANG
@@ -230,8 +361,9 @@ class App(tk.Tk, StatusMixin, LockMixin):
         self._wlabels: dict = {}    # i18n key -> widget for relabelling
 
         self._pw_mode            = False
+        self._pw_busy            = False   # password check running in a worker
         self._warn_shown         = False
-        self._keep_front_running = False
+        self._topmost            = False
 
         # Last-known-good cache for free-form input fields
         self._last_good_start: dict = {}
@@ -240,8 +372,14 @@ class App(tk.Tk, StatusMixin, LockMixin):
         self._last_good_takt:  int  = DEFAULT_TAKT_SEC
 
         self._clamping = False   # re-entry guard for spinbox trace callbacks
+        self._autosave_id = None # pending debounced flush (after id)
+        self._saved: tuple = ({}, {})   # (settings, days) last sent to the backend
 
-        self.ctrl = AppController(on_trigger=self._cb_trigger, on_warn=self._cb_warn)
+        self._child  = child                        # settings window only, ends when closed
+        self._remote = ctrl_cls is not AppController   # enforcement runs in another process
+        self.ctrl = ctrl_cls(on_trigger=self._cb_trigger, on_warn=self._cb_warn,
+                             on_stall=self._cb_stall)
+        if self._remote: self.ctrl.on_quit = lambda: self.after(0, self._gone)
 
         self.title(WIN_TITLE)
         self.resizable(False, False)
@@ -255,22 +393,37 @@ class App(tk.Tk, StatusMixin, LockMixin):
         self._build()
         self._load()
         self._apply_lock(True)
-        self._tick()
-        self._tray_setup()
+        self.every("tick", TICK_MS, self._tick, now=True)
         self.ctrl.start()
+        if self._child:
+            self._show(); return
+        self._tray_setup()
         self.iconify()
         self.after(STARTUP_HIDE_DELAY_MS, self.withdraw)
 
     # --- backend callbacks --------------------------------------------------
 
     def _cb_trigger(self, key: str, action: str) -> None:
-        """Watchdog: enforcement event – show message, execute system action."""
+        """Watchdog: enforcement event – show message, execute system action (a service
+        executes it itself)."""
         self.after(0, lambda: self.status_msg(key, "red", duration_ms=TRIGGER_DURATION_MS))
-        do_action(action)
+        if not self._remote: do_action(action)
 
     def _cb_warn(self, minutes: int) -> None:
-        """Watchdog: entering warning zone."""
-        self.after(0, lambda: self.status_msg("msg_warn_min", "orange", m=minutes))
+        """Watchdog: entering warning zone – also the wake-up while the GUI is idle."""
+        self.after(0, lambda: self._on_warn(minutes))
+
+    def _cb_stall(self, reason: str) -> None:
+        """Supervisor: the Watchdog hung and was restarted (details in error.log)."""
+        self.after(0, lambda: self.status_msg("msg_stall", "red", duration_ms=TRIGGER_DURATION_MS))
+
+    def _on_warn(self, minutes: int) -> None:
+        self.status_msg("msg_warn_min", "orange", m=minutes)
+        if self.ctrl.is_in_warn_zone() and not self._warn_shown:
+            self._warn_shown = True
+            self._force_front()
+            if not self.has_job("keep_front"):
+                self.every("keep_front", WARN_FRONT_INTERVAL_MS, self._keep_front, run_hidden=True)
 
     # --- i18n ---------------------------------------------------------------
 
@@ -284,7 +437,7 @@ class App(tk.Tk, StatusMixin, LockMixin):
     def _relabel(self) -> None:
         """Refresh all registered widget texts after a language change."""
         for key, w in self._wlabels.items():
-            if key in LANG[DEFAULT_LANG]:
+            if self.ctrl.has_text(key):
                 try: w.config(text=self._t(key))
                 except Exception: pass
         self.btn_lang.config(text=self._lang)
@@ -294,15 +447,19 @@ class App(tk.Tk, StatusMixin, LockMixin):
             self._day_btns[en].config(text=short)
         self._update_btn_states()
         self._refresh_autostart_btn()
-        self.sb_dt.config(text=self.ctrl.format_date(self._lang))
+        set_opts(self.sb_dt, text=self.ctrl.format_date(self._lang))
         self._update_sb_login()
 
     # --- window helpers -----------------------------------------------------
 
     def _show(self) -> None:
         self.deiconify(); self.lift(); self.focus_force()
-        self.attributes("-topmost", True)
-        self.after(TOPMOST_RELEASE_MS, lambda: self.attributes("-topmost", False))
+        self._set_topmost(True)
+        self.after(TOPMOST_RELEASE_MS, lambda: self._set_topmost(False))
+
+    def _set_topmost(self, on: bool) -> None:
+        if on != self._topmost:
+            self.attributes("-topmost", on); self._topmost = on
 
     # --- lock / unlock ------------------------------------------------------
 
@@ -326,7 +483,7 @@ class App(tk.Tk, StatusMixin, LockMixin):
         Unlocked  -> both always active.
         Locked    -> reduce always active; extend only in warning zone.
         """
-        takt = self.ctrl.get_cfg().get("takt_seconds", DEFAULT_TAKT_SEC)
+        takt = self.ctrl.get_cfg().takt_seconds
         us   = self._t("unit_s")
         rem  = self.ctrl.get_remaining()
         lr   = f"-{takt}{us}"; le = f"+{takt}{us}"
@@ -344,9 +501,19 @@ class App(tk.Tk, StatusMixin, LockMixin):
     # --- autosave -----------------------------------------------------------
 
     def _autosave(self, *_) -> None:
-        """Triggered by any GUI variable trace; re-entry guarded via _clamping."""
+        """Triggered by any GUI variable trace; coalesced into one flush per debounce window."""
         if self._clamping or not self.unlocked:
             return
+        if self._autosave_id is not None:
+            self.after_cancel(self._autosave_id)
+        self._autosave_id = self.after(AUTOSAVE_DEBOUNCE_MS, self._flush_autosave)
+
+    def _flush_autosave(self) -> None:
+        """Validate, diff against the last saved state and send only what changed."""
+        if self._autosave_id is not None:
+            self.after_cancel(self._autosave_id); self._autosave_id = None
+        if not self.unlocked:
+            return
 
         for d in DAYS_EN:
             s = self.day_start[d].get().strip()
@@ -378,23 +545,38 @@ class App(tk.Tk, StatusMixin, LockMixin):
                 finally: self._clamping = False
         except (ValueError, tk.TclError): pass
 
+        settings, days = self._snapshot()
+        top   = {k: v for k, v in settings.items() if self._saved[0].get(k) != v}
+        patch = {}
+        for d, fields in days.items():
+            diff = {k: v for k, v in fields.items() if self._saved[1].get(d, {}).get(k) != v}
+            if diff: patch[d] = diff
+        if not top and not patch:
+            return
         try:
-            self.ctrl.save(
-                lang=self._lang,  action=self._action,
-                takt_sec=self._last_good_takt,
-                day_states=dict(self.day_state),
-                day_starts=dict(self._last_good_start),
-                day_ends=dict(self._last_good_end),
-                day_timers={d: self.day_timer[d].get() for d in DAYS_EN},
-                day_limits=dict(self._last_good_limit),
-            )
+            self.ctrl.apply_changes(top, patch)
+            self._saved = (settings, days)
         except Exception: pass
 
+    def _snapshot(self) -> tuple:
+        """(settings, days) as persisted – same normalisation as AppController.save."""
+        days = {}
+        for d in DAYS_EN:
+            st = self.day_state[d]
+            days[d] = {"start":         self._last_good_start[d] if st == "range" else "00:00",
+                       "end":           self._last_good_end[d]   if st == "range" else "00:00",
+                       "enabled":       st != "off",
+                       "use_timer":     self.day_timer[d].get(),
+                       "limit_minutes": self._last_good_limit[d]}
+        return {"takt_seconds": self._last_good_takt, "action": self._action}, days
+
     # --- inline password ----------------------------------------------------
 
     def _on_lock_btn(self) -> None:
         if self.unlocked:
+            self._flush_autosave()
             self.unlocked = False; self._apply_lock(True)
+            if self._remote: self.ctrl.lock()
         else:
             self._enter_pw_mode()
 
@@ -416,7 +598,18 @@ class App(tk.Tk, StatusMixin, LockMixin):
                              padx=(PAD_ROW, PAD_ROW), ipady=BTN_PAD)
 
     def _check_pw(self, _=None) -> None:
-        ok = self.ctrl.check_password(self.v_pw_inline.get())
+        """Hashing runs in a worker; the verdict comes back through after()."""
+        if self._pw_busy: return
+        self._pw_busy = True
+        self.btn_pw_ok.config(state="disabled")
+        self.ctrl.check_password_async(
+            self.v_pw_inline.get(),
+            lambda ok, wait: self.after(0, lambda: self._pw_checked(ok, wait)))
+
+    def _pw_checked(self, ok: bool, wait: float) -> None:
+        self._pw_busy = False
+        self.btn_pw_ok.config(state="normal")
+        if not self._pw_mode: return                  # dialog closed meanwhile
         if ok:
             self.unlocked = True
             self._apply_lock(False)
@@ -426,7 +619,8 @@ class App(tk.Tk, StatusMixin, LockMixin):
             self.status_msg(key, color)
         else:
             self.v_pw_inline.set("")
-            self.status_msg("msg_pw_wrong", "red")
+            if wait > 0: self.status_msg("msg_pw_wait", "red", s=int(wait + 0.999))
+            else:        self.status_msg("msg_pw_wrong", "red")
             self.pw_entry.focus_set()
 
     # --- autostart ----------------------------------------------------------
@@ -435,8 +629,8 @@ class App(tk.Tk, StatusMixin, LockMixin):
         on  = autostart_enabled()
         col = C_GREEN if on else C_RED
         self.btn_autostart.active_bg = col
-        self.btn_autostart.config(text=self._t("btn_autostart_on" if on else "btn_autostart_off"))
-        self.btn_autostart.w.config(bg=col)
+        self.btn_autostart.config(text=self._t("btn_autostart_on" if on else "btn_autostart_off"),
+                                  bg=col)
 
     def _toggle_autostart(self) -> None:
         if not self.unlocked: return
@@ -472,7 +666,7 @@ class App(tk.Tk, StatusMixin, LockMixin):
         st  = self.day_state[day]
         col = DAY_COLORS[st]
         b   = self._day_btns[day]
-        b.active_bg = col; b.w.config(bg=col)
+        b.active_bg = col; b.config(bg=col)
         show_range = (st == "range") and self.unlocked
         show_limit = (st != "off")   and self.unlocked
         for w in self._day_entries[day]:
@@ -482,20 +676,23 @@ class App(tk.Tk, StatusMixin, LockMixin):
     # --- timer adjust -------------------------------------------------------
 
     def _on_extend(self) -> None:
-        t = self.ctrl.get_cfg().get("takt_seconds", DEFAULT_TAKT_SEC)
+        t = self.ctrl.get_cfg().takt_seconds
         self.ctrl.extend(t); self.status_msg("msg_extended", "blue", s=t)
 
     def _on_reduce(self) -> None:
-        t = self.ctrl.get_cfg().get("takt_seconds", DEFAULT_TAKT_SEC)
+        t = self.ctrl.get_cfg().takt_seconds
         self.ctrl.reduce(t); self.status_msg("msg_reduced", "blue", s=t)
 
     def _save_pw(self) -> None:
         p1, p2 = self.v_pw1.get(), self.v_pw2.get()
         if p1 != p2:
             self.status_msg("msg_pw_mismatch", "red"); return
-        self.ctrl.set_password(p1)
         self.v_pw1.set(""); self.v_pw2.set("")
-        self.status_msg("msg_pw_set" if p1 else "msg_pw_removed", "blue")
+        self.ctrl.set_password_async(p1, lambda err: self.after(0, lambda: self._pw_saved(p1, err)))
+
+    def _pw_saved(self, pw: str, err) -> None:
+        if err is not None: self.status_msg("msg_cfg_err", "red", e=err)
+        else:               self.status_msg("msg_pw_set" if pw else "msg_pw_removed", "blue")
 
     # --- public actions -----------------------------------------------------
 
@@ -505,10 +702,24 @@ class App(tk.Tk, StatusMixin, LockMixin):
 
     def hide(self) -> None:
         if self._pw_mode:  self._exit_pw_mode()
-        if self.unlocked:  self.unlocked = False; self._apply_lock(True)
+        if self.unlocked:
+            self._flush_autosave(); self.unlocked = False; self._apply_lock(True)
+            if self._remote: self.ctrl.lock()
         self.withdraw()
+        if self._child and not self.has_job("keep_front"): self._close_child()
+
+    def _close_child(self) -> None:
+        """Settings child: closing the window ends the process, the resident carries on."""
+        self.ctrl.close()
+        self.destroy()
+
+    def _gone(self) -> None:
+        """The enforcement process stopped (Quit elsewhere, or the tray resident exited)."""
+        if hasattr(self, "tray"): self.tray.stop()
+        self.destroy()
 
     def exit_app(self) -> None:
+        self._flush_autosave()
         if hasattr(self, "tray"): self.tray.stop()
         self.ctrl.stop()
         self.destroy()
@@ -517,14 +728,15 @@ class App(tk.Tk, StatusMixin, LockMixin):
 
     def _tray_setup(self) -> None:
         if not HAS_TRAY: return
-        ico = base().joinpath(*TRAY_ICO_PATH)
-        img = Image.open(ico).resize(TRAY_ICON_SIZE) if ico.exists() else self._mk_icon()
+        live = LiveIcon(self.ctrl)
         self.tray = pystray.Icon(
-            WIN_TITLE, img, WIN_TITLE,
+            WIN_TITLE, live.render(self.ctrl.get_remaining()), WIN_TITLE,
             pystray.Menu(pystray.MenuItem(
                 self._t("tray_open"), lambda *_: self.after(0, self._show), default=True,
             )),
         )
+        live.attach(self.tray)
+        self.live = live
         threading.Thread(target=self.tray.run, daemon=True).start()
 
     def _tray_update(self) -> None:
@@ -533,20 +745,11 @@ class App(tk.Tk, StatusMixin, LockMixin):
             self._t("tray_open"), lambda *_: self.after(0, self._show), default=True,
         ))
 
-    def _mk_icon(self) -> "Image.Image":
-        img = Image.new("RGB", TRAY_ICON_SIZE, (0, 120, 215))
-        d   = ImageDraw.Draw(img)
-        d.ellipse([6, 6, 58, 58],   fill="white")
-        d.ellipse([14, 14, 50, 50], fill=(0, 120, 215))
-        d.rectangle([30, 18, 34, 34], fill="white")
-        d.rectangle([30, 30, 44, 34], fill="white")
-        return img
-
     # --- foreground enforcement ---------------------------------------------
 
     def _force_front(self) -> None:
         """Force window to foreground, bypassing Windows focus lock via AttachThreadInput."""
-        self.deiconify(); self.attributes("-topmost", True); self.lift(); self.focus_force()
+        self.deiconify(); self._set_topmost(True); self.lift(); self.focus_force()
         try:
             hwnd  = ctypes.windll.user32.GetParent(self.winfo_id()) or self.winfo_id()
             fg    = ctypes.windll.user32.GetForegroundWindow()
@@ -561,70 +764,64 @@ class App(tk.Tk, StatusMixin, LockMixin):
         except Exception: pass
 
     def _keep_front(self) -> None:
-        warn = self.ctrl.is_in_warn_zone()
-        if warn:
-            self._keep_front_running = True
-            if self.state() in ("withdrawn", "iconic"):
+        """Scheduler job (runs while hidden too) for as long as the warn zone lasts."""
+        if self.ctrl.is_in_warn_zone():
+            if not self._visible:
                 self._force_front()
             else:
-                self.lift(); self.attributes("-topmost", True)
-            self.after(WARN_FRONT_INTERVAL_MS, self._keep_front)
+                self.lift(); self._set_topmost(True)
         else:
-            self._keep_front_running = False
-            self.attributes("-topmost", False)
+            self.cancel_job("keep_front")
+            self._set_topmost(False)
+            if self._child and not self._visible: self._close_child()
 
     # --- main tick ----------------------------------------------------------
 
     def _tick(self) -> None:
-        try:
-            rem  = self.ctrl.get_remaining()
-            warn = self.ctrl.is_in_warn_zone()
-            self.sb_dt.config(text=self.ctrl.format_date(self._lang))
-            self._update_sb_login()
-            self.sb_rem.config(
-                text=self.ctrl.format_remaining(rem, self._lang),
-                foreground="red" if warn else "blue",
-            )
-            self.btn_lock.config(text=self._t("btn_unlock" if self.unlocked else "btn_lock"))
-            self._update_btn_states()
-            if warn and not self._warn_shown:
-                self._warn_shown = True
-                self._force_front()
-                if not self._keep_front_running:
-                    self._keep_front()
-            if not warn:
-                self._warn_shown = False
-                self.attributes("-topmost", False)
-        except Exception: pass
-        self.after(TICK_MS, self._tick)
+        """Scheduler job, visible state only; widgets are touched only on change."""
+        rem  = self.ctrl.get_remaining()
+        warn = self.ctrl.is_in_warn_zone()
+        set_opts(self.sb_dt, text=self.ctrl.format_date(self._lang))
+        self._update_sb_login()
+        set_opts(
+            self.sb_rem,
+            text=self.ctrl.format_remaining(rem, self._lang),
+            foreground="red" if warn else "blue",
+        )
+        self.btn_lock.config(text=self._t("btn_unlock" if self.unlocked else "btn_lock"))
+        self._update_btn_states()
+        if warn and not self._warn_shown:
+            self._warn_shown = True
+            self._force_front()
+            if not self.has_job("keep_front"):
+                self.every("keep_front", WARN_FRONT_INTERVAL_MS, self._keep_front, run_hidden=True)
+        if not warn:
+            self._warn_shown = False
+            self._set_topmost(False)
+        if self._child and self.ctrl.take_show(): self._show()
 
     # --- load ---------------------------------------------------------------
 
     def _load(self) -> None:
         try:
             cfg = self.ctrl.load()
-            self._lang   = cfg.get("language", DEFAULT_LANG)
-            if self._lang not in LANGS: self._lang = DEFAULT_LANG
-            self._action = cfg.get("action", DEFAULT_ACTION)
-            if self._action not in ACTION_KEYS: self._action = DEFAULT_ACTION
+            self._lang   = cfg.language
+            self._action = cfg.action
             self.btn_lang.config(text=self._lang)
             self.btn_action.config(text=self._t("action_" + self._action))
-            self.v_takt.set(cfg.get("takt_seconds", DEFAULT_TAKT_SEC))
-
-            for r in cfg.get("allowed_times", []):
-                d = r.get("days")
-                for dd in (d if isinstance(d, list) else [d]):
-                    if dd not in self.day_state: continue
-                    s, e = r.get("start", "00:00"), r.get("end", "00:00")
-                    if not r.get("enabled", True):    self.day_state[dd] = "off"
-                    elif s == e:                       self.day_state[dd] = "on"
-                    else:                              self.day_state[dd] = "range"
-                    self.day_start[dd].set(s); self.day_end[dd].set(e)
-                    self.day_timer[dd].set(r.get("use_timer", True))
-                    self.day_limit[dd].set(r.get("limit_minutes", DEFAULT_DAY_LIMIT_MIN))
+            self.v_takt.set(cfg.takt_seconds)
+
+            for dd, r in zip(DAYS_EN, cfg.allowed_times.by_day):
+                if r is None: continue
+                if not r.enabled:           self.day_state[dd] = "off"
+                elif r.start == r.end:      self.day_state[dd] = "on"
+                else:                       self.day_state[dd] = "range"
+                self.day_start[dd].set(r.start); self.day_end[dd].set(r.end)
+                self.day_timer[dd].set(r.use_timer)
+                self.day_limit[dd].set(r.limit_minutes)
 
             for d in DAYS_EN: self._refresh_day(d)
-            self._last_good_takt = cfg.get("takt_seconds", DEFAULT_TAKT_SEC)
+            self._last_good_takt = cfg.takt_seconds
             for d in DAYS_EN:
                 sv = self.day_start[d].get().strip()
                 ev = self.day_end[d].get().strip()
@@ -632,6 +829,7 @@ class App(tk.Tk, StatusMixin, LockMixin):
                 self._last_good_end[d]   = ev if validate_time(ev) else "00:00"
                 try:   self._last_good_limit[d] = int(self.day_limit[d].get())
                 except (ValueError, tk.TclError): self._last_good_limit[d] = DEFAULT_DAY_LIMIT_MIN
+            self._saved = self._snapshot()
             self._relabel()
             self._refresh_autostart_btn()
         except Exception as ex:
@@ -0,0 +1,368 @@
+"""YourTime – enforcement in another process than the frontend.
+
+ControlServer exposes an AppController over a loopback connection,
+RemoteController stands in for one on the other side, serve() runs --service.
+"""
+import os, sys, json, signal, subprocess, threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from time import monotonic
+
+from definitions import (
+    UNLIMITED, IPC_HOST, IPC_ENV, IPC_POLL_SEC, IPC_EVENT_BACKLOG, SERVICE_FILENAME, SERVICE_START_SEC,
+    BUS_QUEUE_LEN,
+)
+from core import base_dir, log, write_atomic
+from bus import EVENTS, ConfigChanged, EventBus, Subscription, Tick
+from backend import AppController, Config, SCHEDULE_KEYS, TimeBank, do_action
+
+# ---------------------------------------------------------------------------
+# IPC
+# ---------------------------------------------------------------------------
+
+def child_cmd(*args: str) -> list:
+    """Command line starting this program again (frozen exe or backend.py) with *args*."""
+    prog = [sys.executable] if getattr(sys, "frozen", False) \
+        else [sys.executable, str(Path(__file__).with_name("backend.py"))]
+    return prog + list(args)
+
+def service_token() -> str:
+    """"port:key" of the --service advertised in service.json, "" if there is none."""
+    try:
+        d = json.loads((base_dir() / SERVICE_FILENAME).read_text(encoding="utf-8"))
+        return "%d:%s" % (int(d["port"]), str(d["key"]))
+    except (OSError, ValueError, KeyError, TypeError):
+        return ""
+
+def spawn_service() -> None:
+    """Start --service detached from this process, so it outlives the frontend."""
+    subprocess.Popen(child_cmd("--service"), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=os.name != "nt",
+                     creationflags=getattr(subprocess, "DETACHED_PROCESS", 0)
+                                   | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0))
+
+def _ipc_connect(token: str):
+    """Authenticated connection for *token*, None when nobody (valid) answers there."""
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+    try:
+        port, key = token.split(":")
+        return Client((IPC_HOST, int(port)), authkey=bytes.fromhex(key))
+    except (OSError, EOFError, ValueError, AuthenticationError):
+        return None
+
+class ControlServer(threading.Thread):
+    """Loopback endpoint through which other processes drive this AppController.
+
+    Serves the settings child of the tray resident and, under --service, every
+    frontend; each connection runs on its own thread. Clients poll
+    snapshot(since): the live state plus the RELAY events of the bus
+    published after *since*, the config (JSON form) only when it changed. Plain
+    data crosses the wire, never this module's classes. Other calls
+    are limited to CALLS. What a locked window cannot do (GUARDED, extending
+    before the last takt) needs a connection unlocked by check_password,
+    unless no password is set; the unlock belongs to that connection alone.
+    """
+    CALLS   = frozenset(("get_bank", "extend", "reduce", "reset_timer", "apply_changes",
+                         "set_language", "set_password", "grant_time"))
+    GUARDED = frozenset(("reset_timer", "apply_changes", "set_password", "grant_time", "quit"))
+    RELAY   = ("trigger", "warn", "stall", "adjust", "rollover", "resume", "session")   # plain-data events
+
+    def __init__(self, ctrl: AppController, on_quit):
+        from multiprocessing.connection import Listener
+        super().__init__(daemon=True, name="ipc")
+        self.ctrl     = ctrl
+        self.on_quit  = on_quit       # () -> None, Quit from an unlocked client
+        self.child    = None          # subprocess.Popen of the settings window
+        self._show    = False         # open requested while the child runs
+        self._open: set = set()       # sessions unlocked by a password
+        self._events  = deque(maxlen=IPC_EVENT_BACKLOG)   # (seq, kind, args)
+        self._seq     = 0
+        self._ev_lock = threading.Lock()
+        self._key     = os.urandom(32)
+        self._listener = Listener((IPC_HOST, 0), authkey=self._key)
+        self._sub     = ctrl.subscribe(lambda ev: self.publish(ev.kind, *ev.args), self.RELAY,
+                                       maxlen=IPC_EVENT_BACKLOG)
+
+    @property
+    def token(self) -> str:
+        return "%d:%s" % (self._listener.address[1], self._key.hex())
+
+    def publish(self, kind: str, *args) -> None:
+        """Queue an event (kind and fields of a bus Event) for every client's next poll."""
+        with self._ev_lock:
+            self._seq += 1
+            self._events.append((self._seq, kind, args))
+
+    def advertise(self) -> None:
+        write_atomic(base_dir() / SERVICE_FILENAME, json.dumps(
+            {"pid": os.getpid(), "port": self._listener.address[1], "key": self._key.hex()}).encode())
+
+    def withdraw(self) -> None:
+        """Remove service.json if it still names this process (a clean stop)."""
+        p = base_dir() / SERVICE_FILENAME
+        try:
+            if json.loads(p.read_text(encoding="utf-8")).get("pid") == os.getpid(): p.unlink()
+        except (OSError, ValueError, AttributeError): pass
+
+    def open_settings(self) -> None:
+        """Start the settings child, or ask the running one to come to the front."""
+        if self.child is not None and self.child.poll() is None:
+            self._show = True; return
+        self.child = subprocess.Popen(child_cmd("--settings"), env={**os.environ, IPC_ENV: self.token})
+
+    def stop(self) -> None:
+        self.ctrl.unsubscribe(self._sub)
+        if self.child is not None and self.child.poll() is None: self.child.terminate()
+        self._listener.close()
+
+    def run(self) -> None:
+        while True:
+            try: conn = self._listener.accept()
+            except OSError: return                     # listener closed
+            except Exception: continue                 # failed authentication
+            threading.Thread(target=self._serve, args=(conn,), daemon=True, name="ipc-client").start()
+
+    def _serve(self, conn) -> None:
+        sess = {"id": id(conn), "cfg": None}          # cfg: the Config this client has
+        with conn:
+            self._loop(conn, sess)
+        self._open.discard(sess["id"])
+
+    def _loop(self, conn, sess: dict) -> None:
+        while True:
+            try: name, args, kw = conn.recv()
+            except (EOFError, OSError): return
+            try:    reply = ("ok", self._dispatch(sess, name, args, kw))
+            except Exception as ex:                    # own classes may be __main__.X on one side
+                reply = ("err", ex if type(ex).__module__ == "builtins"
+                         else RuntimeError("%s: %s" % (type(ex).__name__, ex)))
+            try: conn.send(reply)
+            except (EOFError, OSError): return
+
+    def _dispatch(self, sess: dict, name: str, args: tuple, kw: dict):
+        if name == "snapshot": return self._snapshot(sess, *args)
+        if name == "check_password":
+            ok, wait = self.ctrl.verify_password(args[0])
+            if ok: self._open.add(sess["id"])
+            return ok, wait
+        if name == "lock":
+            self._open.discard(sess["id"]); return None
+        if name == "open_settings":
+            self.open_settings(); return None
+        may = sess["id"] in self._open or not self.ctrl.has_password()
+        if name in self.GUARDED and not may: raise PermissionError(name + ": locked")
+        if name == "extend" and not may and self.ctrl.get_remaining() > self.ctrl.get_cfg().takt_seconds:
+            raise PermissionError("extend: locked")
+        if name == "quit":
+            self.on_quit(); return None
+        if name not in self.CALLS: raise AttributeError(name)
+        if name == "get_bank": return self.ctrl.get_bank().to_json()
+        return getattr(self.ctrl, name)(*args, **kw)
+
+    def _snapshot(self, sess: dict, since: int, show: bool = False) -> dict:
+        c, cfg = self.ctrl, self.ctrl.get_cfg()
+        rem    = c.get_remaining()
+        warn   = rem != UNLIMITED and rem <= cfg.takt_seconds
+        with self._ev_lock:
+            seq    = self._seq
+            events = [(k, a) for s, k, a in self._events if s > since] if since >= 0 else []
+        if show: show, self._show = self._show, False
+        snap = {"seq": seq, "events": events, "remaining": rem, "warn": warn,
+                "lock_at": c.get_lock_time() if not warn else None,
+                "binding": c.get_binding(), "override": c.active_override(), "user": c.get_user(),
+                "has_password": c.has_password(), "unlocked": sess["id"] in self._open, "show": show,
+                "cfg": None if cfg is sess["cfg"] else cfg.to_json()}
+        sess["cfg"] = cfg
+        return snap
+
+class RemoteController:
+    """AppController stand-in for a frontend in another process than the enforcement.
+
+    Attaches to the ControlServer named in IPC_ENV (settings child of the tray
+    resident) or in service.json, starting --service when none answers. The
+    handshake returns the current state, and a poll thread refreshes it every
+    IPC_POLL_SEC: getters read that snapshot, and a local EventBus republishes
+    the relayed events plus a Tick per poll and ConfigChanged when the
+    settings changed, so subscribe() and the on_* callbacks work as with an
+    AppController. A service client that loses the connection
+    reconnects (restarting a crashed service) and carries on; when the other
+    side is gone for good on_quit() is called and further calls raise
+    SystemExit, which ends a Tk main loop. Formatting helpers run locally.
+    """
+
+    def __init__(self, on_trigger=None, on_warn=None, on_stall=None, on_tick=None):
+        self.bus     = EventBus()
+        self.on_quit = None           # () -> None, set by the frontend
+        self.child  = IPC_ENV in os.environ
+        self._token = os.environ.get(IPC_ENV, "")
+        self._lock  = threading.Lock()
+        self._stop  = threading.Event()
+        self._conn  = None
+        self._cfg   = None
+        self._snap: dict = {}
+        self._seq   = -1
+        self._show  = False
+        self.bus.attach(on_trigger, on_warn, on_stall, on_tick)
+        with self._lock: self._connect(first=True)
+
+    # --- connection ---------------------------------------------------------
+
+    def _connect(self, first: bool) -> None:
+        """Attach (lock held) and take the current state; SystemExit if there is nobody."""
+        deadline, spawned = monotonic() + SERVICE_START_SEC, False
+        while True:
+            token = self._token or service_token()
+            conn  = _ipc_connect(token) if token else None
+            if conn is not None: break
+            if self.child or not (first or token):     # resident gone, or service stopped on purpose
+                raise SystemExit("enforcement process gone")
+            if not spawned: spawn_service(); spawned = True
+            if monotonic() > deadline: raise SystemExit("service did not start")
+            self._stop.wait(0.05)
+        conn.send(("snapshot", (-1, self.child), {}))
+        status, snap = conn.recv()
+        self._conn = conn
+        self._take(snap)
+
+    def _call(self, name: str, *args, **kw):
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._conn is None: self._connect(first=False)
+                    self._conn.send((name, args, kw))
+                    status, v = self._conn.recv()
+                    break
+                except (EOFError, OSError) as ex:
+                    self._conn = None
+                    if self.child or attempt: raise SystemExit("enforcement process gone: %r" % (ex,))
+        if status == "err": raise v
+        return v
+
+    def _take(self, snap: dict) -> list:
+        events = [EVENTS[k](*a) for k, a in snap["events"] if k in EVENTS]
+        if snap["cfg"] is not None:
+            old, self._cfg = self._cfg, Config(snap["cfg"])
+            if old is not None and not self._cfg.same(old):    # not just usage counters
+                events.append(ConfigChanged(self._cfg, not self._cfg.same(old, SCHEDULE_KEYS)))
+        self._seq, self._snap = snap["seq"], snap
+        self._show = self._show or snap["show"]
+        return events
+
+    def _refresh(self) -> None:
+        for ev in self._take(self._call("snapshot", self._seq, self.child)): self.bus.publish(ev)
+        if self.bus.wants("tick"): self.bus.publish(Tick(self._snap["remaining"], self._snap["warn"]))
+
+    def _poll(self) -> None:
+        while not self._stop.wait(IPC_POLL_SEC):
+            try: self._refresh()
+            except SystemExit:
+                if self.on_quit is not None: self.on_quit()
+                return
+            except Exception as ex: log(str(datetime.now()) + ": ipc poll: " + str(ex))
+
+    # --- AppController surface ----------------------------------------------
+
+    def start(self) -> None:
+        threading.Thread(target=self._poll, daemon=True, name="ipc-poll").start()
+
+    def stop(self) -> None:
+        """Quit: ends the enforcement process too (needs an unlocked connection)."""
+        try: self._call("quit")
+        except (SystemExit, PermissionError): pass
+        finally: self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.bus.close()
+        with self._lock:
+            if self._conn is not None: self._conn.close(); self._conn = None
+
+    def subscribe(self, fn, kinds=None, maxlen: int = BUS_QUEUE_LEN,
+                  policy: str = "drop-oldest") -> Subscription:
+        return self.bus.subscribe(fn, kinds, maxlen, policy)
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self.bus.unsubscribe(sub)
+
+    def load(self)             -> Config: return self._cfg
+    def get_cfg(self)          -> Config: return self._cfg
+    def get_remaining(self)    -> int:    return self._snap["remaining"]
+    def get_lock_time(self)    -> datetime | None: return self._snap["lock_at"]
+    def get_binding(self)      -> str:    return self._snap["binding"]
+    def get_user(self)         -> str:    return self._snap["user"]
+    def is_in_warn_zone(self)  -> bool:   return self._snap["warn"]
+    def is_login_allowed(self) -> bool:   return not self._snap["warn"]
+    def active_override(self)  -> str:    return self._snap["override"]
+    def has_password(self)     -> bool:   return self._snap["has_password"]
+    def unlocked(self)         -> bool:   return self._snap["unlocked"]
+    def get_bank(self)         -> TimeBank: return TimeBank(self._call("get_bank"))
+
+    def take_show(self) -> bool:
+        show, self._show = self._show, False
+        return show
+
+    def _change(self, name: str, *args):
+        """Mutating call, then a fresh snapshot so the caller reads its own write."""
+        v = self._call(name, *args)
+        self._refresh()
+        return v
+
+    def extend(self, s: int, from_bank: bool = False) -> None: self._change("extend", s, from_bank)
+    def reduce(self, s: int) -> None:          self._change("reduce", s)
+    def reset_timer(self) -> None:             self._change("reset_timer")
+    def grant_time(self, sec: int) -> None:    self._change("grant_time", sec)
+    def set_language(self, lang: str) -> None: self._change("set_language", lang)
+    def set_password(self, pw: str) -> None:   self._change("set_password", pw)
+    def apply_changes(self, settings: dict, days: dict | None = None) -> bool:
+        return self._change("apply_changes", settings, days)
+    def lock(self) -> None:                    self._change("lock")
+    def open_settings(self) -> None:           self._call("open_settings")
+
+    def verify_password(self, pw: str) -> tuple:
+        """(ok, retry_in_sec); a correct password unlocks this connection."""
+        ok, wait = self._call("check_password", pw)
+        self._refresh()
+        return ok, wait
+
+    def check_password_async(self, pw: str, done) -> None:
+        threading.Thread(target=lambda: done(*self.verify_password(pw)), daemon=True).start()
+
+    def set_password_async(self, pw: str, done) -> None:
+        def work():
+            try:    self.set_password(pw); done(None)
+            except Exception as ex: done(ex)
+        threading.Thread(target=work, daemon=True).start()
+
+    translate        = staticmethod(AppController.translate)
+    format_remaining = staticmethod(AppController.format_remaining)
+    days_short       = staticmethod(AppController.days_short)
+    format_lock_time = staticmethod(AppController.format_lock_time)
+    format_date      = staticmethod(AppController.format_date)
+    has_text         = staticmethod(AppController.has_text)
+
+def serve() -> None:
+    """--service: enforcement, persistence and actions, no GUI import.
+
+    Frontends attach through ControlServer (address in service.json) and may
+    come and go. Stops on Quit from an unlocked client, SIGTERM or Ctrl+C;
+    only a clean stop removes service.json, so clients restart a crashed one.
+    """
+    token = service_token()
+    if token and _ipc_connect(token) is not None: return          # already running
+    done   = threading.Event()
+    ctrl   = AppController(on_trigger=lambda key, action: do_action(action))
+    server = ControlServer(ctrl, on_quit=done.set)
+    ctrl.load()
+    server.start()
+    ctrl.start()
+    server.advertise()
+    if hasattr(signal, "SIGTERM"): signal.signal(signal.SIGTERM, lambda *_: done.set())
+    try:
+        while not done.wait(1): pass
+    except KeyboardInterrupt: pass
+    finally:
+        server.withdraw()
+        server.stop()
+        ctrl.stop()
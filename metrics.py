@@ -0,0 +1,270 @@
+"""YourTime – metrics, diagnostics and the on-demand profiler.
+
+Counter / Histogram register themselves for metrics_text(); MetricsExporter
+publishes it as a file and / or over HTTP; thread_dump / resident_usage and
+Profiler feed error.log and the profile files.
+"""
+import os, sys, ctypes, asyncio, threading, traceback
+from bisect import bisect_left
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING
+
+from definitions import (
+    METRICS_FILENAME, METRICS_BUCKETS_SEC, METRICS_FILE_INTERVAL_SEC, METRICS_HOST,
+    PROFILE_STACKS_FILENAME, PROFILE_ALLOC_FILENAME, PROFILE_SAMPLE_HZ, PROFILE_MAX_OVERHEAD,
+    PROFILE_REPORT_SEC, PROFILE_TRACE_SEC, PROFILE_MAX_BYTES, PROFILE_MAX_STACKS, PROFILE_TOP_ALLOCS,
+)
+from core import Core, base_dir, log, write_atomic
+from web import http_request, http_reply
+
+if TYPE_CHECKING:                      # annotations only: backend imports this module
+    from backend import Config
+
+_metrics: list = []                       # every Counter / Histogram, in exposition order
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class Counter:
+    """Monotonic counter. Updates take no lock: writers are single threads or
+    already serialised, and a lost increment under contention is tolerable."""
+    __slots__ = ("name", "doc", "value")
+
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc, self.value = name, doc, 0
+        _metrics.append(self)
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+    def expose(self) -> list:
+        return ["# HELP %s %s" % (self.name, self.doc), "# TYPE %s counter" % self.name,
+                "%s %d" % (self.name, self.value)]
+
+class Histogram:
+    """Fixed-bucket histogram of seconds; observe() is one bisect and two adds."""
+    __slots__ = ("name", "doc", "bounds", "counts", "sum")
+
+    def __init__(self, name: str, doc: str, bounds: tuple = METRICS_BUCKETS_SEC):
+        self.name, self.doc, self.bounds = name, doc, bounds
+        self.counts = [0] * (len(bounds) + 1)          # last slot: +Inf
+        self.sum    = 0.0
+        _metrics.append(self)
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.sum += v
+
+    def expose(self) -> list:
+        n, out = 0, ["# HELP %s %s" % (self.name, self.doc), "# TYPE %s histogram" % self.name]
+        for b, c in zip(self.bounds, self.counts):
+            n += c; out.append('%s_bucket{le="%g"} %d' % (self.name, b, n))
+        n += self.counts[-1]
+        return out + ['%s_bucket{le="+Inf"} %d' % (self.name, n),
+                      "%s_sum %.6f" % (self.name, self.sum), "%s_count %d" % (self.name, n)]
+
+class TimedRLock:
+    """threading.RLock recording wait and hold time of its outermost acquisitions.
+
+    Both are observed while the lock is held, so the histograms need no lock
+    of their own; re-entrant acquisitions only count depth.
+    """
+    __slots__ = ("_lock", "_depth", "_t0", "_wait", "_hold")
+
+    def __init__(self, wait: Histogram, hold: Histogram):
+        self._lock, self._depth, self._t0 = threading.RLock(), 0, 0.0
+        self._wait, self._hold = wait, hold
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        t = perf_counter()
+        if not self._lock.acquire(blocking, timeout): return False
+        self._depth += 1
+        if self._depth == 1:
+            self._t0 = perf_counter(); self._wait.observe(self._t0 - t)
+        return True
+
+    def release(self) -> None:
+        if self._depth == 1: self._hold.observe(perf_counter() - self._t0)
+        self._depth -= 1
+        self._lock.release()
+
+    __enter__ = acquire
+    def __exit__(self, *exc) -> None: self.release()
+
+def metrics_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for m in _metrics for line in m.expose()) + "\n"
+
+class MetricsExporter:
+    """Publishes metrics_text(): rewritten to metrics.prom every
+    METRICS_FILE_INTERVAL_SEC (metrics_file) and/or served at
+    http://METRICS_HOST:<metrics_port>/metrics, both from the core loop."""
+
+    def __init__(self, cfg: "Config"):
+        self.path   = base_dir() / METRICS_FILENAME if cfg.metrics_file else None
+        self.port   = cfg.metrics_port
+        self._core  = None
+        self._timer = None
+        self._http  = None
+
+    def start(self, core: Core) -> None:
+        self._core = core
+        core.call(self._open)
+
+    def stop(self) -> None:
+        if self._core is not None: self._core.call(self._close)
+        if self.path is not None: self._write()
+
+    def _open(self) -> None:
+        if self.path is not None:
+            self._timer = self._core.every(METRICS_FILE_INTERVAL_SEC, self._core.spawn, self._write)
+        if self.port: self._core.loop.create_task(self._serve())
+
+    def _close(self) -> None:
+        if self._timer is not None: self._timer.cancel()
+        if self._http is not None: self._http.close()
+
+    async def _serve(self) -> None:
+        try: self._http = await asyncio.start_server(self._handle, METRICS_HOST, self.port)
+        except OSError as ex: log(str(datetime.now()) + ": metrics: port %d: %s" % (self.port, ex))
+
+    async def _handle(self, reader, writer) -> None:
+        """Minimal HTTP/1.0: GET /metrics, anything else 404."""
+        try:
+            _, path, _, _ = await asyncio.wait_for(http_request(reader), 5)
+            if path == "/metrics":
+                http_reply(writer, "200 OK", "text/plain; version=0.0.4", metrics_text().encode())
+            else:
+                http_reply(writer, "404 Not Found", "text/plain", b"not found\n")
+            await writer.drain()
+        except (OSError, ValueError, EOFError, asyncio.TimeoutError): pass
+        finally: writer.close()
+
+    def _write(self) -> None:
+        try: write_atomic(self.path, metrics_text().encode())
+        except OSError as ex: log(str(datetime.now()) + ": metrics: " + str(ex))
+
+# ---------------------------------------------------------------------------
+# Diagnostics – thread stacks, resident size
+# ---------------------------------------------------------------------------
+
+def thread_dump() -> str:
+    """Current stack of every thread, for the log."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    return "".join("--- %s (%d)\n%s" % (names.get(i, "?"), i, "".join(traceback.format_stack(f)))
+                   for i, f in sys._current_frames().items())
+
+def resident_usage() -> tuple:
+    """(resident set size in bytes, live threads) of this process; size 0 if unknown."""
+    n = threading.active_count()
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"), n
+    except (OSError, ValueError, AttributeError): pass
+    try:
+        class PMC(ctypes.Structure):
+            _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t)] + \
+                       [(k, ctypes.c_size_t) for k in ("QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                        "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                        "PagefileUsage", "PeakPagefileUsage")]
+        c = PMC(); c.cb = ctypes.sizeof(PMC)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(c), c.cb)
+        return c.WorkingSetSize, n
+    except Exception:
+        return 0, n
+
+# ---------------------------------------------------------------------------
+# Profiler – on-demand stack sampling and allocation tracing
+# ---------------------------------------------------------------------------
+
+class Profiler:
+    """Low-rate sampler over all threads plus tracemalloc diffs, switched at runtime.
+
+    While on, a daemon thread records every other thread's stack
+    PROFILE_SAMPLE_HZ times a second and every PROFILE_REPORT_SEC rewrites,
+    next to error.log, profile.folded (collapsed stacks: flamegraph.pl or
+    speedscope input) and profile_alloc.txt. The sampler backs off when it
+    would use more than PROFILE_MAX_OVERHEAD of a core. tracemalloc only runs
+    for the PROFILE_TRACE_SEC before each report (one frame per block); the
+    report lists the live blocks of that window per source line and the
+    change against the previous window. Both files are cut at PROFILE_MAX_BYTES.
+    """
+
+    def __init__(self):
+        self.active  = False
+        self._lock   = threading.Lock()
+        self._stop   = threading.Event()
+        self._stacks: dict = {}       # "thread;file:func;..." -> samples
+        self._snap   = None           # tracemalloc snapshot of the previous window
+
+    def set(self, on: bool, why: str = "") -> None:
+        with self._lock:
+            if on == self.active: return
+            self.active = on
+            if on:
+                self._stop, self._stacks, self._snap = threading.Event(), {}, None
+                threading.Thread(target=self._run, args=(self._stop,), daemon=True,
+                                 name="profiler").start()
+            else:
+                self._stop.set()
+        log(str(datetime.now()) + ": profiler " + ("on" if on else "off") + (" (" + why + ")" if why else ""))
+
+    def toggle(self, why: str = "") -> None:
+        self.set(not self.active, why)
+
+    def _run(self, stop: threading.Event) -> None:
+        import tracemalloc
+        me, step = threading.get_ident(), 1.0 / PROFILE_SAMPLE_HZ
+        due = monotonic() + PROFILE_REPORT_SEC
+        try:
+            while not stop.wait(step):
+                t0 = perf_counter()
+                self._sample(me)
+                step = max(1.0 / PROFILE_SAMPLE_HZ, (perf_counter() - t0) / PROFILE_MAX_OVERHEAD)
+                now  = monotonic()
+                if now >= due - PROFILE_TRACE_SEC and not tracemalloc.is_tracing():
+                    tracemalloc.start(1)
+                if now >= due:
+                    self._report(); due = monotonic() + PROFILE_REPORT_SEC
+            self._report()
+        except Exception as ex:
+            log(str(datetime.now()) + ": profiler: " + str(ex))
+        if tracemalloc.is_tracing(): tracemalloc.stop()
+
+    def _sample(self, me: int) -> None:
+        names, st = {t.ident: t.name for t in threading.enumerate()}, self._stacks
+        for ident, f in sys._current_frames().items():
+            if ident == me: continue
+            parts = []
+            while f is not None:
+                parts.append(os.path.basename(f.f_code.co_filename) + ":" + f.f_code.co_name)
+                f = f.f_back
+            key = names.get(ident, "thread-%d" % ident) + ";" + ";".join(reversed(parts))
+            if key not in st and len(st) >= PROFILE_MAX_STACKS: key = "(other)"
+            st[key] = st.get(key, 0) + 1
+
+    def _report(self) -> None:
+        import tracemalloc
+        out, size = [], 0
+        for k, n in sorted(self._stacks.items(), key=lambda kv: -kv[1]):
+            line = "%s %d\n" % (k, n)
+            size += len(line.encode())
+            if size > PROFILE_MAX_BYTES: break
+            out.append(line)
+        write_atomic(base_dir() / PROFILE_STACKS_FILENAME, "".join(out).encode())
+        if not tracemalloc.is_tracing(): return
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows = [str(datetime.now()) + ": %d KiB live from the last %d s (peak %d KiB)"
+                % (cur // 1024, PROFILE_TRACE_SEC, peak // 1024)]
+        rows += [str(d) for d in (snap.compare_to(self._snap, "lineno") if self._snap
+                                  else snap.statistics("lineno"))[:PROFILE_TOP_ALLOCS]]
+        self._snap = snap
+        write_atomic(base_dir() / PROFILE_ALLOC_FILENAME,
+                      ("\n".join(rows) + "\n").encode()[:PROFILE_MAX_BYTES])
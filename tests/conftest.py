@@ -0,0 +1,49 @@
+"""Shared fixtures: every test gets a data directory of its own."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import backend
+from definitions import DAYS_EN, HOME_ENV
+
+
+def _reset() -> None:
+    backend._cache.update(cfg=None, mtime=0.0, watched=False)
+    backend._chain["obj"] = None
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """Empty data directory (config.json, state, logs) with cheap password hashing."""
+    monkeypatch.setenv(HOME_ENV, str(tmp_path))
+    monkeypatch.setattr(backend, "PW_VERIFY_TARGET_MS", 1)
+    monkeypatch.setattr(backend, "USAGE_KEY_ITERATIONS", 1_000)
+    monkeypatch.setattr(backend, "_pw_cost", {})
+    _reset()
+    yield tmp_path
+    _reset()
+
+
+@pytest.fixture
+def config(home):
+    """config(**settings) writes config.json: a 60-minute timer every day, plus *settings*."""
+    def write(**settings):
+        days = [{"days": d, "enabled": True, "start": "00:00", "end": "00:00",
+                 "use_timer": True, "limit_minutes": 60} for d in DAYS_EN]
+        (home / "config.json").write_text(json.dumps({"allowed_times": days, **settings}),
+                                          encoding="utf-8")
+    return write
+
+
+@pytest.fixture
+def ctrl(home):
+    """A started AppController on *home*; stopped afterwards."""
+    c = backend.AppController()
+    c.load()
+    c.start()
+    yield c
+    c.stop()
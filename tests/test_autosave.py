@@ -0,0 +1,111 @@
+"""Settings autosave: typing a day schedule costs one write and one Watchdog update."""
+import os
+
+import pytest
+
+pytest.importorskip("tkinter")
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")      # no tray icon; pystray needs no display then
+
+import backend
+import frontend
+from definitions import DAYS_EN
+
+
+class Var:
+    """tk variable stand-in whose set() fires the write trace, as a keystroke does."""
+    def __init__(self, value, trace):
+        self.value, self.trace = value, trace
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value; self.trace()
+
+
+class Window:
+    """The state App's autosave works on, without a display; after() is a manual clock."""
+    _autosave       = frontend.App._autosave
+    _flush_autosave = frontend.App._flush_autosave
+    _snapshot       = frontend.App._snapshot
+
+    def __init__(self, ctrl, debounce: bool):
+        cfg, self.ctrl, self.debounce = ctrl.load(), ctrl, debounce
+        self.unlocked, self._clamping, self._autosave_id = True, False, None
+        self._action, self._last_good_takt, self._pending = cfg.action, cfg.takt_seconds, {}
+        self.v_takt = Var(cfg.takt_seconds, self._autosave)
+        self.day_state, self.day_start, self.day_end, self.day_timer, self.day_limit = {}, {}, {}, {}, {}
+        self._last_good_start, self._last_good_end, self._last_good_limit = {}, {}, {}
+        for d, r in zip(DAYS_EN, cfg.allowed_times.by_day):
+            self.day_state[d] = "off" if not r.enabled else "on" if r.start == r.end else "range"
+            self.day_start[d], self.day_end[d] = Var(r.start, self._autosave), Var(r.end, self._autosave)
+            self.day_timer[d] = Var(r.use_timer, self._autosave)
+            self.day_limit[d] = Var(r.limit_minutes, self._autosave)
+            self._last_good_start[d], self._last_good_end[d] = r.start, r.end
+            self._last_good_limit[d] = r.limit_minutes
+        self._saved = self._snapshot()
+
+    def after(self, ms, fn):
+        if not self.debounce: fn(); return None         # flushed on every keystroke
+        self._pending[id(fn)] = fn
+        return id(fn)
+
+    def after_cancel(self, key):
+        self._pending.pop(key, None)
+
+    def type(self, var: Var, text: str) -> None:
+        var.set("")
+        for i in range(1, len(text) + 1): var.set(text[:i])
+
+
+def _type_monday(w: Window) -> int:
+    """Monday 08:30-20:00 with a 120-minute timer, and a 45 s takt; the keystrokes made."""
+    n = 0
+    for var, text in ((w.day_start["Monday"], "08:30"), (w.day_end["Monday"], "20:00"),
+                      (w.day_limit["Monday"], "120"), (w.v_takt, "45")):
+        w.type(var, text); n += len(text) + 1
+    w.day_state["Monday"] = "range"; w._autosave()       # the day button
+    return n + 1
+
+
+@pytest.fixture
+def counted(config, monkeypatch):
+    config(takt_seconds=30)
+    counts = {"writes": 0, "updates": 0}
+    save, update = backend.save_cfg, backend.Watchdog.update
+
+    def counting_save(cfg):
+        counts["writes"] += 1; save(cfg)
+
+    def counting_update(wd, cfg):
+        counts["updates"] += 1; update(wd, cfg)
+    monkeypatch.setattr(backend, "save_cfg", counting_save)
+    monkeypatch.setattr(backend.Watchdog, "update", counting_update)
+    return counts
+
+
+def _monday(ctrl) -> dict:
+    return ctrl.get_cfg().allowed_times.get("Monday").to_json()
+
+
+def test_typing_a_day_before_and_after_debounce(config, counted):
+    before = backend.AppController()
+    w      = Window(before, debounce=False)
+    counted.update(writes=0, updates=0)                # loading settles the time bank once
+    keys   = _type_monday(w)
+    saved  = _monday(before)
+    assert keys == 20                                  # the pre-debounce handler: 20 writes, 20 updates
+    assert counted == {"writes": 6, "updates": 4}      # one flush per keystroke: each new valid value
+
+    config(takt_seconds=30)                            # the same day typed again from scratch
+    backend._cache.update(cfg=None, mtime=0.0, watched=False)
+    after = backend.AppController()
+    w     = Window(after, debounce=True)
+    counted.update(writes=0, updates=0)
+    _type_monday(w)
+    assert counted == {"writes": 0, "updates": 0}      # still inside the debounce window
+    w._flush_autosave()                                # the window elapsed, or hide / lock / exit
+    assert counted == {"writes": 1, "updates": 1}
+    assert _monday(after) == saved and after.get_cfg().takt_seconds == 45
+    w._flush_autosave()                                # nothing new: no write
+    assert counted == {"writes": 1, "updates": 1}
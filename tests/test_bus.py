@@ -0,0 +1,61 @@
+"""EventBus: a stuck subscriber's full queue drops or coalesces, publish() never waits."""
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+import bus
+from bus import EventBus, Tick, Warn
+
+
+def _stuck(b: EventBus, policy: str, kinds=("tick", "warn")):
+    """A subscriber blocked in its first event until the returned gate is set."""
+    got, gate, inside = [], threading.Event(), threading.Event()
+
+    def fn(ev):
+        got.append(ev)
+        if len(got) == 1: inside.set(); gate.wait(10)
+    sub = b.subscribe(fn, kinds, maxlen=2, policy=policy)
+    b.publish(Tick(0, False))
+    assert inside.wait(5)
+    return sub, got, gate
+
+
+def _drain(got: list, n: int) -> None:
+    end = monotonic() + 5
+    while len(got) < n and monotonic() < end: sleep(0.01)
+
+
+@pytest.mark.parametrize("policy, events, kept, dropped", [
+    ("drop-oldest", [Tick(s, False) for s in range(1, 6)], [Tick(4, False), Tick(5, False)], 3),
+    ("coalesce", [Tick(1, False), Warn(1), Tick(2, False), Tick(3, False), Warn(2)],
+     [Tick(3, False), Warn(2)], 3),
+])
+def test_full_queue_policy(policy, events, kept, dropped):
+    b = EventBus()
+    sub, got, gate = _stuck(b, policy)
+    total = bus._c_dropped.value
+    for ev in events: b.publish(ev)
+    assert sub.dropped == dropped and bus._c_dropped.value - total == dropped
+    gate.set()
+    _drain(got, 1 + len(kept))
+    sleep(0.1)
+    assert [e.args for e in got] == [(0, False)] + [e.args for e in kept]
+    assert [type(e) for e in got[1:]] == [type(e) for e in kept]
+    b.close()
+
+
+def test_publish_does_not_wait_for_a_stuck_subscriber():
+    b = EventBus()
+    sub, _, gate = _stuck(b, "drop-oldest")
+    fast = []
+    b.subscribe(fast.append, ("tick",), maxlen=10_000)
+    t0 = monotonic()
+    for s in range(1, 1001): b.publish(Tick(s, False))
+    took = monotonic() - t0
+    _drain(fast, 1000)
+    assert took < 0.5, "%.3f s for 1000 publishes" % took
+    assert len(fast) == 1000                           # the others are not held up
+    assert sub.dropped == 998
+    gate.set()
+    b.close()
@@ -0,0 +1,76 @@
+"""state.bin: a killed writer loses at most one second, a torn record is dropped."""
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import backend
+from definitions import HOME_ENV, LOG_FILENAME, STATE_FILENAME
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Enforcement in a process of its own, printing the remaining seconds of every tick.
+CHILD = """
+import sys, threading
+import backend
+c = backend.AppController(on_tick=lambda rem: print(rem, flush=True))
+c.load()
+c.start()
+threading.Event().wait()
+"""
+
+
+def _run_and_kill(home, after: float) -> int:
+    """Start the child, SIGKILL it after *after* seconds; the last remaining it reported."""
+    p = subprocess.Popen([sys.executable, "-c", CHILD], cwd=ROOT, stdout=subprocess.PIPE,
+                         env={**os.environ, HOME_ENV: str(home), "PYTHONPATH": str(ROOT)})
+    try:
+        assert p.stdout.readline()                     # up and ticking
+        time.sleep(after)
+    finally:
+        p.kill()
+    out = p.communicate()[0].split()
+    p.stdout.close()
+    return int(out[-1]) if out else None
+
+
+def test_kill_at_random_points_loses_at_most_a_second(config, home):
+    config(takt_seconds=60)
+    rnd = random.Random(36)
+    for _ in range(4):
+        last = _run_and_kill(home, rnd.uniform(0.3, 2.5))
+        backend._cache.update(cfg=None, mtime=0.0, watched=False)
+        c = backend.AppController()
+        c.load()                                       # restore only, no tick
+        assert 0 <= c.get_remaining() - last <= 1
+
+
+def _state(used: int) -> tuple:
+    return datetime.now().date().toordinal(), used, -1, 120, 3600, 0
+
+
+def test_torn_record_is_dropped_and_rewritten(config, home):
+    config(takt_seconds=60)
+    ck = backend.Checkpoint(home / STATE_FILENAME)
+    for used in (10, 11, 12):
+        ck.write(_state(used))                         # a full record, then two deltas
+    ck.close()
+    intact = (home / STATE_FILENAME).read_bytes()
+    (home / STATE_FILENAME).write_bytes(intact + intact[-17:-5])   # the next delta, cut short
+    assert backend.Checkpoint(home / STATE_FILENAME).restore() == _state(12)
+
+    broken = bytearray(intact)
+    broken[-1] ^= 0xFF                                 # last delta fails its CRC
+    (home / STATE_FILENAME).write_bytes(bytes(broken))
+    assert backend.Checkpoint(home / STATE_FILENAME).restore() == _state(11)
+
+    c = backend.AppController()
+    c.load()
+    assert c.get_remaining() == 3600 - 11 + 120        # used and the window offset
+    dropped = (home / LOG_FILENAME).read_text(encoding="utf-8").count("trailing bytes dropped")
+    c.wd.checkpoint()                                  # the first write after start compacts
+    assert backend.Checkpoint(home / STATE_FILENAME).restore() == _state(11)
+    assert (home / LOG_FILENAME).read_text(encoding="utf-8").count("trailing bytes dropped") == dropped
@@ -0,0 +1,125 @@
+"""Config parsing, and ConfigTx: validated once, one write, conflicts detected."""
+import json
+import os
+
+import pytest
+
+import backend
+from backend import Config
+from definitions import DAYS_EN, DEFAULT_ROLLOVER_DAYS, STALL_SEC_HI, STALL_SEC_LO, WATCHDOG_STALL_SEC
+
+
+@pytest.mark.parametrize("key, value, want", [
+    ("stall_seconds", STALL_SEC_LO, STALL_SEC_LO),
+    ("stall_seconds", STALL_SEC_LO - 1, WATCHDOG_STALL_SEC),
+    ("stall_seconds", STALL_SEC_HI + 1, WATCHDOG_STALL_SEC),
+    ("metrics_port", 9100, 9100),
+    ("metrics_port", 70000, 0),
+    ("dashboard_port", -1, 0),
+    ("dashboard_port", True, 0),
+    ("rollover_days", 0, DEFAULT_ROLLOVER_DAYS),
+    ("week_limit_minutes", "600", 0),
+])
+def test_integer_ranges(key, value, want):
+    cfg = Config({key: value})
+    assert getattr(cfg, key) == want
+    assert bool(cfg.problems) == (value != want)
+
+
+# --- ConfigTx ---------------------------------------------------------------
+
+@pytest.fixture
+def counted(config, monkeypatch):
+    """A loaded AppController; its save_cfg writes and Watchdog.update calls counted."""
+    config(takt_seconds=30)
+    counts = {"writes": 0, "updates": 0}
+    save, update = backend.save_cfg, backend.Watchdog.update
+
+    def counting_save(cfg):
+        counts["writes"] += 1; save(cfg)
+
+    def counting_update(wd, cfg):
+        counts["updates"] += 1; update(wd, cfg)
+    monkeypatch.setattr(backend, "save_cfg", counting_save)
+    monkeypatch.setattr(backend.Watchdog, "update", counting_update)
+    ctrl = backend.AppController()
+    ctrl.load()
+    counts.update(writes=0, updates=0)                 # loading settles the time bank once
+    return ctrl, counts
+
+
+def _external(home, **changes) -> None:
+    """Another process rewrites config.json."""
+    p = home / "config.json"
+    d = json.loads(p.read_text(encoding="utf-8"))
+    d.update(changes)
+    p.write_text(json.dumps(d), encoding="utf-8")
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))   # a distinct mtime
+
+
+def test_fifty_changes_one_write(counted):
+    ctrl, counts = counted
+    with ctrl.edit() as tx:
+        for i in range(25):
+            tx.set("takt_seconds", 10 + i)
+            tx.set_day(DAYS_EN[i % 7], limit_minutes=30 + i, start="08:00", end="20:00")
+    assert counts == {"writes": 1, "updates": 1} and tx.committed
+    cfg = backend.load_cfg(fresh=True)
+    assert cfg.takt_seconds == 34 and cfg.cfg_version == 1
+    assert cfg.allowed_times.get("Thursday").limit_minutes == 30 + 24
+    with ctrl.edit() as tx:                            # not the schedule: no Watchdog.update
+        for i in range(50): tx.set("language", ("EN", "DE")[i % 2])
+    assert counts == {"writes": 2, "updates": 1}
+
+
+def test_no_op_transaction_writes_nothing(counted, home):
+    ctrl, counts = counted
+    before = (home / "config.json").read_bytes()
+    with ctrl.edit() as tx:
+        tx.set("takt_seconds", 30)
+        tx.set_day("Monday", limit_minutes=60, enabled=True)
+    assert not tx.committed and counts == {"writes": 0, "updates": 0}
+    assert (home / "config.json").read_bytes() == before
+    assert ctrl.apply_changes({"takt_seconds": 30}) is False
+
+
+def test_external_edits_conflict(counted, home):
+    ctrl, counts = counted
+    tx = ctrl.edit().set("takt_seconds", 45)
+    _external(home, takt_seconds=50)                   # the same key
+    with pytest.raises(backend.ConfigConflict, match="takt_seconds"):
+        tx.commit()
+
+    tx = ctrl.edit().set("takt_seconds", 45)
+    _external(home, language="DE")                     # another key: merged
+    assert tx.commit() and backend.load_cfg(fresh=True).language == "DE"
+
+    tx = ctrl.edit().set_day("Friday", limit_minutes=90)
+    _external(home, cfg_version=7)                     # another writer's transaction
+    with pytest.raises(backend.ConfigConflict, match="cfg_version"):
+        tx.commit()
+    assert counts["writes"] == 1
+
+
+@pytest.mark.parametrize("key, value", [
+    ("takt_secnods", 5), ("cfg_version", 9), ("users", 42), ("users", {"kid": 5}),
+    ("profiles", {"school": {}}), ("overrides", [{"to": "2026-01-01"}]), ("allowed_times", "all"),
+    ("dashboard_port", 70000), ("tray_only", 1), ("service", "yes"), ("profile", None),
+    ("stall_seconds", STALL_SEC_LO - 1), ("takt_seconds", True),
+])
+def test_invalid_settings_are_rejected(counted, home, key, value):
+    ctrl, counts = counted
+    before = (home / "config.json").read_bytes()
+    with pytest.raises(ValueError):
+        with ctrl.edit() as tx: tx.set(key, value)
+    assert counts["writes"] == 0 and (home / "config.json").read_bytes() == before
+
+
+def test_structured_settings_are_accepted(counted):
+    ctrl, counts = counted
+    with ctrl.edit() as tx:
+        tx.set("users", {"kid": {"allowed_times": []}}).set("profiles", {"school": []})
+        tx.set("dashboard_port", 8080).set("tray_only", True)
+    assert counts == {"writes": 1, "updates": 1}
+    assert backend.load_cfg(fresh=True).user_profile("KID") == "kid"
@@ -0,0 +1,83 @@
+"""ConfigWatcher on the polling fallback: external edits reach the Watchdog once,
+our own writes and broken files do not."""
+import json
+import os
+from time import monotonic, sleep
+
+import pytest
+
+import backend
+from definitions import LOG_FILENAME
+
+
+def _no_inotify(self, d):
+    raise OSError("inotify disabled for the test")
+
+
+@pytest.fixture
+def watched(config, home, monkeypatch):
+    config(takt_seconds=60)
+    monkeypatch.setattr(backend.ConfigWatcher, "_open_inotify", _no_inotify)
+    monkeypatch.setattr(backend.ConfigWatcher, "_open_win32", _no_inotify)
+    monkeypatch.setattr(backend, "CONFIG_POLL_SEC", 0.1)
+    monkeypatch.setattr(backend, "CONFIG_DEBOUNCE_SEC", 0.3)
+    updates = []
+    update  = backend.Watchdog.update
+
+    def counting_update(wd, cfg):
+        updates.append(monotonic()); update(wd, cfg)
+    monkeypatch.setattr(backend.Watchdog, "update", counting_update)
+    c = backend.AppController()
+    c.load()
+    c.start()
+    sleep(0.5)                                         # the first poll has seen the file
+    yield c, updates
+    c.stop()
+
+
+def _replace(home, text: str) -> float:
+    """Save config.json the way editors do: a temporary file renamed over it."""
+    tmp = home / "config.json.tmp"
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, home / "config.json")
+    return monotonic()
+
+
+def _wait(cond, sec: float = 3.0) -> None:
+    end = monotonic() + sec
+    while not cond() and monotonic() < end: sleep(0.05)
+
+
+def test_edit_by_rename_updates_once(watched, home):
+    ctrl, updates = watched
+    assert ctrl.watcher.mode == "poll"
+    d = json.loads((home / "config.json").read_text(encoding="utf-8"))
+    d["allowed_times"][0]["limit_minutes"] = 90
+    at = _replace(home, json.dumps(d))
+    _wait(lambda: updates)
+    sleep(1.0)                                         # several polls later: still once
+    assert len(updates) == 1 and updates[0] - at >= backend.CONFIG_DEBOUNCE_SEC
+    assert ctrl.get_cfg().allowed_times.get("Monday").limit_minutes == 90
+
+
+def test_own_usage_write_is_ignored(watched, home):
+    ctrl, updates = watched
+    seen = []
+    ctrl.subscribe(lambda ev: seen.append(ev), ("config",))
+    mtime = (home / "config.json").stat().st_mtime
+    backend.persist_used(123)
+    assert (home / "config.json").stat().st_mtime != mtime
+    sleep(1.0)
+    assert updates == [] and seen == []
+
+
+def test_broken_json_keeps_the_last_good_config(watched, home):
+    ctrl, updates = watched
+    good = ctrl.get_cfg()
+    _replace(home, '{"takt_seconds": 15, "allowed_times": [')
+    _wait(lambda: "keeping last good" in ((home / LOG_FILENAME).read_text(encoding="utf-8")
+                                          if (home / LOG_FILENAME).exists() else ""))
+    sleep(0.5)
+    assert "keeping last good" in (home / LOG_FILENAME).read_text(encoding="utf-8")
+    assert updates == [] and ctrl.get_cfg().same(good)
+    assert backend.load_cfg().takt_seconds == 60
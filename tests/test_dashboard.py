@@ -0,0 +1,92 @@
+"""Dashboard: login through verify_password, and dozens of event-stream viewers."""
+import json
+import selectors
+import socket
+import time
+
+import pytest
+
+import backend
+
+VIEWERS = 50
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+
+@pytest.fixture
+def board(config):
+    port = _free_port()
+    config(takt_seconds=1, dashboard_port=port)
+    c = backend.AppController()
+    c.load()
+    c.start()
+    c.set_password("pw")
+    for _ in range(100):
+        try: socket.create_connection(("127.0.0.1", port), 0.1).close(); break
+        except OSError: time.sleep(0.05)
+    yield c, port
+    c.stop()
+
+
+def _post(port: int, path: str, obj: dict, token: str = "") -> tuple:
+    body = json.dumps(obj).encode()
+    head = "Authorization: Bearer %s\r\n" % token if token else ""
+    with socket.create_connection(("127.0.0.1", port), 5) as s:
+        s.sendall(("POST %s HTTP/1.0\r\nContent-Length: %d\r\n%s\r\n" % (path, len(body), head)).encode() + body)
+        raw = b""
+        while chunk := s.recv(65536): raw += chunk
+    head, _, out = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(out)
+
+
+def test_login_uses_verify_password(board):
+    ctrl, port = board
+    status, out = _post(port, "/api/login", {"password": "kid"})
+    assert status == 401 and "retry_in" in out
+    status, out = _post(port, "/api/login", {"password": "pw"})
+    assert status == 200
+    ctrl.wd.set_used(1200)
+    rem = ctrl.get_remaining()
+    status, out = _post(port, "/api/extend", {"seconds": 600}, out["token"])
+    assert status == 200 and ctrl.get_remaining() > rem
+
+
+def test_wrong_logins_do_not_lock_the_window_out(board):
+    ctrl, port = board
+    waits = [_post(port, "/api/login", {"password": "guess"})[1]["retry_in"] for _ in range(6)]
+    assert waits[-1] > 0                               # this device backs off
+    status, out = _post(port, "/api/login", {"password": "pw"})
+    assert status == 401 and out["retry_in"] > 0       # even with the right password
+    got = []
+    ctrl.check_password_async("pw", lambda ok, wait: got.append((ok, wait)))
+    end = time.monotonic() + 5
+    while not got and time.monotonic() < end: time.sleep(0.01)
+    assert got == [(True, 0.0)]                        # the window is not delayed
+
+
+def test_dozens_of_viewers_cost_little_cpu(board):
+    """Every viewer gets every per-second update; the whole process stays far
+    below a tenth of a core while pushing to all of them."""
+    ctrl, port = board
+    sel = selectors.DefaultSelector()
+    got = {}
+    for _ in range(VIEWERS):
+        s = socket.create_connection(("127.0.0.1", port), 5)
+        s.sendall(b"GET /api/events HTTP/1.0\r\n\r\n")
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ)
+        got[s] = 0
+    try:
+        cpu, t0 = time.process_time(), time.monotonic()
+        while time.monotonic() - t0 < 4.0:
+            for key, _ in sel.select(0.5):
+                data = key.fileobj.recv(65536)
+                got[key.fileobj] += data.count(b"\ndata: ") + data.startswith(b"data: ")
+        cpu = time.process_time() - cpu
+        assert min(got.values()) >= 3                  # the first state, then the ticks
+        assert cpu < 0.1 * 4.0, "%.2f s CPU for %d viewers" % (cpu, VIEWERS)
+    finally:
+        for s in got: sel.unregister(s); s.close()
@@ -0,0 +1,62 @@
+"""i18n: plural forms, digit grouping (Russian: a no-break space), and the cost
+of the per-second texts."""
+from datetime import datetime
+from time import perf_counter
+
+import pytest
+
+from backend import fmt_num, fmt_rem, format_date, t
+
+RU = [(1, "one"), (2, "few"), (4, "few"), (5, "many"), (11, "many"), (12, "many"), (14, "many"),
+      (21, "one"), (22, "few"), (25, "many"), (101, "one"), (111, "many"), (112, "many"), (1004, "few")]
+RU_TEXT = {"one": "осталась {} минута", "few": "осталось {} минуты", "many": "осталось {} минут"}
+
+
+@pytest.mark.parametrize("n, form", RU)
+def test_russian_one_few_many(n, form):
+    want = RU_TEXT[form].format(fmt_num("RU", n))
+    assert t("RU", "tray_tip", m=n) == want
+
+
+@pytest.mark.parametrize("lang, n, text", [
+    ("EN", 1, "1 minute left"), ("EN", 0, "0 minutes left"), ("EN", 2, "2 minutes left"),
+    ("DE", 1, "noch 1 Minute"), ("DE", 21, "noch 21 Minuten"),
+])
+def test_one_and_other(lang, n, text):
+    assert t(lang, "tray_tip", m=n) == text
+
+
+@pytest.mark.parametrize("lang, n, text", [
+    ("EN", 999, "999"), ("EN", 1000, "1,000"), ("EN", 1234567, "1,234,567"),
+    ("DE", 12345, "12.345"), ("RU", 12345, "12\u00a0345"), ("RU", -4500, "-4\u00a0500"),
+])
+def test_number_grouping(lang, n, text):
+    assert fmt_num(lang, n) == text
+
+
+def test_large_counts_are_grouped_in_texts():
+    assert t("EN", "tray_tip", m=1500) == "1,500 minutes left"
+    assert t("RU", "tray_tip", m=1001) == "осталась 1\u00a0001 минута"
+    assert t("DE", "tray_extend", s=999) == "➕ +999s"            # below a thousand: as is
+
+
+def test_per_second_texts():
+    assert fmt_rem(3 * 86400 + 3600 + 62, "DE") == "⏳ 3T 1h 1m 02s"
+    assert fmt_rem(59, "RU") == "⏳ 59с"
+    assert format_date("EN", datetime(2026, 3, 2, 7, 5, 9)) == "\U0001f4c5 Monday, 07:05:09"
+    assert format_date("RU", datetime(2026, 3, 8, 23, 0, 0)) == "\U0001f4c5 Воскресенье, 23:00:00"
+
+
+def test_per_second_path_timing(capsys):
+    """What the window formats every second: the date, the remaining time and the
+    status line; best of several rounds, against a generous ceiling."""
+    now, n, best = datetime(2026, 3, 2, 12, 0, 0), 2000, float("inf")
+    for lang in ("EN", "DE", "RU"): format_date(lang, now); fmt_rem(1, lang)   # catalogs loaded
+    for _ in range(5):
+        t0 = perf_counter()
+        for i in range(n):
+            format_date("RU", now); fmt_rem(5400 - i, "RU"); t("RU", "sb_allowed_until", dt="18:30")
+        best = min(best, (perf_counter() - t0) / n)
+    with capsys.disabled():
+        print("\nper-second texts: %.1f us" % (best * 1e6))
+    assert best < 100e-6                               # measured: about 4 us
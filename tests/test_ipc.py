@@ -0,0 +1,36 @@
+"""ControlServer: each connection is locked or unlocked on its own."""
+import pytest
+
+from ipc import ControlServer, _ipc_connect
+
+
+@pytest.fixture
+def server(ctrl):
+    ctrl.set_password("pw")
+    s = ControlServer(ctrl, on_quit=lambda: None)
+    s.start()
+    yield s
+    s.stop()
+
+
+def _call(conn, name, *args):
+    conn.send((name, args, {}))
+    kind, v = conn.recv()
+    if kind == "err": raise v
+    return v
+
+
+def test_password_unlocks_only_its_own_connection(server):
+    admin, kid = _ipc_connect(server.token), _ipc_connect(server.token)
+    with admin, kid:
+        assert _call(admin, "check_password", "pw")[0]
+        assert _call(admin, "snapshot", -1)["unlocked"]
+        assert not _call(kid, "snapshot", -1)["unlocked"]
+        with pytest.raises(PermissionError):
+            _call(kid, "grant_time", 600)
+        with pytest.raises(PermissionError):
+            _call(kid, "extend", 600)                  # far from the last takt
+        _call(admin, "grant_time", 600)
+        _call(admin, "lock")
+        with pytest.raises(PermissionError):
+            _call(admin, "reset_timer")
@@ -0,0 +1,53 @@
+"""Lean resident: the tray process settles under its memory and thread budget."""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")      # no tray icon; pystray needs no display then
+pytest.importorskip("pystray")
+
+from definitions import HOME_ENV, LEAN_RSS_BUDGET_MB, LEAN_THREAD_BUDGET
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Tray.run() with pystray's dummy backend: everything but the icon loop, which
+# only reports that the resident is up and then blocks as the real one does.
+CHILD = """
+import sys, threading
+import tray
+t = tray.Tray()
+def loop():
+    print("tkinter" in sys.modules, flush=True)
+    threading.Event().wait()
+t.icon.run = loop
+t.run()
+"""
+
+
+def _status(pid: int) -> dict:
+    with open("/proc/%d/status" % pid) as f:
+        return dict(line.split(":", 1) for line in f if ":" in line)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs /proc")
+def test_resident_stays_under_budget(config, home):
+    config(takt_seconds=1, tray_only=True)
+    p = subprocess.Popen([sys.executable, "-c", CHILD], cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                         env={**os.environ, HOME_ENV: str(home), "PYTHONPATH": str(ROOT)})
+    try:
+        assert p.stdout.readline().strip() == "False"  # up, and no Tk loaded
+        samples = []
+        for _ in range(6):                             # steady state: a few ticks later
+            time.sleep(0.5)
+            st = _status(p.pid)
+            samples.append((int(st["VmRSS"].split()[0]) / 1024, int(st["Threads"])))
+    finally:
+        p.kill()
+        p.communicate()
+    rss, threads = max(s[0] for s in samples), max(s[1] for s in samples)
+    assert rss < LEAN_RSS_BUDGET_MB, "%.1f MiB resident" % rss
+    assert threads <= LEAN_THREAD_BUDGET, "%d threads" % threads
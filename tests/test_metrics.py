@@ -0,0 +1,58 @@
+"""Metrics overhead: a tick's instrumentation must stay cheap enough to leave on."""
+import threading
+from time import perf_counter
+
+import backend
+import metrics
+
+TICKS, ROUNDS = 500, 7
+
+
+def _tick(wd, observe) -> None:
+    """The locked, synchronous part of one Watchdog pass, as _run does it."""
+    t0 = perf_counter()
+    with wd._lock:
+        wd._remaining(wd._cfg, 0); cfg = wd._cfg
+    wd._enforced(cfg, wd._used)
+    wd.checkpoint()
+    wd.get_remaining()
+    if observe: backend._h_tick.observe(perf_counter() - t0)
+
+
+def _per_tick(wd, observe: bool) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):                            # best of: the least disturbed round
+        t0 = perf_counter()
+        for _ in range(TICKS): _tick(wd, observe)
+        best = min(best, (perf_counter() - t0) / TICKS)
+    return best
+
+
+def test_instrumented_tick_costs_microseconds(config, capsys):
+    config(takt_seconds=60)
+    ctrl = backend.AppController()
+    ctrl.load()
+    wd   = ctrl.wd
+    timed = _per_tick(wd, True)
+    wd._lock = threading.RLock()                       # the same tick, uninstrumented
+    bare  = _per_tick(wd, False)
+    with capsys.disabled():
+        print("\ntick: %.1f us instrumented, %.1f us bare RLock" % (timed * 1e6, bare * 1e6))
+    assert timed - bare < 50e-6                        # measured: about 8 us over 16 us
+
+
+def test_timed_lock_against_bare_rlock():
+    h = metrics.Histogram("test_lock_seconds", "benchmark only")
+    metrics._metrics.remove(h)
+    timed, bare = metrics.TimedRLock(h, h), threading.RLock()
+    cost = {}
+    for name, lock in (("timed", timed), ("bare", bare)):
+        best = float("inf")
+        for _ in range(ROUNDS):
+            t0 = perf_counter()
+            for _ in range(10000):
+                with lock: pass
+            best = min(best, (perf_counter() - t0) / 10000)
+        cost[name] = best
+    assert h.counts and sum(h.counts) == 2 * ROUNDS * 10000
+    assert cost["timed"] - cost["bare"] < 20e-6        # measured: about 2 us
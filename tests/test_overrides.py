@@ -0,0 +1,148 @@
+"""Date overrides: OverrideIndex precedence against a walk over the entry list,
+profile / as_day / inline targets, and the ICS import."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import backend
+from backend import Config, override_for, parse_ics, rule_for
+from definitions import DAYS_EN
+
+WEEKDAYS = DAYS_EN[:5]
+SCHOOL   = [{"days": WEEKDAYS, "start": "15:00", "end": "18:00", "use_timer": False}]
+
+
+def _cfg(overrides: list) -> Config:
+    cfg = Config({"allowed_times": [{"days": DAYS_EN, "use_timer": True, "limit_minutes": 60}],
+                  "profiles": {"school": SCHOOL}, "overrides": overrides})
+    assert not cfg.problems, cfg.problems
+    return cfg
+
+
+def _reference(overrides: list, day: date) -> dict | None:
+    """The governing entry by walking the list: last single date, else last range."""
+    iso    = day.isoformat()
+    single = [e for e in overrides if e.get("date") == iso]
+    if single: return single[-1]
+    ranges = [e for e in overrides if "from" in e and e["from"] <= iso <= e["to"]]
+    return ranges[-1] if ranges else None
+
+
+def _label(cfg: Config, day: date) -> str | None:
+    e = override_for(cfg, day)
+    return None if e is None else e.label
+
+
+HOLIDAY = {"from": "2026-10-12", "to": "2026-10-23", "name": "holiday", "as_day": "Saturday"}
+EXAM    = {"from": "2026-10-19", "to": "2026-10-21", "name": "exam", "profile": "school"}
+TRIP    = {"date": "2026-10-20", "name": "trip", "enabled": False}
+TRIP2   = {"date": "2026-10-20", "name": "trip2", "use_timer": False}
+
+
+@pytest.mark.parametrize("overrides, day, want", [
+    ([HOLIDAY], "2026-10-11", None),
+    ([HOLIDAY], "2026-10-12", "holiday"),
+    ([HOLIDAY], "2026-10-23", "holiday"),                  # "to" is inclusive
+    ([HOLIDAY], "2026-10-24", None),
+    ([HOLIDAY, EXAM], "2026-10-19", "exam"),               # later range over earlier
+    ([EXAM, HOLIDAY], "2026-10-19", "holiday"),
+    ([HOLIDAY, EXAM], "2026-10-22", "holiday"),            # the earlier one resumes
+    ([TRIP, HOLIDAY, EXAM], "2026-10-20", "trip"),         # single day over any range
+    ([HOLIDAY, TRIP, EXAM], "2026-10-20", "trip"),
+    ([TRIP, TRIP2], "2026-10-20", "trip2"),                # the last single day wins
+    ([TRIP], "2026-10-21", None),
+])
+def test_precedence(overrides, day, want):
+    d = date.fromisoformat(day)
+    assert _label(_cfg(overrides), d) == want
+    ref = _reference(overrides, d)
+    assert (ref and ref["name"]) == want
+
+
+def test_precedence_matches_a_walk_over_the_entries():
+    rnd, first = random.Random(26), date(2026, 1, 1)
+    for _ in range(50):
+        overrides = []
+        for i in range(rnd.randint(1, 12)):
+            a = first + timedelta(days=rnd.randrange(90))
+            e = ({"date": a.isoformat()} if rnd.random() < 0.4 else
+                 {"from": a.isoformat(), "to": (a + timedelta(days=rnd.randrange(20))).isoformat()})
+            overrides.append({**e, "name": "e%d" % i, "as_day": "Sunday"})
+        cfg = _cfg(overrides)
+        for o in range(first.toordinal() - 2, first.toordinal() + 115):
+            day = date.fromordinal(o)
+            ref = _reference(overrides, day)
+            assert _label(cfg, day) == (ref and ref["name"]), (overrides, day)
+            entry, end = cfg.index.span(o)                 # constant up to the next boundary
+            assert entry is override_for(cfg, day)
+            for p in range(o, min(end or o + 30, o + 30)):
+                assert override_for(cfg, date.fromordinal(p)) is entry
+
+
+@pytest.mark.parametrize("target, day, want", [
+    ({"profile": "school"}, "2026-10-19", ("15:00", "18:00", False, True)),   # Monday
+    ({"profile": "school"}, "2026-10-24", None),                              # not in the profile
+    ({"profile": "missing"}, "2026-10-19", None),
+    ({"as_day": "Monday"}, "2026-10-24", ("00:00", "00:00", True, True)),
+    ({"start": "09:00", "end": "12:00", "use_timer": False}, "2026-10-24",
+     ("09:00", "12:00", False, True)),
+    ({"enabled": False}, "2026-10-19", ("00:00", "00:00", True, False)),
+])
+def test_profile_as_day_and_inline_targets(target, day, want):
+    cfg = _cfg([{"from": "2026-10-19", "to": "2026-10-25", **target}])
+    r   = rule_for(cfg, date.fromisoformat(day))
+    assert (r and (r.start, r.end, r.use_timer, r.enabled)) == want
+
+
+def test_single_inline_day_over_profile_range():
+    cfg = _cfg([{"from": "2026-10-19", "to": "2026-10-25", "profile": "school"},
+                {"date": "2026-10-20", "start": "08:00", "end": "09:00", "use_timer": False}])
+    assert rule_for(cfg, date(2026, 10, 19)).start == "15:00"
+    assert rule_for(cfg, date(2026, 10, 20)).start == "08:00"
+    assert rule_for(cfg, date(2026, 10, 26)).use_timer     # the weekday schedule again
+
+
+# --- ICS import -------------------------------------------------------------
+
+ICS = "\r\n".join([
+    "BEGIN:VCALENDAR",
+    "BEGIN:VEVENT",
+    "DTSTART;VALUE=DATE:20261026",
+    "DTEND;VALUE=DATE:20261031",
+    "SUMMARY:Herbst",
+    " ferien",
+    "RRULE:FREQ=YEARLY",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "DTSTART;VALUE=DATE:20261103",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "DTSTART:20261110T080000",
+    "DTEND:20261110T120000",
+    "SUMMARY:Exam",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "SUMMARY:no start",
+    "END:VEVENT",
+    "BEGIN:VEVENT",
+    "DTSTART;VALUE=DATE:2026-13-01",
+    "END:VEVENT",
+    "END:VCALENDAR",
+])
+
+
+def test_ics_import(home):
+    got = parse_ics(ICS, profile="school")
+    assert got == [
+        {"from": "2026-10-26", "to": "2026-10-30", "profile": "school", "name": "Herbstferien"},
+        {"from": "2026-11-03", "to": "2026-11-03", "profile": "school"},
+        {"from": "2026-11-10", "to": "2026-11-10", "profile": "school", "name": "Exam"},
+    ]
+    cfg = _cfg(got)
+    for day, want in (("2026-10-25", None), ("2026-10-26", "Herbstferien"),
+                      ("2026-10-30", "Herbstferien"), ("2026-10-31", None),
+                      ("2026-11-03", "school"), ("2026-11-10", "Exam")):
+        assert _label(cfg, date.fromisoformat(day)) == want, day
+    assert parse_ics(ICS, enabled=False)[0]["enabled"] is False
+    assert backend.Config({"overrides": parse_ics(ICS, as_day="Sunday")}).problems == ()
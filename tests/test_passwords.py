@@ -0,0 +1,55 @@
+"""Admin password: legacy hashes are upgraded on login, wrong guesses back off."""
+import hashlib
+from time import monotonic, sleep
+
+import backend
+from definitions import PW_BACKOFF_SEC, PW_FREE_ATTEMPTS
+
+
+def _stored() -> str:
+    return backend.load_cfg(fresh=True).password_hash
+
+
+def test_legacy_sha256_is_rewritten_after_login(config, home):
+    legacy = hashlib.sha256(b"pw").hexdigest()
+    config(password_hash=legacy)
+    c = backend.AppController()
+    c.load()
+    c.start()
+    try:
+        assert backend.pw_needs_upgrade(legacy)
+        assert c.verify_password("wrong") == (False, 0.0)
+        assert _stored() == legacy                     # only a correct login upgrades
+        assert c.verify_password("pw") == (True, 0.0)
+        end = monotonic() + 5
+        while _stored() == legacy and monotonic() < end: sleep(0.05)
+        new = _stored()
+        assert new.startswith(backend._pw_scheme() + "$") and not backend.pw_needs_upgrade(new)
+        assert backend.verify_pw("pw", new) and not backend.verify_pw("wrong", new)
+        assert c.verify_password("pw") == (True, 0.0)
+    finally:
+        c.stop()
+
+
+def test_backoff_answers_without_hashing(config, monkeypatch):
+    config(password_hash=backend.hash_pw("pw"))
+    hashed = []
+    verify = backend.verify_pw
+    monkeypatch.setattr(backend, "verify_pw", lambda pw, stored: hashed.append(pw) or verify(pw, stored))
+    c = backend.AppController()
+    c.load()
+    for i in range(PW_FREE_ATTEMPTS - 1):
+        assert c.verify_password("guess%d" % i) == (False, 0.0)
+    ok, wait = c.verify_password("guess")             # the last free attempt starts the lockout
+    assert not ok and 0 < wait <= PW_BACKOFF_SEC
+    assert len(hashed) == PW_FREE_ATTEMPTS
+
+    for pw in ("again", "pw"):                         # even the right one, inside the lockout
+        ok, retry_in = c.verify_password(pw)
+        assert not ok and retry_in > 0
+    assert len(hashed) == PW_FREE_ATTEMPTS             # answered without hashing
+
+    sleep(wait + 0.05)
+    ok, wait = c.verify_password("wrong")              # each failure doubles the lockout
+    assert not ok and PW_BACKOFF_SEC < wait <= 2 * PW_BACKOFF_SEC
+    assert c.verify_password("pw", client="web:10.0.0.7") == (True, 0.0)   # other clients unaffected
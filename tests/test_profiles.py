@@ -0,0 +1,82 @@
+"""Per-account profiles: dozens of accounts sharing one Watchdog stay apart."""
+import json
+import random
+from datetime import datetime
+from time import monotonic, sleep
+
+import backend
+from definitions import DAYS_EN, STATE_FILENAME, USER_USAGE_FILENAME, USERS_DIR
+
+ACCOUNTS = ["kid%02d" % i for i in range(36)]
+
+
+def _week(minutes: int) -> list:
+    return [{"days": d, "enabled": True, "start": "00:00", "end": "00:00",
+             "use_timer": True, "limit_minutes": minutes} for d in DAYS_EN]
+
+
+def _limit(name: str) -> int:
+    return 60 * (30 + ACCOUNTS.index(name) if name else 60)     # "": the conftest week
+
+
+def _users(config, **settings) -> None:
+    config(users={a: {"allowed_times": _week(_limit(a) // 60)} for a in ACCOUNTS}, **settings)
+
+
+def _persisted(home, name: str) -> int:
+    key = "used_seconds_" + datetime.now().strftime("%Y-%m-%d")
+    p   = home / USERS_DIR / name / USER_USAGE_FILENAME if name else home / "config.json"
+    return json.loads(p.read_text(encoding="utf-8")).get(key, 0)
+
+
+def test_switches_keep_every_profile_apart(config, home):
+    _users(config, takt_seconds=60)
+    rnd  = random.Random(50)
+    ctrl = backend.AppController()
+    ctrl.load()
+    wd, used = ctrl.wd, {}
+    for _ in range(300):
+        name = rnd.choice(ACCOUNTS + [""])
+        wd._switch(name)
+        assert wd.get_user() == name
+        assert wd.get_remaining() == _limit(name) - used.get(name, 0)
+        used[name] = used.get(name, 0) + rnd.randrange(1, 120)
+        wd.set_used(used[name])
+    wd._switch("")                                     # saves the last one
+
+    for name, sec in used.items():
+        assert _persisted(home, name) == sec
+        if name: assert (home / USERS_DIR / name / STATE_FILENAME).exists()
+    assert sorted(p.name for p in (home / USERS_DIR).iterdir()) == sorted(n for n in used if n)
+
+    backend._cache.update(cfg=None, mtime=0.0, watched=False)
+    again = backend.AppController()
+    again.load()
+    for name in rnd.sample(sorted(used), len(used)):   # restored from users/<acct>/
+        again.wd._switch(name)
+        assert again.wd.get_remaining() == _limit(name) - used[name]
+
+
+def test_session_user_drives_the_switch(config, home, monkeypatch):
+    _users(config, takt_seconds=60)
+    who = {"name": "kid03"}
+    monkeypatch.setattr(backend, "session_user", lambda: who["name"])
+    monkeypatch.setattr(backend, "SESSION_POLL_SEC", 0.1)
+    switched = []
+    ctrl = backend.AppController()
+    ctrl.subscribe(lambda ev: switched.append(ev.args[0]), ("session",))
+    ctrl.load()
+    ctrl.start()
+    try:
+        for name in ("kid03", "KID17", "nobody", "kid03"):
+            who["name"] = name
+            want = ctrl.get_cfg().user_profile(name)
+            end  = monotonic() + 5
+            while ctrl.get_user() != want and monotonic() < end: sleep(0.05)
+            assert ctrl.get_user() == want
+        sleep(2.5)                                     # kid03 counts, the others not
+    finally:
+        ctrl.stop()
+    assert switched[:3] == ["kid03", "kid17", ""]
+    assert _persisted(home, "kid17") <= 1 and _persisted(home, "") <= 1
+    assert _persisted(home, "kid03") >= 2
@@ -0,0 +1,181 @@
+"""Scheduling core against day-by-day / minute-by-minute reference walks:
+the closed-form chain end (_first_closed, calc_remaining, next_lock) and
+iter_transitions' midnight deferral and cancellation."""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend import (Config, _first_closed, _is_open, calc_remaining, iter_transitions,
+                     next_lock, rule_for, should_enforce)
+from definitions import DAYS_EN, UNLIMITED
+
+MINUTE = timedelta(minutes=1)
+OPEN   = {"use_timer": False}
+OFF    = {"enabled": False}
+
+
+def _cfg(times: list, overrides: list = (), **profiles) -> Config:
+    cfg = Config({"allowed_times": times, "overrides": list(overrides), "profiles": profiles})
+    assert not cfg.problems, cfg.problems
+    return cfg
+
+
+def _mon_sat(sunday: dict = OFF) -> list:
+    """Mon–Sat fully open, Sunday as given."""
+    return [{"days": DAYS_EN[:6], **OPEN}, {"days": "Sunday", **sunday}]
+
+
+def _ref_first_closed(cfg: Config, o: int, horizon: int = 800) -> int | None:
+    for p in range(o, o + horizon):
+        if not _is_open(rule_for(cfg, date.fromordinal(p))): return p
+    return None
+
+
+def _ref_lock(cfg: Config, now: datetime, horizon: int = 800) -> datetime | None:
+    """First minute should_enforce() locks with the PC in use since *now*.
+
+    Whole open days are stepped over at midnight, every other day minute by minute.
+    """
+    t, used, day = now, 0, now.date()
+    while t < now + timedelta(days=horizon):
+        if t.date() != day: day, used = t.date(), 0
+        if t.hour == t.minute == 0 and _is_open(rule_for(cfg, day)):
+            t += timedelta(days=1); continue
+        if should_enforce(cfg, used, t): return t
+        used += 60; t += MINUTE
+    return None
+
+
+WED = datetime(2026, 10, 21, 12, 0)                    # the Sunday after: 2026-10-25
+
+
+@pytest.mark.parametrize("sunday, overrides, now, want", [
+    (OFF, [], WED, datetime(2026, 10, 25)),
+    (OFF, [], datetime(2026, 10, 24, 23, 30), datetime(2026, 10, 25)),
+    (OFF, [], datetime(2026, 10, 25, 12, 0), datetime(2026, 10, 25, 12, 0)),   # locked now
+    ({"limit_minutes": 90}, [], WED, datetime(2026, 10, 25, 1, 30)),           # timer from 00:00
+    ({"start": "00:00", "end": "09:00", **OPEN}, [], WED, datetime(2026, 10, 25, 9, 0)),
+    ({"start": "10:00", "end": "12:00", **OPEN}, [], WED, datetime(2026, 10, 25)),
+    (OFF, [{"date": "2026-10-25", **OPEN}], WED, datetime(2026, 11, 1)),        # open Sunday
+    (OFF, [{"from": "2026-10-20", "to": "2026-11-10", "profile": "holiday"}], WED,
+     datetime(2026, 11, 15)),                                                  # through the range
+    (OFF, [{"date": "2026-10-23", **OFF}], WED, datetime(2026, 10, 23)),       # closed Friday
+    (OFF, [{"from": "2026-10-22", "to": "2026-10-30", "as_day": "Sunday"}], WED,
+     datetime(2026, 10, 22)),
+    (OPEN, [], WED, None),                                                     # open forever
+    (OPEN, [{"date": "2027-03-01", **OFF}], WED, datetime(2027, 3, 1)),
+])
+def test_mon_sat_open_sunday_off(sunday, overrides, now, want):
+    cfg = _cfg(_mon_sat(sunday), overrides, holiday=[{"days": DAYS_EN, **OPEN}])
+    assert next_lock(cfg, 0, now) == want
+    assert _ref_lock(cfg, now) == want
+    rem = calc_remaining(cfg, 0, now)
+    assert rem == (UNLIMITED if want is None else int((want - now).total_seconds()))
+    o = now.toordinal()
+    assert _first_closed(cfg, o) == _ref_first_closed(cfg, o)
+
+
+# only fully open days chain; a window or timer day ends before midnight here
+WINDOWS = ({"start": "00:00", "end": "09:00"}, {"start": "08:00", "end": "20:00"},
+           {"start": "18:00", "end": "23:00"})
+
+
+def _random_cfg(rnd: random.Random, windows: tuple = WINDOWS) -> Config:
+    def day(d):
+        x = rnd.random()
+        if x < 0.6: return {"days": d, **OPEN}
+        if x < 0.7: return {"days": d, **OFF}
+        if x < 0.8: return {"days": d, **OPEN, **rnd.choice(windows)}
+        return {"days": d, "limit_minutes": rnd.choice((30, 90))}
+    overrides = []
+    for _ in range(rnd.randint(0, 6)):
+        a = date(2026, 10, 1) + timedelta(days=rnd.randrange(60))
+        e = ({"date": a.isoformat()} if rnd.random() < 0.5 else
+             {"from": a.isoformat(), "to": (a + timedelta(days=rnd.randrange(30))).isoformat()})
+        overrides.append({**e, **rnd.choice((OPEN, OFF, {"profile": "holiday"},
+                                             {"as_day": rnd.choice(DAYS_EN)}))})
+    return _cfg([day(d) for d in DAYS_EN], overrides,
+                holiday=[day(d) for d in rnd.sample(DAYS_EN, rnd.randint(0, 7))])
+
+
+def test_closed_form_matches_the_walk():
+    rnd = random.Random(27)
+    for _ in range(60):
+        cfg = _random_cfg(rnd)
+        for o in range(date(2026, 9, 28).toordinal(), date(2026, 12, 31).toordinal(), 3):
+            assert _first_closed(cfg, o) == _ref_first_closed(cfg, o), (cfg.to_json(), o)
+        now = datetime(2026, 10, 1 + rnd.randrange(30), rnd.randrange(22), rnd.randrange(60))
+        assert next_lock(cfg, 0, now) == _ref_lock(cfg, now), (cfg.to_json(), now)
+
+
+# --- iter_transitions -------------------------------------------------------
+
+def _ref_transitions(cfg: Config, used_today: int, start: datetime, days: int) -> list:
+    """(minute, state) wherever should_enforce() flips, the PC in use whenever unlocked."""
+    out, t, used, day = [], start, used_today, start.date()
+    locked = should_enforce(cfg, used, t)
+    while t < start + timedelta(days=days):
+        if t.date() != day: day, used = t.date(), 0
+        now_locked = should_enforce(cfg, used, t)
+        if now_locked != locked:
+            locked = now_locked
+            out.append((t, "lock" if locked else "unlock"))
+        if not locked: used += 60
+        t += MINUTE
+    return out
+
+
+MON = datetime(2026, 10, 19, 12, 0)
+REST_OFF = {"days": DAYS_EN[2:], **OFF}                # Wednesday to Sunday
+
+
+@pytest.mark.parametrize("times, start, days, want", [
+    # a window up to 24:00, then one from 00:00: the midnight lock is cancelled
+    ([{"days": "Monday", "start": "18:00", "end": "00:00", **OPEN},
+      {"days": "Tuesday", "start": "00:00", "end": "08:00", **OPEN}, REST_OFF], MON, 3,
+     [(datetime(2026, 10, 19, 18), "unlock", "window_open"),
+      (datetime(2026, 10, 20, 8), "lock", "window_close")]),
+    # ... and into a timer day: counted from 00:00
+    ([{"days": "Monday", "start": "18:00", "end": "00:00", **OPEN},
+      {"days": "Tuesday", "limit_minutes": 30}, REST_OFF], MON, 3,
+     [(datetime(2026, 10, 19, 18), "unlock", "window_open"),
+      (datetime(2026, 10, 20, 0, 30), "lock", "budget")]),
+    # the next window opens later: the deferred lock happens at midnight
+    ([{"days": "Monday", "start": "18:00", "end": "00:00", **OPEN},
+      {"days": "Tuesday", "start": "08:00", "end": "09:00", **OPEN}, REST_OFF], MON, 3,
+     [(datetime(2026, 10, 19, 18), "unlock", "window_open"),
+      (datetime(2026, 10, 20), "lock", "window_close"),
+      (datetime(2026, 10, 20, 8), "unlock", "window_open"),
+      (datetime(2026, 10, 20, 9), "lock", "window_close")]),
+    # Mon–Sat open, Sunday off: no midnight events inside the open run
+    (_mon_sat(), datetime(2026, 10, 21, 12), 13,
+     [(datetime(2026, 10, 25), "lock", "day_off"),
+      (datetime(2026, 10, 26), "unlock", "midnight"),
+      (datetime(2026, 11, 1), "lock", "day_off"),
+      (datetime(2026, 11, 2), "unlock", "midnight")]),
+    (_mon_sat(OPEN), MON, 30, []),
+])
+def test_midnight_deferral_and_cancellation(times, start, days, want):
+    cfg = _cfg(times)
+    end = start + timedelta(days=days) - MINUTE
+    got = list(iter_transitions(cfg, 0, start, end, now=start))
+    assert got == want
+    assert [(ts, st) for ts, st, _ in got] == _ref_transitions(cfg, 0, start, days)
+
+
+def test_open_forever_ends_the_generator():
+    assert list(iter_transitions(_cfg(_mon_sat(OPEN)), 0, MON, None, now=MON)) == []
+
+
+def test_transitions_match_the_walk():
+    rnd = random.Random(28)
+    windows = WINDOWS + ({"start": "18:00", "end": "00:00"}, {"start": "00:00", "end": "06:00"},
+                         {"start": "22:00", "end": "00:00", "use_timer": True, "limit_minutes": 90})
+    for _ in range(40):
+        cfg   = _random_cfg(rnd, windows)
+        start = datetime(2026, 10, 1 + rnd.randrange(30), rnd.randrange(24), rnd.randrange(60))
+        used  = rnd.choice((0, 600, 3600))
+        got   = [(ts, st) for ts, st, _ in
+                 iter_transitions(cfg, used, start, start + timedelta(days=10) - MINUTE, now=start)]
+        assert got == _ref_transitions(cfg, used, start, 10), (cfg.to_json(), start, used)
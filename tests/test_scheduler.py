@@ -0,0 +1,103 @@
+"""UI scheduler: nothing is armed while the window is withdrawn, and a visible
+tick only reaches Tcl for options that changed."""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tkinter")
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")      # no tray icon; pystray needs no display then
+
+import frontend
+from frontend import SchedulerMixin, set_opts
+
+
+class Label:
+    """Widget stand-in counting config() calls."""
+    def __init__(self):
+        self.calls = 0
+
+    def config(self, **kw):
+        self.calls += 1
+
+
+class Window(SchedulerMixin):
+    """SchedulerMixin without a display; after() is a manual clock."""
+    def __init__(self, clock):
+        self.clock, self.pending, self._n = clock, {}, 0
+        self._init_sched()
+
+    def bind(self, *args):
+        pass
+
+    def after(self, ms, fn):
+        self._n += 1
+        self.pending[self._n] = (self.clock.now + ms / 1000, fn)
+        return self._n
+
+    def after_cancel(self, key):
+        self.pending.pop(key, None)
+
+    def run_for(self, sec: float) -> None:
+        """Advance the clock by *sec*, firing the after() callbacks that fall due."""
+        end = self.clock.now + sec
+        while self.pending:
+            key = min(self.pending, key=lambda k: self.pending[k][0])
+            at, fn = self.pending[key]
+            if at > end: break
+            del self.pending[key]
+            self.clock.now = max(self.clock.now, at); fn()
+        self.clock.now = end
+
+
+@pytest.fixture
+def win(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(frontend, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(frontend, "_TCL", {"calls": 0, "skipped": 0})
+    return Window(clock)
+
+
+def test_withdrawn_window_arms_nothing(win):
+    rem, sb = [3600], Label()
+
+    def tick():
+        rem[0] -= 1
+        set_opts(sb, text="%d s" % rem[0], foreground="blue")
+    win.every("tick", 1000, tick, now=True)
+    assert not win.pending                             # starts withdrawn: no job armed
+    win.run_for(60)
+    assert rem == [3600] and sb.calls == 0
+
+    win.set_visible(True)
+    win.run_for(60)
+    assert 3600 - rem[0] == 61 and sb.calls == 61      # the overdue tick once, then 1 s apart
+    assert frontend._TCL["skipped"] == sb.calls - 1    # foreground unchanged after the first
+
+    win.set_visible(False)
+    assert not win.pending
+    win.run_for(600)
+    stats = win.sched_stats()
+    assert stats["hidden"]["wakeups_min"] == 0 and stats["hidden"]["tcl_min"] == 0
+    assert stats["visible"]["wakeups_min"] == 61
+    assert stats["hidden"]["seconds"] == 660 and stats["visible"]["seconds"] == 60
+
+
+def test_hidden_job_keeps_only_itself_armed(win):
+    fired = {"tick": 0, "front": 0}
+    win.every("tick", 1000, lambda: fired.__setitem__("tick", fired["tick"] + 1))
+    win.every("front", 500, lambda: fired.__setitem__("front", fired["front"] + 1), run_hidden=True)
+    win.run_for(10)
+    assert fired == {"tick": 0, "front": 20} and len(win.pending) == 1
+    win.cancel_job("front")
+    assert not win.pending
+
+
+def test_unchanged_config_is_skipped(win):
+    sb = Label()
+    win.set_visible(True)
+    win.every("tick", 1000, lambda: set_opts(sb, text="same", foreground="blue"))
+    win.run_for(60)
+    assert sb.calls == 1                               # the first tick only
+    assert frontend._TCL["skipped"] == 2 * 59
+    assert win.sched_stats()["visible"]["skipped_min"] == 118
@@ -0,0 +1,137 @@
+"""Supervisor: a Watchdog hung in a callback, a disk write or on its lock is replaced."""
+import json
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+import backend
+from definitions import DAYS_EN
+
+
+def _wait(pred, timeout: float = 10.0) -> bool:
+    end = monotonic() + timeout
+    while monotonic() < end:
+        if pred(): return True
+        sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def fast(home, monkeypatch):
+    """One-second takt, two-second stall limit, supervisor rounds of 0.1 s."""
+    monkeypatch.setattr(backend, "SUPERVISOR_CHECK_SEC", 0.1)
+    monkeypatch.setattr(backend, "STALL_SEC_LO", 2)
+    monkeypatch.setattr(backend, "WRITE_LOCK_TIMEOUT_SEC", 0.3)
+
+    def write(enabled=True):
+        days = [{"days": d, "enabled": enabled, "start": "00:00", "end": "00:00",
+                 "use_timer": True, "limit_minutes": 60} for d in DAYS_EN]
+        (home / "config.json").write_text(json.dumps(
+            {"takt_seconds": 1, "stall_seconds": 2, "allowed_times": days}), encoding="utf-8")
+    write()
+    return write
+
+
+@pytest.fixture
+def hang(monkeypatch):
+    """hang(owner, name) makes owner.name block on its first call until the test ends."""
+    release, hit = threading.Event(), threading.Event()
+
+    def install(owner, name):
+        real = getattr(owner, name)
+
+        def hung(*args, **kw):
+            if not hit.is_set():
+                hit.set(); release.wait()
+            return real(*args, **kw)
+        monkeypatch.setattr(owner, name, hung)
+        return hit
+    yield install
+    release.set()
+
+
+@pytest.fixture
+def running(fast):
+    started = []
+
+    def start(**callbacks):
+        c = backend.AppController(**callbacks)
+        c.load()
+        c.start()
+        started.append(c)
+        return c
+    yield start
+    for c in started: c.stop()
+
+
+def _replaced(ctrl, old) -> bool:
+    return ctrl.wd is not old and monotonic() - ctrl.wd.beat < 1.5
+
+
+def test_hung_checkpoint_write_is_replaced(running, hang):
+    ctrl = running()
+    old  = ctrl.wd
+    assert hang(backend.Checkpoint, "write").wait(5)
+    assert _wait(lambda: _replaced(ctrl, old))
+    assert ctrl.supervisor.restarts == 1 and not old.running
+
+
+def test_hung_save_cfg_is_replaced(running, hang):
+    ctrl = running()
+    old  = ctrl.wd
+    hit  = hang(backend, "save_cfg")
+    ctrl.wd.kick()                                     # a kicked tick saves
+    assert hit.wait(5)
+    assert _wait(lambda: _replaced(ctrl, old))
+    before = ctrl.wd.get_remaining()
+    assert _wait(lambda: ctrl.wd.get_remaining() < before)   # the new one still counts
+
+
+def test_held_watchdog_lock_replaces_the_core_loop(running):
+    ctrl = running()
+    old, core = ctrl.wd, ctrl.core
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with old._lock:
+            held.set(); release.wait()
+    threading.Thread(target=hold, daemon=True).start()
+    try:
+        assert held.wait(5)
+        assert _wait(lambda: _replaced(ctrl, old))     # the tick blocks on the loop itself
+        assert ctrl.core is not core and ctrl.core.responsive(1.0)
+    finally:
+        release.set()
+
+
+def test_hung_on_trigger_does_not_stall_enforcement(fast, running):
+    fast(enabled=False)                                # blocked all week: triggers every takt
+    called, release = threading.Event(), threading.Event()
+
+    def on_trigger(key, action):
+        called.set(); release.wait()
+    ctrl = running(on_trigger=on_trigger)
+    try:
+        assert called.wait(5)
+        sleep(4.0)                                     # well past stall_seconds
+        assert ctrl.supervisor.restarts == 0
+        assert monotonic() - ctrl.wd.beat < 1.5
+    finally:
+        release.set()
+
+
+def test_failed_replacement_leaves_the_old_watchdog_and_retries(running, hang, monkeypatch):
+    ctrl = running()
+    old  = ctrl.wd
+    prime, seen = backend.Watchdog.prime, []
+
+    def failing(wd, cfg):
+        if not seen:
+            seen.append(old.running)                   # not retired yet
+            raise OSError("state.bin unreadable")
+        prime(wd, cfg)
+    monkeypatch.setattr(backend.Watchdog, "prime", failing)
+    assert hang(backend.Checkpoint, "write").wait(5)
+    assert _wait(lambda: _replaced(ctrl, old))
+    assert seen == [True] and ctrl.supervisor.restarts == 1
@@ -0,0 +1,100 @@
+"""TimeBank over several weeks: rollover stays capped and expires, granted seconds
+are neither lost nor created by settle, settle_until, draw and grant."""
+import random
+from datetime import date
+
+import pytest
+
+from backend import Config, TimeBank, rule_for
+from definitions import DAYS_EN
+
+START = date(2026, 2, 2).toordinal()               # a Monday
+WEEKS = 6
+
+
+def _config(rnd: random.Random) -> Config:
+    days = [{"days": d, "enabled": rnd.random() > 0.1, "start": "00:00", "end": "00:00",
+             "use_timer": rnd.random() > 0.2, "limit_minutes": rnd.choice((0, 30, 60, 120))}
+            for d in DAYS_EN]
+    return Config({"takt_seconds": 30, "allowed_times": days,
+                   "rollover_minutes": rnd.choice((0, 20, 60, 180)), "rollover_days": rnd.randrange(1, 8)})
+
+
+def _budget(cfg: Config, o: int) -> int:
+    r = rule_for(cfg, date.fromordinal(o))
+    return r.limit_sec if r and r.enabled and r.use_timer else None
+
+
+def _check(cfg: Config, bank: TimeBank, granted: int, spent: int) -> None:
+    rolled = [(o, sec) for o, sec, k in bank.lots if k == "rollover"]
+    assert bank.rollover == sum(sec for _, sec in rolled) <= cfg.rollover_minutes * 60
+    assert all(bank.settled - cfg.rollover_days < o <= bank.settled for o, _ in rolled)
+    assert all(sec > 0 for _, sec, _ in bank.lots)
+    assert bank.today == bank.rollover + bank.drawn
+    assert granted == spent + bank.drawn + bank.grants
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_weeks_of_grants_draws_and_rollover(seed):
+    rnd   = random.Random(seed)
+    cfg   = _config(rnd)
+    bank  = TimeBank().settle_until(cfg, START, {})
+    usage, granted, spent = {}, 0, 0               # spent: withdrawn, or drawn and the day closed
+    o = START
+    while o < START + 7 * WEEKS:
+        for _ in range(rnd.randrange(3)):          # the parent grants, takes back, the child draws
+            sec = rnd.choice((600, 1800, -300, -3600))
+            was = bank.grants
+            bank = bank.grant(sec, o)
+            granted += max(0, sec); spent += max(0, was - bank.grants) if sec < 0 else 0
+            bank = bank.draw(rnd.choice((0, 300, 900, 5000)))
+            _check(cfg, bank, granted, spent)
+        budget = _budget(cfg, o)
+        usage[date.fromordinal(o).isoformat()] = used = rnd.randrange(0, 2 * (budget or 3600) + 1)
+        before, skip = bank, rnd.choice((1, 1, 1, 2, 3))
+        spent += bank.drawn
+        if skip == 1 and rnd.random() < 0.5:
+            bank = bank.settle(cfg, o, used)
+        else:                                      # the program was off until o + skip
+            bank = bank.settle_until(cfg, o + skip, usage)
+            for d in range(o + 1, o + skip): usage[date.fromordinal(d).isoformat()] = 0
+        assert bank.grants == before.grants and bank.drawn == 0
+        _check(cfg, bank, granted, spent)
+        if skip == 1 and budget is not None:       # the day's lot: what was left, up to the cap
+            left = budget + before.drawn - used
+            room = max(0, cfg.rollover_minutes * 60 - before.rollover)
+            new  = sum(sec for d, sec, k in bank.lots if d == o and k == "rollover")
+            assert new == (min(left, room) if left > 0 else 0)
+        o += skip
+
+
+def test_catching_up_matches_settling_every_day():
+    """A gap of up to rollover_days days, replayed by settle_until, ends where the
+    bank would be had it been settled every day."""
+    rnd   = random.Random(40)
+    cfg   = Config({**_config(rnd).to_json(), "rollover_minutes": 90, "rollover_days": 4})
+    usage = {date.fromordinal(o).isoformat(): rnd.randrange(0, 9000) for o in range(START, START + 21)}
+    daily = [TimeBank(settled=START - 1).grant(1200, START).draw(600)]
+    for o in range(START, START + 21):
+        daily.append(daily[-1].settle(cfg, o, usage[date.fromordinal(o).isoformat()]))
+    for k, bank in enumerate(daily):
+        for gap in range(1, cfg.rollover_days + 1):
+            if k + gap < len(daily):
+                caught = bank.settle_until(cfg, START + k + gap, usage)
+                assert caught.to_json() == daily[k + gap].to_json(), (k, gap)
+
+
+def test_rollover_expires_after_rollover_days():
+    cfg  = Config({"allowed_times": [{"days": d, "enabled": True, "start": "00:00", "end": "00:00",
+                                      "use_timer": True, "limit_minutes": 30} for d in DAYS_EN],
+                   "rollover_minutes": 60, "rollover_days": 2})
+    bank = TimeBank(settled=START - 1)
+    bank = bank.settle(cfg, START, 600)            # 20 min left
+    bank = bank.settle(cfg, START + 1, 0)          # 30 min left
+    assert [(o - START, sec) for o, sec, _ in bank.lots] == [(0, 1200), (1, 1800)]
+    bank = bank.settle(cfg, START + 2, 0)          # 10 min room; the first lot expires
+    assert [(o - START, sec) for o, sec, _ in bank.lots] == [(1, 1800), (2, 600)]
+    bank = bank.settle(cfg, START + 3, 1800 + 2000)  # over budget: paid from the oldest lot
+    assert [(o - START, sec) for o, sec, _ in bank.lots] == [(2, 400)]
+    bank = bank.settle(cfg, START + 4, 1800)
+    assert bank.lots == () and bank.today == 0
@@ -0,0 +1,60 @@
+"""LiveIcon: an hour of one-second ticks composes an image only when the label changes."""
+import os
+from time import process_time
+
+import pytest
+
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")      # no tray icon; pystray needs no display then
+pytest.importorskip("pystray")
+
+import backend
+import tray
+
+
+class Icon:
+    """pystray.Icon stand-in counting what the tray would be handed."""
+    def __init__(self):
+        self.__dict__.update(images=0, titles=0)
+
+    def __setattr__(self, k, v):
+        self.__dict__[k] = v
+        if k == "icon":  self.__dict__["images"] += 1
+        if k == "title": self.__dict__["titles"] += 1
+
+
+@pytest.fixture
+def live(config):
+    config(takt_seconds=30)
+    ctrl = backend.AppController()
+    ctrl.load()
+
+    def make():
+        li = tray.LiveIcon(ctrl)
+        li.icon = Icon()
+        return li
+    return make
+
+
+@pytest.mark.parametrize("start, images, titles", [
+    (3600,     61, 61),      # minutes 60 .. 1, and warn within the last takt
+    (5 * 3600,  1, 60),      # "5h" all hour; the tooltip still counts minutes
+])
+def test_an_hour_of_ticks(live, start, images, titles, capsys):
+    li  = live()
+    cpu = process_time()
+    for i in range(3600): li.push(start - i)
+    cpu = process_time() - cpu
+    assert (li.icon.images, li.icon.titles) == (images, titles)
+    assert li.updates == images - 1                    # the first image is not an update
+    with capsys.disabled():
+        print("\n%d s left: %d images, %.1f ms CPU for the hour" % (start, images, cpu * 1e3))
+
+
+def test_compose_cost(live, capsys):
+    li, n = live(), 2000
+    cpu = process_time()
+    for i in range(n): li.render(60 * (1 + i % 99))
+    per = (process_time() - cpu) / n
+    with capsys.disabled():
+        print("\ncompose: %.0f us CPU per image" % (per * 1e6))
+    assert per < 1e-3                                  # measured: 30 to 50 us
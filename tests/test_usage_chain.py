@@ -0,0 +1,106 @@
+"""usage.log / usage.key: the daily counter held against the signed log."""
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def boot(home):
+    """boot(offline) starts a controller on *home*; the previous one is stopped first and
+    offline() runs in between, as a restart with the files edited meanwhile would."""
+    running = []
+
+    def start(offline=None):
+        if running:
+            running.pop().stop()
+            backend._cache.update(cfg=None, mtime=0.0, watched=False)
+            backend._chain["obj"] = None
+        if offline is not None: offline()
+        c = backend.AppController()
+        c.load()
+        c.start()
+        running.append(c)
+        return c
+    yield start
+    if running: running.pop().stop()
+
+
+def _tamper(home, *remove):
+    """Delete the files *remove* and zero today's counter in config.json."""
+    def edit():
+        for n in remove + ("state.bin",): (home / n).unlink(missing_ok=True)
+        p = home / "config.json"
+        d = json.loads(p.read_text(encoding="utf-8"))
+        d["used_seconds_" + datetime.now().strftime("%Y-%m-%d")] = 0
+        p.write_text(json.dumps(d), encoding="utf-8")
+    return edit
+
+
+def test_usage_key_holds_no_key(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    raw  = (home / "usage.key").read_bytes()
+    salt = raw[4:20]
+    assert len(raw) == 36 and backend.derive_chain_key("pw", salt) not in raw
+    ch = backend.UsageChain(home / "usage.log")
+    assert ch.sealed and ch.verify(required=True)
+
+
+def test_deleted_log_with_password_is_tampering(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    ctrl.wd.set_used(600)
+    c = boot(_tamper(home, "usage.key", "usage.log"))
+    assert backend.usage_chain().tampered
+    assert c.get_remaining() == 0
+
+
+def test_lowered_counter_is_raised_to_signed_value(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    ctrl.wd.set_used(600)
+    c = boot(_tamper(home))
+    assert not backend.usage_chain().tampered
+    assert c.get_remaining() <= 3600 - 600
+
+
+def test_records_wait_for_the_admin_login(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    c    = boot()
+    size = (home / "usage.log").stat().st_size
+    c.wd.set_used(900)
+    c.wd.flush()
+    assert backend.usage_chain().sealed and (home / "usage.log").stat().st_size == size
+    assert c.check_password("pw")
+    assert not backend.usage_chain().sealed and (home / "usage.log").stat().st_size > size
+    ch = backend.UsageChain(home / "usage.log")
+    assert ch.unlock(ch.derive("pw")) and ch.last_used(datetime.now().date().toordinal()) == 900
+
+
+def test_forged_log_is_caught_at_the_admin_login(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    forged = backend.UsageChain(home / "usage.log")
+    forged.rekey(datetime.now().date().toordinal(), 0, forged.derive("kid", os.urandom(16)))
+    c = boot()
+    assert c.get_remaining() > 0                       # sealed: not detectable yet
+    assert c.check_password("pw")
+    assert "does not match" in backend.usage_chain().tampered
+    assert c.get_remaining() == 0
+    c.reset_timer()                                    # admin reset starts a chain under pw
+    ch = backend.UsageChain(home / "usage.log")
+    assert ch.unlock(ch.derive("pw")) and not ch.tampered
+
+
+def test_removing_the_password_retires_the_log(home, boot):
+    ctrl = boot()
+    ctrl.set_password("pw")
+    assert (home / "usage.key").exists()
+    ctrl.set_password("")
+    assert not (home / "usage.key").exists() and not (home / "usage.log").exists()
+    assert backend.usage_chain().verify(required=False)
@@ -0,0 +1,96 @@
+"""what_if against the scalar rules: each candidate day replayed minute by minute
+through should_enforce / calc_remaining must give the same numbers."""
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import backend
+from backend import Config, TimeBank, calc_remaining, period_base, should_enforce
+from definitions import DAYS_EN, UNLIMITED
+
+
+def _hm(m: int) -> str:
+    return "%02d:%02d" % divmod(m % 1440, 60)
+
+
+def _candidate(rnd: random.Random, periods: bool = False) -> dict:
+    days = []
+    for d in DAYS_EN:
+        lo = rnd.randrange(0, 1440, 15)
+        hi = rnd.choice((lo, 0, rnd.randrange(0, 1440, 15)))      # none, to midnight, any
+        days.append({"days": d, "enabled": rnd.random() > 0.15, "start": _hm(lo), "end": _hm(hi),
+                     "use_timer": rnd.random() > 0.3, "limit_minutes": rnd.choice((0, 30, 90, 240, 900))})
+    cfg = {"takt_seconds": 30, "allowed_times": days}
+    if periods:
+        cfg["week_limit_minutes"]  = rnd.choice((0, 120, 600, 1500))
+        cfg["month_limit_minutes"] = rnd.choice((0, 900, 3000))
+        cfg["rollover_minutes"]    = rnd.choice((0, 0, 45, 240))
+        cfg["rollover_days"]       = rnd.randrange(1, 8)
+    return cfg
+
+
+def _replay(cfg: Config, day, active, base, bank) -> tuple:
+    """(lock minute or -1, seconds used) from should_enforce, one minute at a time."""
+    midnight, used = datetime.combine(day, time.min), 0
+    for m in range(1440):
+        if not active[m]: continue
+        if should_enforce(cfg, used, midnight + timedelta(minutes=m), base, bank): return m, used
+        used += 60
+    return -1, used
+
+
+def _reference(cfg: Config, day, usage, base=(0, 0), bank=0) -> tuple:
+    """(allowed minutes, lock minute, seconds used) of one day as the Watchdog would
+    enforce it; *base* is the week / month usage before *day*, *bank* TimeBank.today."""
+    midnight = datetime.combine(day, time.min)
+    ok    = [not should_enforce(cfg, 0, midnight + timedelta(minutes=m), base, bank) for m in range(1440)]
+    first = ok.index(True) if True in ok else 0
+    if isinstance(usage, int):
+        usage = [first <= m < first + -(-usage // 60) for m in range(1440)]
+    rem = calc_remaining(cfg, 0, midnight + timedelta(minutes=first), base, bank) if any(ok) else 0
+    allowed = sum(ok) if rem == UNLIMITED else min(sum(ok), -(-rem // 60))
+    return (allowed,) + _replay(cfg, day, usage, base, bank)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_matches_the_scalar_rules(seed):
+    rnd   = random.Random(seed)
+    cfgs  = [_candidate(rnd) for _ in range(6)]
+    dates = [date(2026, 3, 2) + timedelta(days=i) for i in range(7)]
+    secs  = [rnd.choice((0, 600, 3599, 7200, 40000, 86400)) for _ in dates]
+    acts  = np.zeros((len(dates), 1440), dtype=bool)
+    for row in acts:
+        a = rnd.randrange(1440); row[a:a + rnd.randrange(1, 600)] = True
+    for usage in (secs, acts):
+        allowed, lock_at = backend.what_if(cfgs, dates, usage)
+        for k, c in enumerate(cfgs):
+            cfg = Config(c)
+            for i, d in enumerate(dates):
+                u = usage[i] if isinstance(usage, list) else list(usage[i])
+                assert (allowed[k, i], lock_at[k, i]) == _reference(cfg, d, u)[:2], (seed, k, d.isoformat())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_periods_and_rollover_carry_across_days(seed):
+    """Across a week and a month boundary, with recorded use earlier in both: each
+    candidate's period totals and banked rollover are what it would itself have
+    allowed (its bank starting empty)."""
+    rnd   = random.Random(seed)
+    cfgs  = [_candidate(rnd, periods=True) for _ in range(6)]
+    dates = [date(2026, 3, 26) + timedelta(days=i) for i in range(10)]     # Thu .. Sat
+    hist  = {(date(2026, 3, 10) + timedelta(days=i)).isoformat(): rnd.randrange(0, 9000)
+             for i in range(16)}
+    secs  = [rnd.choice((0, 1800, 7200, 40000)) for _ in dates]
+    base  = period_base(Config({"used_seconds_" + d: s for d, s in hist.items()}), dates[0])
+    allowed, lock_at = backend.what_if(cfgs, dates, secs, base)
+    for k, c in enumerate(cfgs):
+        usage, bank = dict(hist), TimeBank(settled=dates[0].toordinal() - 1)
+        for i, d in enumerate(dates):
+            cfg = Config({**c, **{"used_seconds_" + x: s for x, s in usage.items()}})
+            a, at, used = _reference(cfg, d, secs[i], period_base(cfg, d), bank.today)
+            assert (allowed[k, i], lock_at[k, i]) == (a, at), (seed, k, d.isoformat())
+            usage[d.isoformat()] = used
+            bank = bank.settle(cfg, d.toordinal(), used)
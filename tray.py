@@ -0,0 +1,227 @@
+"""YourTime – lean resident: system-tray menu over AppController, no Tk in this process.
+
+Selected with "tray_only": true. The menu shows the remaining time and login
+state and offers extend and "open settings"; the Tk settings window is a
+short-lived child process (``--settings``) that drives the AppController
+through ControlServer and exits when it is closed. With "service": true the
+tray is itself a RemoteController client and the service starts the child.
+
+LiveIcon draws the remaining minutes and warn state into the tray icon for
+both this resident and the full window (frontend.py).
+
+Frontend/Backend contract as in frontend.py: AppController plus the public
+helpers only; its events (callbacks, subscribe()) are the only inbound channel.
+"""
+from time import monotonic
+
+import pystray
+from PIL import Image, ImageDraw, ImageFont
+
+from definitions import (
+    APP_NAME, UNLIMITED, TRAY_ICON_SIZE, TRAY_REFRESH_SEC,
+    TRAY_COLORS, TRAY_FONTS, TRAY_FONT_PX,
+    LEAN_RSS_BUDGET_MB, LEAN_THREAD_BUDGET,
+)
+from backend import AppController, do_action
+from ipc import ControlServer
+
+
+# ===========================================================================
+# LiveIcon – remaining minutes in the tray icon, composed from a glyph atlas
+# ===========================================================================
+
+def _font(px: int):
+    for name in TRAY_FONTS:
+        try: return ImageFont.truetype(name, px)
+        except OSError: pass
+    try: return ImageFont.load_default(size=px)
+    except TypeError: return ImageFont.load_default()      # Pillow < 10.1: fixed bitmap font
+
+class LiveIcon:
+    """Tray image and tooltip showing remaining minutes ("2h" from 100 min, "\u221e"
+    without limit) on a background for the state: free, ok or warn (last takt).
+
+    Glyph masks (two sizes) and the state backgrounds are rendered once;
+    attach() subscribes push(remaining) to the controller's Tick events, and
+    only when the label or state changed does it compose an image (a few mask
+    pastes) and hand it to pystray, the tooltip likewise per minute. Tk is
+    never involved.
+    """
+    GLYPHS = "0123456789h\u221e"
+
+    def __init__(self, ctrl):
+        self.ctrl    = ctrl
+        self.icon    = None           # pystray.Icon, set by attach()
+        self.shown   = None           # (label, state) on the icon
+        self.titled  = None           # (minutes, state, lang) in the tooltip
+        self.updates = 0              # images composed after the first
+        w, h = TRAY_ICON_SIZE
+        self._bg = {}
+        for state, col in TRAY_COLORS.items():
+            img = Image.new("RGBA", TRAY_ICON_SIZE, (0, 0, 0, 0))
+            ImageDraw.Draw(img).rounded_rectangle([0, 0, w - 1, h - 1], radius=w // 6, fill=col)
+            self._bg[state] = img
+        self._atlas = [self._glyphs(_font(px)) for px in TRAY_FONT_PX]
+
+    def _glyphs(self, font) -> dict:
+        """ch -> "L" mask one advance wide, cropped to the ink band shared by all glyphs."""
+        asc, desc = font.getmetrics()
+        masks = {}
+        for ch in self.GLYPHS:
+            m = Image.new("L", (max(1, round(font.getlength(ch))), asc + desc))
+            ImageDraw.Draw(m).text((0, 0), ch, font=font, fill=255)
+            masks[ch] = m
+        boxes = [m.getbbox() for m in masks.values() if m.getbbox()]
+        top, bottom = min(b[1] for b in boxes), max(b[3] for b in boxes)
+        return {ch: m.crop((0, top, m.width, bottom)) for ch, m in masks.items()}
+
+    def attach(self, icon: "pystray.Icon") -> None:
+        self.icon = icon
+        self.ctrl.subscribe(lambda ev: self.push(ev.remaining), ("tick",), policy="coalesce")
+
+    @staticmethod
+    def label(rem: int) -> str:
+        if rem == UNLIMITED: return "\u221e"
+        m = (rem + 59) // 60
+        return str(m) if m < 100 else str(min(99, (m + 59) // 60)) + "h"
+
+    def state(self, rem: int) -> str:
+        if rem == UNLIMITED: return "free"
+        return "warn" if rem <= self.ctrl.get_cfg().takt_seconds else "ok"
+
+    def render(self, rem: int) -> "Image.Image":
+        return self._compose(self.label(rem), self.state(rem))
+
+    def _compose(self, text: str, state: str) -> "Image.Image":
+        img = self._bg[state].copy()
+        for glyphs in self._atlas:                   # large glyphs unless the label is too wide
+            masks = [glyphs[ch] for ch in text]
+            width = sum(m.width for m in masks)
+            if width <= img.width: break
+        x, y = (img.width - width) // 2, (img.height - masks[0].height) // 2
+        for m in masks:
+            img.paste((255, 255, 255, 255), (x, y, x + m.width, y + m.height), m)
+            x += m.width
+        return img
+
+    def push(self, rem: int) -> None:
+        """Per tick: update the icon / tooltip if what they show changed."""
+        if self.icon is None: return
+        state, lang = self.state(rem), self.ctrl.get_cfg().language
+        shown = (self.label(rem), state)
+        if shown != self.shown:
+            img = self._compose(*shown)
+            if self.shown is not None: self.updates += 1
+            self.shown = shown
+            self.icon.icon = img
+        m = -1 if rem == UNLIMITED else (rem + 59) // 60
+        if (m, state, lang) != self.titled:
+            self.titled = (m, state, lang)
+            self.icon.title = (APP_NAME + " \u2013 " + (self.ctrl.translate(lang, "tray_tip_free") if m < 0
+                               else self.ctrl.translate(lang, "tray_tip", m=m)))
+
+
+class Tray:
+    """Resident tray icon; the settings window is started on demand as a child process."""
+
+    def __init__(self, ctrl_cls=AppController) -> None:
+        self.ctrl     = ctrl_cls(on_trigger=self._cb_trigger, on_warn=self._cb_warn,
+                                 on_stall=self._cb_stall)
+        self.server   = None                 # enforcement in this process: serves the child
+        if ctrl_cls is AppController: self.server = ControlServer(self.ctrl, on_quit=self.exit)
+        else:                         self.ctrl.on_quit = self.exit
+        self.live     = LiveIcon(self.ctrl)
+        self._menu_at = 0.0                  # monotonic time of the last menu refresh
+        self.icon     = pystray.Icon(APP_NAME, self.live.render(UNLIMITED), APP_NAME, pystray.Menu(
+            pystray.MenuItem(lambda _: self._status(), None, enabled=False),
+            pystray.MenuItem(lambda _: self._t("tray_extend", s=self._takt()), self._on_extend,
+                             enabled=lambda _: self._can_extend()),
+            pystray.MenuItem(lambda _: self._t("tray_open"), lambda *_: self._open(), default=True),
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem(lambda _: self._t("btn_quit"), lambda *_: self.exit(),
+                             visible=lambda _: self._unlocked()),
+        ))
+        self.live.attach(self.icon)
+        self.ctrl.subscribe(self._on_tick, ("tick",), policy="coalesce")
+
+    def run(self) -> None:
+        """Blocks in the tray loop until exit()."""
+        self.ctrl.load()
+        if self.server is not None:
+            self.server.start()
+            self.ctrl.start()
+            self.ctrl.supervisor.budget = (LEAN_RSS_BUDGET_MB, LEAN_THREAD_BUDGET)
+        else:
+            self.ctrl.start()
+        try:
+            self.icon.run()
+        finally:
+            if self.server is not None: self.server.stop()
+            self.ctrl.stop()
+
+    def exit(self) -> None:
+        self.icon.stop()
+
+    # --- backend callbacks --------------------------------------------------
+
+    def _cb_trigger(self, key: str, action: str) -> None:
+        self._notify(key)
+        if self.server is not None: do_action(action)      # a service acts itself
+
+    def _cb_warn(self, minutes: int) -> None:
+        """Warning zone: the settings window takes over foreground enforcement."""
+        self._notify("msg_warn_min", m=minutes)
+        self._open()
+
+    def _cb_stall(self, reason: str) -> None:
+        self._notify("msg_stall")
+
+    def _on_tick(self, ev) -> None:
+        if monotonic() - self._menu_at >= TRAY_REFRESH_SEC: self._refresh()
+
+    # --- menu ---------------------------------------------------------------
+
+    def _t(self, key: str, **kw) -> str:
+        return self.ctrl.translate(self.ctrl.get_cfg().language, key, **kw)
+
+    def _takt(self) -> int:
+        return self.ctrl.get_cfg().takt_seconds
+
+    def _open(self) -> None:
+        if self.server is not None: self.server.open_settings()
+        else:                       self.ctrl.open_settings()
+
+    def _unlocked(self) -> bool:
+        """A password entered in the settings window unlocks that window, not the tray menu."""
+        on = self.server is None and self.ctrl.unlocked()     # a service client: its own session
+        return on or not self.ctrl.has_password()
+
+    def _can_extend(self) -> bool:
+        """Same rule as the window's + button: unlocked, or within one takt of the end."""
+        rem = self.ctrl.get_remaining()
+        return rem != UNLIMITED and (self._unlocked() or rem <= self._takt())
+
+    def _status(self) -> str:
+        lang    = self.ctrl.get_cfg().language
+        allowed = self.ctrl.is_login_allowed()
+        at      = self.ctrl.get_lock_time() if allowed else None
+        txt     = (self._t("sb_allowed_until", dt=self.ctrl.format_lock_time(at, lang))
+                   if at is not None else self._t("sb_allowed" if allowed else "sb_denied"))
+        return self.ctrl.format_remaining(self.ctrl.get_remaining(), lang) + "  " + txt
+
+    def _on_extend(self, *_) -> None:
+        if not self._can_extend(): return
+        t = self._takt()
+        self.ctrl.extend(t)
+        self._notify("msg_extended", s=t)
+        self.icon.update_menu()
+
+    def _refresh(self) -> None:
+        """Re-evaluates the dynamic menu texts; the status line is otherwise frozen."""
+        self._menu_at = monotonic()
+        try: self.icon.update_menu()
+        except Exception: pass
+
+    def _notify(self, key: str, **kw) -> None:
+        try: self.icon.notify(self._t(key, **kw), APP_NAME)
+        except Exception: pass
@@ -0,0 +1,226 @@
+"""YourTime – HTTP on the core loop: request / reply helpers and the dashboard.
+
+Dashboard only uses the public AppController surface it is handed.
+"""
+import os, re, json, asyncio
+from datetime import datetime
+from html import escape
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from definitions import (
+    UNLIMITED, DASHBOARD_PAGE, DASHBOARD_SESSION_SEC, DASHBOARD_VIEWERS, DASHBOARD_BACKLOG_BYTES,
+    DASHBOARD_KEEPALIVE_SEC, DASHBOARD_BODY_MAX, DASHBOARD_ADJUST_MAX_SEC,
+)
+from core import Core, log, res_dir
+
+if TYPE_CHECKING:                      # annotations only: bus and backend import this module
+    from backend import AppController, Config
+    from bus import Event
+
+# ---------------------------------------------------------------------------
+# HTTP/1.x
+# ---------------------------------------------------------------------------
+
+async def http_request(reader, body_max: int = 0) -> tuple:
+    """(method, path without query, headers with lower-case names, body) of one
+    HTTP/1.x request; ValueError when it is malformed or the body exceeds *body_max*."""
+    parts = (await reader.readline()).decode("latin-1").split()
+    if len(parts) < 2: raise ValueError("request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line: break
+        k, _, v = line.partition(":")
+        headers[k.strip().lower()] = v.strip()
+        if len(headers) > 64: raise ValueError("headers")
+    n = int(headers.get("content-length") or 0)
+    if not 0 <= n <= body_max: raise ValueError("body")
+    return parts[0], parts[1].split("?")[0], headers, await reader.readexactly(n) if n else b""
+
+def http_reply(writer, status: str, ctype: str, body: bytes, head: str = "") -> None:
+    """One HTTP/1.0 response; *head* holds extra header lines, each ending in CRLF."""
+    writer.write(("HTTP/1.0 %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n%s\r\n"
+                  % (status, ctype, len(body), head)).encode() + body)
+
+# ---------------------------------------------------------------------------
+# Dashboard – web page for the home LAN
+# ---------------------------------------------------------------------------
+
+def _json_reply(status: str, obj) -> tuple:
+    return status, "application/json; charset=utf-8", json.dumps(obj, separators=(",", ":")).encode()
+
+class Dashboard:
+    """Remaining time and extensions from a phone: a static page at
+    http://<dashboard_host>:<dashboard_port>/ and JSON endpoints, served from
+    the core loop like the metrics endpoint.
+
+    GET /api/state returns the state; GET /api/events pushes it as
+    server-sent events whenever a Watchdog tick (or a trigger, adjustment,
+    config change) changes it – encoded once per change in a bus thread, the
+    same bytes then written to every viewer, so viewers cost a socket write
+    each. A viewer DASHBOARD_BACKLOG_BYTES behind is dropped.
+    POST /api/extend and /api/grant need the bearer token POST /api/login
+    returns for the admin password (throttled per client address, apart from
+    the window's); it expires after DASHBOARD_SESSION_SEC or when the
+    password changes. Without a password they are refused: anyone on the LAN
+    could use them. Plain HTTP – the password crosses the network unencrypted.
+    """
+    PUSH = ("tick", "trigger", "warn", "adjust", "config", "rollover", "resume", "session")
+
+    def __init__(self, ctrl: "AppController", cfg: "Config"):
+        self.ctrl   = ctrl
+        self.host   = cfg.dashboard_host
+        self.port   = cfg.dashboard_port
+        self._core  = None
+        self._http  = None
+        self._ping  = None
+        self._sub   = None
+        self._viewers: set  = set()   # StreamWriters of open event streams (loop thread)
+        self._last: bytes   = b""     # state last pushed
+        self._tokens: dict  = {}      # token -> (monotonic expiry, password_hash it was issued for)
+        self._pages: dict   = {}      # lang -> page with its texts filled in
+
+    def start(self, core: Core) -> None:
+        self._core = core
+        self._sub  = self.ctrl.subscribe(self._on_event, self.PUSH, policy="coalesce")
+        core.call(self._open)
+
+    def stop(self) -> None:
+        if self._sub is not None: self.ctrl.unsubscribe(self._sub)
+        if self._core is not None: self._core.call(self._close)
+
+    def _open(self) -> None:
+        self._ping = self._core.every(DASHBOARD_KEEPALIVE_SEC, self._send_all, b": ping\n\n")
+        self._core.loop.create_task(self._serve())
+
+    def _close(self) -> None:
+        if self._ping is not None: self._ping.cancel()
+        if self._http is not None: self._http.close()
+        for w in self._viewers: w.close()
+        self._viewers.clear()
+
+    async def _serve(self) -> None:
+        try: self._http = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as ex:
+            log(str(datetime.now()) + ": dashboard: %s:%d: %s" % (self.host, self.port, ex))
+
+    # --- state push ---------------------------------------------------------
+
+    def state(self) -> dict:
+        """Plain-data state as /api/state and the event stream send it."""
+        c, cfg = self.ctrl, self.ctrl.get_cfg()
+        lang   = cfg.language
+        rem    = c.get_remaining()
+        warn   = rem != UNLIMITED and rem <= cfg.takt_seconds
+        at     = c.get_lock_time() if not warn else None
+        return {"remaining": None if rem == UNLIMITED else rem,
+                "text": c.format_remaining(rem, lang), "warn": warn,
+                "status": (c.translate(lang, "sb_allowed_until", dt=c.format_lock_time(at, lang))
+                           if at is not None else c.translate(lang, "sb_denied" if warn else "sb_allowed")),
+                "lock_at": at.isoformat(timespec="minutes") if at is not None else None,
+                "binding": c.get_binding(), "override": c.active_override(), "user": c.get_user(),
+                "bank": c.get_bank().total, "takt": cfg.takt_seconds,
+                "has_password": bool(cfg.password_hash)}
+
+    def _encode(self) -> bytes:
+        return json.dumps(self.state(), separators=(",", ":")).encode()
+
+    def _on_event(self, ev: "Event") -> None:
+        """Bus thread: encode the state once for all viewers."""
+        if not self._viewers: return
+        self._core.call(self._push, self._encode())
+
+    def _push(self, data: bytes) -> None:
+        if data == self._last: return                # a tick within the same second, say
+        self._last = data
+        self._send_all(b"data: " + data + b"\n\n")
+
+    def _send_all(self, msg: bytes) -> None:
+        for w in tuple(self._viewers):
+            if w.is_closing() or w.transport.get_write_buffer_size() > DASHBOARD_BACKLOG_BYTES:
+                self._viewers.discard(w); w.close()  # gone, or not reading
+            else: w.write(msg)
+
+    async def _stream(self, reader, writer) -> None:
+        if len(self._viewers) >= DASHBOARD_VIEWERS:
+            http_reply(writer, "503 Service Unavailable", "text/plain", b"too many viewers\n"); return
+        data = await self._core.io(self._encode)
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-store\r\n\r\nretry: 3000\n\n")
+        self._push(data)                             # the others, if it is news to them
+        self._viewers.add(writer)
+        writer.write(b"data: " + data + b"\n\n")
+        try:
+            while await reader.read(1024): pass      # until the viewer goes
+        finally: self._viewers.discard(writer)
+
+    # --- requests -----------------------------------------------------------
+
+    async def _handle(self, reader, writer) -> None:
+        try:
+            method, path, headers, body = await asyncio.wait_for(
+                http_request(reader, DASHBOARD_BODY_MAX), 5)
+            if method == "GET" and path == "/api/events":
+                await self._stream(reader, writer); return
+            peer = (writer.get_extra_info("peername") or ("?",))[0]
+            status, ctype, out = await self._route(method, path, headers, body, peer)
+            http_reply(writer, status, ctype, out, "Cache-Control: no-store\r\n")
+            await writer.drain()
+        except (OSError, ValueError, EOFError, asyncio.TimeoutError): pass
+        finally: writer.close()
+
+    async def _route(self, method: str, path: str, headers: dict, body: bytes, peer: str) -> tuple:
+        io, cfg = self._core.io, self.ctrl.get_cfg()
+        if method == "GET" and path in ("/", "/index.html"):
+            return "200 OK", "text/html; charset=utf-8", await io(self._page, cfg.language)
+        if method == "GET" and path == "/api/state":
+            return _json_reply("200 OK", await io(self.state))
+        if method != "POST" or path not in ("/api/login", "/api/logout", "/api/extend", "/api/grant"):
+            return "404 Not Found", "text/plain", b"not found\n"
+        try: req = json.loads(body or b"{}")
+        except ValueError: req = None
+        if not isinstance(req, dict): return _json_reply("400 Bad Request", {"error": "JSON object expected"})
+        if path == "/api/login":
+            pw = req.get("password")
+            if not cfg.password_hash: return _json_reply("403 Forbidden", {"error": "no admin password set"})
+            if not isinstance(pw, str): return _json_reply("400 Bad Request", {"error": "password"})
+            ok, wait = await self._core.cpu(self.ctrl.verify_password, pw, "web:" + peer)
+            if not ok:
+                return _json_reply("401 Unauthorized", {"error": "wrong password", "retry_in": round(wait, 1)})
+            now = monotonic()
+            self._tokens = {k: v for k, v in self._tokens.items() if v[0] > now}
+            token = os.urandom(24).hex()
+            self._tokens[token] = (now + DASHBOARD_SESSION_SEC, cfg.password_hash)
+            return _json_reply("200 OK", {"token": token, "expires_in": DASHBOARD_SESSION_SEC})
+        token = self._token(headers)
+        if path == "/api/logout":
+            self._tokens.pop(token, None); return _json_reply("200 OK", {})
+        if token is None: return _json_reply("401 Unauthorized", {"error": "login required"})
+        sec = req.get("seconds", cfg.takt_seconds)
+        if type(sec) is not int or not 0 < sec <= DASHBOARD_ADJUST_MAX_SEC:
+            return _json_reply("400 Bad Request", {"error": "seconds"})
+        if path == "/api/grant": await io(self.ctrl.grant_time, sec)
+        else:                    await io(self.ctrl.extend, sec, req.get("from_bank") is True)
+        return _json_reply("200 OK", await io(self.state))
+
+    def _token(self, headers: dict) -> str | None:
+        """The request's bearer token if it is valid, else None."""
+        kind, _, token = headers.get("authorization", "").partition(" ")
+        entry = self._tokens.get(token) if kind.lower() == "bearer" else None
+        if entry is None: return None
+        pw_hash = self.ctrl.get_cfg().password_hash
+        if entry[0] > monotonic() and pw_hash and entry[1] == pw_hash: return token
+        del self._tokens[token]
+        return None
+
+    def _page(self, lang: str) -> bytes:
+        """dashboard.html with each {{key}} replaced by the catalog text, cached per language."""
+        page = self._pages.get(lang)
+        if page is None:
+            try: raw = res_dir().joinpath(*DASHBOARD_PAGE).read_text(encoding="utf-8")
+            except OSError as ex:
+                log(str(datetime.now()) + ": dashboard: " + str(ex)); return b"page missing\n"
+            page = self._pages[lang] = re.sub(
+                r"\{\{(\w+)\}\}", lambda m: escape(self.ctrl.translate(lang, m.group(1))), raw).encode()
+        return page